@@ -1,14 +1,23 @@
 """Provide the 'autogenerate' feature which can produce migration operations
 automatically."""
 
+import collections
 import contextlib
+import copy
+import logging
+import re
 
 from sqlalchemy import inspect
+from sqlalchemy import types as sqltypes
 
 from . import compare
 from . import render
+from .profiling import AutogenProfile
 from .. import util
 from ..operations import ops
+from ..util import compat
+
+log = logging.getLogger(__name__)
 
 
 def compare_metadata(context, metadata):
@@ -133,6 +142,9 @@ def produce_migrations(context, metadata):
 
     compare._populate_migration_script(autogen_context, migration_script)
 
+    if autogen_context.profile is not None:
+        log.info("%s", autogen_context.profile.report())
+
     return migration_script
 
 
@@ -251,6 +263,16 @@ class AutogenContext(object):
     migration_context = None
     """The :class:`.MigrationContext` established by the ``env.py`` script."""
 
+    profile = None
+    """An :class:`.AutogenProfile` collecting timings for this autogenerate
+    operation, or ``None`` if profiling is not enabled.
+
+    .. seealso::
+
+        :paramref:`.EnvironmentContext.configure.profile_autogenerate`
+
+    """
+
     def __init__(
         self, migration_context, metadata=None, opts=None, autogenerate=True
     ):
@@ -310,13 +332,26 @@ class AutogenContext(object):
             self.connection = self.migration_context.bind
             self.dialect = self.migration_context.dialect
 
+        if opts.get("profile_autogenerate", False):
+            self.profile = AutogenProfile()
+
         self.imports = set()
         self.opts = opts
         self._has_batch = False
 
     @util.memoized_property
     def inspector(self):
-        return inspect(self.connection)
+        """Return a :class:`.CachingInspector` for the current connection.
+
+        The same inspector is shared by the table reflection and by all
+        comparison functions, including those established by the
+        :attr:`.comparators` dispatcher, for the duration of the
+        autogenerate run, so that each catalog fact is fetched only once.
+
+        """
+        inspector = CachingInspector._from_inspector(inspect(self.connection))
+        inspector.profile = self.profile
+        return inspector
 
     @contextlib.contextmanager
     def _within_batch(self):
@@ -388,6 +423,190 @@ class AutogenContext(object):
         return result
 
 
+def _project_reflected(value, source_schema, schema, preparer, key=None):
+    if isinstance(value, dict):
+        return dict(
+            (k, _project_reflected(v, source_schema, schema, preparer, k),)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        return type(value)(
+            _project_reflected(v, source_schema, schema, preparer)
+            for v in value
+        )
+    elif key in ("schema", "referred_schema") and value == source_schema:
+        return schema
+    elif key in ("default", "sqltext") and isinstance(
+        value, compat.string_types
+    ):
+        return _schema_qualifier(preparer.quote_schema(source_schema)).sub(
+            lambda match: match.group(1) + preparer.quote_schema(schema) + ".",
+            value,
+        )
+    elif (
+        isinstance(value, sqltypes.SchemaType)
+        and value.schema == source_schema
+    ):
+        value = copy.copy(value)
+        value.schema = schema
+        return value
+    else:
+        return value
+
+
+def _schema_qualifier(quoted_schema):
+    # the schema qualifying an identifier, and not the same text at the
+    # end of a longer identifier; matches the normalization performed by
+    # the schema fingerprints of the dialect
+    return re.compile(r"(^|[^\w$\"])%s\." % re.escape(quoted_schema))
+
+
+def _cached_schema_method(name):
+    def go(self, schema=None, **kw):
+        return self._cached(name, schema, None, kw)
+
+    go.__name__ = name
+    return go
+
+
+def _cached_table_method(name):
+    def go(self, table_name, schema=None, **kw):
+        return self._cached(name, schema, table_name, kw)
+
+    go.__name__ = name
+    return go
+
+
+class CachingInspector(object):
+    """An :class:`~sqlalchemy.engine.reflection.Inspector` which memoizes
+    the results of its reflection methods.
+
+    Results are keyed on the method name, schema and table name, along
+    with any additional keyword arguments, and are retained until
+    :meth:`.CachingInspector.invalidate` is called.   As the inspector
+    is a subclass of the dialect's own inspector class, reflection
+    performed by the inspector itself, such as that of
+    ``reflecttable()``, makes use of the same cache.
+
+    This is the object returned by :attr:`.AutogenContext.inspector`.
+
+    """
+
+    _subclasses = {}
+
+    profile = None
+
+    hits = None
+    """A ``collections.Counter`` of cache hits, keyed on method name."""
+
+    misses = None
+    """A ``collections.Counter`` of cache misses, keyed on method name.
+
+    As each miss calls upon the underlying inspector, this is
+    effectively a count of catalog queries performed.
+
+    """
+
+    @classmethod
+    def _from_inspector(cls, inspector):
+        insp_cls = type(inspector)
+        if insp_cls not in cls._subclasses:
+            cls._subclasses[insp_cls] = type(
+                "Caching%s" % insp_cls.__name__, (cls, insp_cls), {}
+            )
+        caching_inspector = object.__new__(cls._subclasses[insp_cls])
+        caching_inspector.__dict__.update(inspector.__dict__)
+        caching_inspector._result_cache = {}
+        caching_inspector._projected_schemas = {}
+        caching_inspector.hits = collections.Counter()
+        caching_inspector.misses = collections.Counter()
+        return caching_inspector
+
+    def _cached(self, name, schema, table_name, kw):
+        key = (name, schema, table_name, tuple(sorted(kw.items())))
+        try:
+            result = self._result_cache[key]
+        except KeyError:
+            if schema in self._projected_schemas:
+                source_schema = self._projected_schemas[schema]
+                result = _project_reflected(
+                    self._cached(name, source_schema, table_name, kw),
+                    source_schema,
+                    schema,
+                    self.dialect.identifier_preparer,
+                )
+            else:
+                self.misses[name] += 1
+                fn = getattr(super(CachingInspector, self), name)
+                if self.profile is not None:
+                    fn = self.profile.wrap("reflection", fn, name)
+                if table_name is not None:
+                    result = fn(table_name, schema=schema, **kw)
+                elif name == "get_schema_names":
+                    result = fn(**kw)
+                else:
+                    result = fn(schema=schema, **kw)
+            self._result_cache[key] = result
+        else:
+            self.hits[name] += 1
+        return result
+
+    def project_schema(self, schema, source_schema):
+        """Establish that reflection results for ``schema`` are to be
+        derived from those of ``source_schema``, rather than being
+        fetched from the database.
+
+        This is used when the two schemas are known to be structurally
+        identical; references to ``source_schema`` within the results,
+        such as the referred schema of a foreign key or a schema-qualified
+        name within a default expression, are converted to refer to
+        ``schema``.
+
+        """
+        self._projected_schemas[schema] = source_schema
+
+    def invalidate(self, table_name=None, schema=None):
+        """Discard cached results.
+
+        With no arguments, all results are discarded.  If only
+        ``schema`` is given, results for that schema are discarded,
+        which includes those for each table within it.  If
+        ``table_name`` is given, results for that table are discarded,
+        along with the table and view name listings of its schema.
+
+        The dialect-level ``info_cache`` is also cleared, so that
+        subsequent calls return to the database.
+
+        """
+        if table_name is None and schema is None:
+            self._result_cache.clear()
+        else:
+            for key in list(self._result_cache):
+                name, key_schema, key_table_name, kw = key
+                if key_schema != schema:
+                    continue
+                if (
+                    table_name is None
+                    or key_table_name == table_name
+                    or name in ("get_table_names", "get_view_names")
+                ):
+                    del self._result_cache[key]
+        self.info_cache.clear()
+
+    get_schema_names = _cached_schema_method("get_schema_names")
+    get_table_names = _cached_schema_method("get_table_names")
+    get_view_names = _cached_schema_method("get_view_names")
+
+    get_columns = _cached_table_method("get_columns")
+    get_pk_constraint = _cached_table_method("get_pk_constraint")
+    get_foreign_keys = _cached_table_method("get_foreign_keys")
+    get_indexes = _cached_table_method("get_indexes")
+    get_unique_constraints = _cached_table_method("get_unique_constraints")
+    get_check_constraints = _cached_table_method("get_check_constraints")
+    get_table_comment = _cached_table_method("get_table_comment")
+    get_table_options = _cached_table_method("get_table_options")
+
+
 class RevisionContext(object):
     """Maintains configuration and state that's specific to a revision
     file generation operation."""
@@ -408,6 +627,10 @@ class RevisionContext(object):
             # e.g. multiple databases
         }
         self.generated_revisions = [self._default_revision()]
+        if command_args.get("profile", False):
+            self.profile = AutogenProfile()
+        else:
+            self.profile = None
 
     def _to_script(self, migration_script):
         template_args = {}
@@ -476,6 +699,8 @@ class RevisionContext(object):
         self._last_autogen_context = autogen_context = AutogenContext(
             migration_context, autogenerate=autogenerate
         )
+        if self.profile is not None:
+            autogen_context.profile = self.profile
 
         if autogenerate:
             compare._populate_migration_script(
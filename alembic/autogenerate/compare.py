@@ -1,9 +1,10 @@
+import collections
 import contextlib
+import functools
 import logging
 import re
 
 from sqlalchemy import event
-from sqlalchemy import inspect
 from sqlalchemy import schema as sa_schema
 from sqlalchemy import types as sqltypes
 from sqlalchemy.util import OrderedSet
@@ -22,19 +23,38 @@ def _populate_migration_script(autogen_context, migration_script):
     upgrade_ops = migration_script.upgrade_ops_list[-1]
     downgrade_ops = migration_script.downgrade_ops_list[-1]
 
-    _produce_net_changes(autogen_context, upgrade_ops)
+    profile = autogen_context.profile
+    if profile is not None:
+        with profile.timed("phase", "compare"), profile.count_statements(
+            autogen_context.connection
+        ):
+            _produce_net_changes(autogen_context, upgrade_ops)
+    else:
+        _produce_net_changes(autogen_context, upgrade_ops)
     upgrade_ops.reverse_into(downgrade_ops)
 
 
 comparators = util.Dispatcher(uselist=True)
 
 
+def _dispatch_comparators(autogen_context, target, qualifier="default"):
+    profile = autogen_context.profile
+    if profile is not None:
+        return comparators.dispatch(
+            target,
+            qualifier,
+            wrapper=functools.partial(profile.wrap, "comparator"),
+        )
+    else:
+        return comparators.dispatch(target, qualifier)
+
+
 def _produce_net_changes(autogen_context, upgrade_ops):
 
     connection = autogen_context.connection
     include_schemas = autogen_context.opts.get("include_schemas", False)
 
-    inspector = inspect(connection)
+    inspector = autogen_context.inspector
 
     default_schema = connection.dialect.default_schema_name
     if include_schemas:
@@ -44,12 +64,54 @@ def _produce_net_changes(autogen_context, upgrade_ops):
         # replace the "default" schema with None
         schemas.discard(default_schema)
         schemas.add(None)
+
+        if autogen_context.opts.get("dedupe_schemas", False):
+            _project_identical_schemas(autogen_context, schemas)
     else:
         schemas = [None]
 
-    comparators.dispatch("schema", autogen_context.dialect.name)(
-        autogen_context, upgrade_ops, schemas
+    _dispatch_comparators(
+        autogen_context, "schema", autogen_context.dialect.name
+    )(autogen_context, upgrade_ops, schemas)
+
+
+def _project_identical_schemas(autogen_context, schemas):
+    """Group schemas by the structural fingerprint reported by the dialect,
+    and arrange for each group to be reflected only once.
+
+    The first schema in each group is reflected from the database; the
+    inspector derives the reflection results for the remaining members of
+    the group from those of the first.  Each schema is still compared
+    to the model individually.
+
+    """
+    inspector = autogen_context.inspector
+    # the default schema is reflected with unqualified names, which can't
+    # be projected onto other schemas, so it's always reflected directly
+    named_schemas = sorted(s for s in schemas if s is not None)
+
+    fingerprints = autogen_context.migration_context.impl.schema_fingerprints(
+        inspector, named_schemas
     )
+    if fingerprints is None:
+        return
+
+    groups = collections.OrderedDict()
+    for schema in named_schemas:
+        groups.setdefault(fingerprints.get(schema), []).append(schema)
+
+    for group in groups.values():
+        source_schema = group[0]
+        for schema in group[1:]:
+            inspector.project_schema(schema, source_schema)
+        if len(group) > 1:
+            log.info(
+                "Detected %d schemas structurally identical to %r; "
+                "reflecting %r only",
+                len(group) - 1,
+                source_schema,
+                source_schema,
+            )
 
 
 @comparators.dispatch_for("schema")
@@ -62,18 +124,24 @@ def _autogen_for_tables(autogen_context, upgrade_ops, schemas):
         autogen_context.migration_context.version_table_schema
     )
     version_table = autogen_context.migration_context.version_table
+    # the table created by the migration_lock option on backends without
+    # named locks, which may be present from an earlier run
+    lock_table = autogen_context.migration_context._migration_lock_table.name
 
     for s in schemas:
         tables = set(inspector.get_table_names(schema=s))
         if s == version_table_schema:
-            tables = tables.difference(
-                [autogen_context.migration_context.version_table]
-            )
+            tables = tables.difference([version_table, lock_table])
         conn_table_names.update(zip([s] * len(tables), tables))
 
     metadata_table_names = OrderedSet(
         [(table.schema, table.name) for table in autogen_context.sorted_tables]
-    ).difference([(version_table_schema, version_table)])
+    ).difference(
+        [
+            (version_table_schema, version_table),
+            (version_table_schema, lock_table),
+        ]
+    )
 
     _compare_tables(
         conn_table_names,
@@ -134,7 +202,7 @@ def _compare_tables(
             log.info("Detected added table %r", name)
             modify_table_ops = ops.ModifyTableOps(tname, [], schema=s)
 
-            comparators.dispatch("table")(
+            _dispatch_comparators(autogen_context, "table")(
                 autogen_context,
                 modify_table_ops,
                 s,
@@ -166,7 +234,7 @@ def _compare_tables(
 
             modify_table_ops = ops.ModifyTableOps(tname, [], schema=s)
 
-            comparators.dispatch("table")(
+            _dispatch_comparators(autogen_context, "table")(
                 autogen_context, modify_table_ops, s, tname, t, None
             )
             if not modify_table_ops.is_empty():
@@ -195,6 +263,14 @@ def _compare_tables(
             inspector.reflecttable(t, None)
         conn_column_info[(s, tname)] = t
 
+    _prefetch_server_default_comparisons(
+        autogen_context,
+        [
+            (conn_table, tname_to_table[(s or None, tname)])
+            for (s, tname), conn_table in conn_column_info.items()
+        ],
+    )
+
     for s, tname in sorted(existing_tables, key=lambda x: (x[0] or "", x[1])):
         s = s or None
         name = "%s.%s" % (s, tname) if s else tname
@@ -216,7 +292,7 @@ def _compare_tables(
                 inspector,
             ):
 
-                comparators.dispatch("table")(
+                _dispatch_comparators(autogen_context, "table")(
                     autogen_context,
                     modify_table_ops,
                     s,
@@ -229,6 +305,46 @@ def _compare_tables(
                 upgrade_ops.ops.append(modify_table_ops)
 
 
+def _prefetch_server_default_comparisons(autogen_context, table_pairs):
+    """Gather the server default comparisons for columns on all
+    existing tables and hand them to the dialect up front, so that
+    those which need the database to evaluate them can be run in bulk.
+
+    """
+    migration_context = autogen_context.migration_context
+    if migration_context._user_compare_server_default is False:
+        return
+
+    comparisons = []
+    for conn_table, metadata_table in table_pairs:
+        for metadata_col in metadata_table.c:
+            if metadata_col.system or metadata_col.name not in conn_table.c:
+                continue
+            conn_col = conn_table.c[metadata_col.name]
+            if (
+                metadata_col.server_default is None
+                or conn_col.server_default is None
+                or sqla_compat._server_default_is_computed(metadata_col)
+                or sqla_compat._server_default_is_computed(conn_col)
+            ):
+                continue
+            comparisons.append(
+                (
+                    conn_col,
+                    metadata_col,
+                    _render_server_default_for_compare(
+                        metadata_col.server_default,
+                        metadata_col,
+                        autogen_context,
+                    ),
+                    conn_col.server_default.arg.text,
+                )
+            )
+
+    if comparisons:
+        migration_context.impl.prefetch_server_default_comparisons(comparisons)
+
+
 def _make_index(params, conn_table):
     ix = sa_schema.Index(
         params["name"],
@@ -309,7 +425,7 @@ def _compare_columns(
             continue
         alter_column_op = ops.AlterColumnOp(tname, colname, schema=schema)
 
-        comparators.dispatch("column")(
+        _dispatch_comparators(autogen_context, "column")(
             autogen_context,
             alter_column_op,
             schema,
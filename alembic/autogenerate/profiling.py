@@ -0,0 +1,138 @@
+"""Timing and query counting for the autogenerate process."""
+
+import collections
+import contextlib
+import functools
+from timeit import default_timer
+
+from sqlalchemy import event
+
+from .. import util
+
+
+class AutogenProfile(object):
+    """Collects timings and catalog query counts for an autogenerate run.
+
+    An :class:`.AutogenProfile` is present as the
+    :attr:`.AutogenContext.profile` attribute when the
+    :paramref:`.EnvironmentContext.configure.profile_autogenerate` option
+    is enabled, or when the ``--profile`` option is passed to
+    ``alembic revision --autogenerate``.
+
+    Timings are recorded in categories; these include the ``"phase"``
+    category, timing the comparison and rendering phases as a whole,
+    the ``"comparator"`` category, timing each function established
+    using the :attr:`~alembic.autogenerate.comparators` dispatcher,
+    including those registered by the end user, the ``"reflection"``
+    category, timing each inspector method that required a catalog
+    query, and the ``"render_item"`` category, timing calls to the
+    :paramref:`.EnvironmentContext.configure.render_item` hook keyed on
+    the type of object rendered.  Timings are inclusive, so that the
+    time of a ``"schema"`` level comparator includes that of the
+    ``"table"`` and ``"column"`` comparators it invokes.
+
+    """
+
+    def __init__(self):
+        self.timings = collections.OrderedDict()
+        self.statements = 0
+
+    timings = None
+    """An ordered dictionary of ``(category, name)`` to a list of
+    ``[number of calls, total time in seconds]``."""
+
+    statements = None
+    """The number of SQL statements emitted on the connection during
+    the comparison phase."""
+
+    def record(self, category, name, elapsed):
+        """Record a single timed call of ``elapsed`` seconds."""
+
+        entry = self.timings.setdefault((category, name), [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    @contextlib.contextmanager
+    def timed(self, category, name):
+        """Return a context manager which records the time spent within
+        its block."""
+
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.record(category, name, default_timer() - start)
+
+    def wrap(self, category, fn, name=None):
+        """Return a wrapper for the given function which records the time
+        of each call, keyed on the given name, or if not present the
+        function's qualified name."""
+
+        if name is None:
+            name = "%s.%s" % (
+                getattr(fn, "__module__", None),
+                getattr(fn, "__name__", repr(fn)),
+            )
+
+        @functools.wraps(fn)
+        def go(*arg, **kw):
+            with self.timed(category, name):
+                return fn(*arg, **kw)
+
+        return go
+
+    @contextlib.contextmanager
+    def count_statements(self, connection):
+        """Return a context manager which counts the SQL statements
+        emitted on the given connection within its block."""
+
+        if connection is None:
+            yield
+            return
+
+        def before_cursor_execute(*arg):
+            self.statements += 1
+
+        event.listen(
+            connection, "before_cursor_execute", before_cursor_execute
+        )
+        try:
+            yield
+        finally:
+            event.remove(
+                connection, "before_cursor_execute", before_cursor_execute
+            )
+
+    def report(self):
+        """Return the collected timings as a string suitable for display.
+
+        Entries are grouped by category in the order first encountered,
+        and within each category are listed most expensive first.
+
+        """
+
+        categories = util.unique_list(
+            [category for category, _ in self.timings]
+        )
+        lines = ["Autogenerate profile:"]
+        width = max([len(name) for _, name in self.timings] + [4])
+        lines.append(
+            "  %-12s %-*s %8s %10s"
+            % ("category", width, "name", "calls", "time")
+        )
+        for category in categories:
+            entries = sorted(
+                (
+                    (name, entry)
+                    for (entry_category, name), entry in self.timings.items()
+                    if entry_category == category
+                ),
+                key=lambda rec: -rec[1][1],
+            )
+            for name, (calls, elapsed) in entries:
+                lines.append(
+                    "  %-12s %-*s %8d %9.4fs"
+                    % (category, width, name, calls, elapsed)
+                )
+        lines.append("  SQL statements emitted: %d" % self.statements)
+        return "\n".join(lines)
@@ -39,6 +39,21 @@ def _indent(text):
 
 def _render_python_into_templatevars(
     autogen_context, migration_script, template_args
+):
+    profile = autogen_context.profile
+    if profile is not None:
+        with profile.timed("phase", "render"):
+            _render_migration_script_into_templatevars(
+                autogen_context, migration_script, template_args
+            )
+    else:
+        _render_migration_script_into_templatevars(
+            autogen_context, migration_script, template_args
+        )
+
+
+def _render_migration_script_into_templatevars(
+    autogen_context, migration_script, template_args
 ):
     imports = autogen_context.imports
 
@@ -319,6 +334,9 @@ def _add_fk_constraint(autogen_context, op):
             value = op.kw[k]
             if value is not None:
                 args.append("%s=%r" % (k, value))
+    _render_dialect_kwargs(
+        op.kw, args, exclude=kwargs + ["source_schema", "match"]
+    )
 
     return "%(prefix)screate_foreign_key(%(args)s)" % {
         "prefix": _alembic_autogenerate_prefix(autogen_context),
@@ -332,8 +350,35 @@ def _add_pk_constraint(constraint, autogen_context):
 
 
 @renderers.dispatch_for(ops.CreateCheckConstraintOp)
-def _add_check_constraint(constraint, autogen_context):
-    raise NotImplementedError()
+def _add_check_constraint(autogen_context, op):
+    args = [repr(_render_gen_name(autogen_context, op.constraint_name))]
+    if not autogen_context._has_batch:
+        args.append(repr(_ident(op.table_name)))
+    args.append(
+        _render_potential_expr(
+            op.condition, autogen_context, wrap_in_text=False
+        )
+    )
+    if op.schema and not autogen_context._has_batch:
+        args.append("schema=%r" % _ident(op.schema))
+    for k in ("deferrable", "initially"):
+        if op.kw.get(k) is not None:
+            args.append("%s=%r" % (k, op.kw[k]))
+    _render_dialect_kwargs(op.kw, args, exclude=("deferrable", "initially"))
+
+    return "%(prefix)screate_check_constraint(%(args)s)" % {
+        "prefix": _alembic_autogenerate_prefix(autogen_context),
+        "args": ", ".join(args),
+    }
+
+
+def _render_dialect_kwargs(kw, args, exclude=()):
+    """append dialect-specific keyword arguments, of the form
+    ``<dialectname>_<argname>``, to a list of rendered arguments."""
+
+    for k in sorted(kw):
+        if k not in exclude and "_" in k and kw[k] is not None:
+            args.append("%s=%r" % (k, kw[k]))
 
 
 @renderers.dispatch_for(ops.DropConstraintOp)
@@ -455,6 +500,14 @@ def _alter_column(autogen_context, op):
         text += ",\n%sexisting_server_default=%s" % (indent, rendered)
     if schema and not autogen_context._has_batch:
         text += ",\n%sschema=%r" % (indent, schema)
+    dialect_kwargs = []
+    _render_dialect_kwargs(
+        op.kw,
+        dialect_kwargs,
+        exclude=("autoincrement", "existing_autoincrement"),
+    )
+    for arg in dialect_kwargs:
+        text += ",\n%s%s" % (indent, arg)
     text += ")"
     return text
 
@@ -582,7 +635,11 @@ def _user_defined_render(type_, object_, autogen_context):
     if "render_item" in autogen_context.opts:
         render = autogen_context.opts["render_item"]
         if render:
-            rendered = render(type_, object_, autogen_context)
+            if autogen_context.profile is not None:
+                with autogen_context.profile.timed("render_item", type_):
+                    rendered = render(type_, object_, autogen_context)
+            else:
+                rendered = render(type_, object_, autogen_context)
             if rendered is not False:
                 return rendered
     return False
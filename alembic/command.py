@@ -1,9 +1,96 @@
+import contextlib
 import os
 
+from sqlalchemy import engine_from_config
+
 from . import autogenerate as autogen
 from . import util
 from .runtime.environment import EnvironmentContext
+from .runtime.impact import ImpactReport
 from .script import ScriptDirectory
+from .script.revision import RevisionMap
+from .util import compat
+
+
+class MigrationSession(object):
+    """Run commands repeatedly within one process against a shared
+    configuration, script directory and connection.
+
+    Each command function normally parses the configuration file,
+    loads every revision script and runs ``env.py`` afresh.  A
+    :class:`.MigrationSession` instead holds on to the :class:`.Config`,
+    whose file is parsed once, a :class:`.ScriptDirectory` whose revisions
+    are loaded once, and ``env.py`` compiled once, which are used by each
+    command run through the session.  This is useful for a test suite which
+    runs many commands in turn::
+
+        from alembic.command import MigrationSession
+
+        with engine.connect() as connection:
+            session = MigrationSession(
+                Config("alembic.ini"), connection=connection
+            )
+            session.upgrade("head")
+            session.downgrade("base")
+            session.run(command.stamp, "head")
+
+    When a ``connection`` is given, it's placed in the
+    :attr:`.Config.attributes` dictionary under the key ``"connection"``;
+    ``env.py`` must make use of it in lieu of creating its own
+    :class:`~sqlalchemy.engine.Engine`, as described at
+    :ref:`connection_sharing`.
+
+    Revision files added or modified outside of the session, other than
+    by running :func:`.revision` or :func:`.merge` through it, aren't
+    seen until :meth:`.refresh` is called.
+
+    :param config: a :class:`.Config` instance.
+
+    :param connection: optional :class:`~sqlalchemy.engine.Connection`
+     to be shared by each command.
+
+    :param script: optional :class:`.ScriptDirectory` to be used in place of
+     the one given by the configuration, such as one with a
+     :class:`.MemoryRevisionSource`.
+
+    """
+
+    def __init__(self, config, connection=None, script=None):
+        self.config = config
+        if connection is not None:
+            config.attributes["connection"] = connection
+        if script is None:
+            script = ScriptDirectory.from_config(config)
+        self.script = config._script_directory = script
+        self.refresh()
+
+    def refresh(self):
+        """Reload the revision scripts and ``env.py``."""
+
+        self.script.revision_map = RevisionMap(self.script._load_revisions)
+        self.script._header_revision_map = None
+        self.script._compile_env()
+
+    def run(self, fn, *arg, **kw):
+        """Run the given command function with the session's
+        :class:`.Config` and the given arguments."""
+
+        return fn(self.config, *arg, **kw)
+
+    def upgrade(self, revision, **kw):
+        """Run :func:`.upgrade` within the session."""
+
+        return upgrade(self.config, revision, **kw)
+
+    def downgrade(self, revision, **kw):
+        """Run :func:`.downgrade` within the session."""
+
+        return downgrade(self.config, revision, **kw)
+
+    def stamp(self, revision, **kw):
+        """Run :func:`.stamp` within the session."""
+
+        return stamp(self.config, revision, **kw)
 
 
 def list_templates(config):
@@ -108,6 +195,7 @@ def revision(
     rev_id=None,
     depends_on=None,
     process_revision_directives=None,
+    profile=False,
 ):
     """Create a new revision file.
 
@@ -154,6 +242,17 @@ def revision(
 
      .. versionadded:: 0.9.0
 
+    :param profile: when used with ``autogenerate``, collect timings for
+     the comparison and rendering phases, each comparison function,
+     reflection method and ``render_item`` hook, along with a count of
+     SQL statements emitted, and print a report once the revision has
+     been generated; this is the ``--profile`` option to
+     ``alembic revision``.
+
+     .. seealso::
+
+        :class:`.AutogenProfile`
+
     """
 
     script_directory = ScriptDirectory.from_config(config)
@@ -168,6 +267,7 @@ def revision(
         version_path=version_path,
         rev_id=rev_id,
         depends_on=depends_on,
+        profile=profile,
     )
     revision_context = autogen.RevisionContext(
         config,
@@ -218,7 +318,12 @@ def revision(
         # in addition to the hooks present within each run_migrations() call,
         # or at the end of env.py run_migrations_online().
 
-    scripts = [script for script in revision_context.generate_scripts()]
+    with script_directory._deferred_write_hooks():
+        scripts = [script for script in revision_context.generate_scripts()]
+
+    if autogenerate and revision_context.profile is not None:
+        config.print_stdout(revision_context.profile.report())
+
     if len(scripts) == 1:
         return scripts[0]
     else:
@@ -260,7 +365,7 @@ def merge(config, revisions, message=None, branch_label=None, rev_id=None):
     )
 
 
-def upgrade(config, revision, sql=False, tag=None):
+def upgrade(config, revision, sql=False, tag=None, output_dir=None):
     """Upgrade to a later version.
 
     :param config: a :class:`.Config` instance.
@@ -273,8 +378,17 @@ def upgrade(config, revision, sql=False, tag=None):
      ``env.py`` scripts via the :meth:`.EnvironmentContext.get_tag_argument`
      method.
 
+    :param output_dir: with ``--sql`` mode, a directory into which the SQL
+     of each revision is written as a separate file, rather than to
+     standard output; see :class:`.RevisionFileWriter`.
+
     """
 
+    with _statement_writer(config, sql, output_dir) as writer:
+        _upgrade(config, revision, sql, tag, statement_writer=writer)
+
+
+def _upgrade(config, revision, sql, tag, **kw):
     script = ScriptDirectory.from_config(config)
 
     starting_rev = None
@@ -294,11 +408,12 @@ def upgrade(config, revision, sql=False, tag=None):
         starting_rev=starting_rev,
         destination_rev=revision,
         tag=tag,
+        **kw
     ):
         script.run_env()
 
 
-def downgrade(config, revision, sql=False, tag=None):
+def downgrade(config, revision, sql=False, tag=None, output_dir=None):
     """Revert to a previous version.
 
     :param config: a :class:`.Config` instance.
@@ -311,8 +426,17 @@ def downgrade(config, revision, sql=False, tag=None):
      ``env.py`` scripts via the :meth:`.EnvironmentContext.get_tag_argument`
      method.
 
+    :param output_dir: with ``--sql`` mode, a directory into which the SQL
+     of each revision is written as a separate file, rather than to
+     standard output; see :class:`.RevisionFileWriter`.
+
     """
 
+    with _statement_writer(config, sql, output_dir) as writer:
+        _downgrade(config, revision, sql, tag, statement_writer=writer)
+
+
+def _downgrade(config, revision, sql, tag, **kw):
     script = ScriptDirectory.from_config(config)
     starting_rev = None
     if ":" in revision:
@@ -335,9 +459,171 @@ def downgrade(config, revision, sql=False, tag=None):
         starting_rev=starting_rev,
         destination_rev=revision,
         tag=tag,
+        **kw
+    ):
+        script.run_env()
+
+
+@contextlib.contextmanager
+def _statement_writer(config, sql, output_dir):
+    if output_dir is None:
+        yield None
+        return
+    if not sql:
+        raise util.CommandError("--output-dir requires --sql mode")
+
+    from .runtime.offline import RevisionFileWriter
+
+    with RevisionFileWriter(
+        output_dir,
+        encoding=config.get_main_option("output_encoding", "utf-8"),
+    ) as writer:
+        yield writer
+
+
+def impact(config, revision, tag=None):
+    """Show the impact of the operations a pending upgrade would invoke.
+
+    The upgrade isn't run; instead, each operation it would invoke is
+    classified as "metadata-only", "index build", "validation scan" or
+    "full rewrite" according to the dialect and, where ``env.py`` runs with
+    a database connection, the server version; in that case the upgrade
+    proceeds from the current revision of the database, and each operation
+    is annotated with the approximate row count and size of its table.  A
+    range ``<fromrev>:<torev>`` may be given instead, in which case
+    ``env.py`` is run in "offline" mode as for ``--sql``.
+
+    :param config: a :class:`.Config` instance.
+
+    :param revision: target revision, or range of revisions to analyze
+     without a database connection.
+
+    :param tag: an arbitrary "tag" that can be intercepted by custom
+     ``env.py`` scripts via the :meth:`.EnvironmentContext.get_tag_argument`
+     method.
+
+    :return: a :class:`.ImpactReport` object.
+
+    .. seealso::
+
+        :ref:`upgrade_impact`
+
+    """
+
+    script = ScriptDirectory.from_config(config)
+
+    starting_rev = None
+    if ":" in revision:
+        starting_rev, revision = revision.split(":", 2)
+
+    report = ImpactReport()
+
+    def upgrade(rev, context):
+        return script._upgrade_revs(revision, rev)
+
+    def analyze(rev, context):
+        report.analyze(context, upgrade)
+        if not context.as_sql:
+            report.annotate(context)
+        return []
+
+    with EnvironmentContext(
+        config,
+        script,
+        fn=analyze,
+        as_sql=starting_rev is not None,
+        starting_rev=starting_rev,
+        destination_rev=revision,
+        tag=tag,
+        dont_mutate=True,
+        output_buffer=compat.StringIO(),
     ):
         script.run_env()
 
+    config.print_stdout("%s", report.report())
+    return report
+
+
+def stairway(config, workers=None, segments=None, scratch_url=None):
+    """Verify each revision with an upgrade/downgrade/upgrade round trip.
+
+    The revisions are split into segments which are verified in parallel
+    worker processes, each against its own scratch database restored from
+    a snapshot taken at the start of its segment; see :class:`.Stairway`.
+
+    :param config: a :class:`.Config` instance.
+
+    :param workers: number of worker processes; defaults to the number of
+     CPUs.
+
+    :param segments: number of segments; defaults to the number of workers.
+
+    :param scratch_url: database URL of the scratch databases, including
+     the token ``%(name)s``; defaults to SQLite files in a temporary
+     directory.
+
+    """
+
+    # imported here as the stairway module itself runs commands
+    from .runtime import stairway as stairway_
+
+    stairway = stairway_.Stairway(
+        config, workers=workers, segments=segments, scratch_url=scratch_url
+    )
+    results = stairway.run()
+    config.print_stdout("%s", stairway.report())
+
+    failed = [
+        result for result in results if result.status == stairway_.FAILED
+    ]
+    if failed:
+        raise util.CommandError(
+            "%d revision(s) failed round trip verification" % len(failed)
+        )
+    return results
+
+
+def serve(config, socket_path):
+    """Answer commands over a Unix socket, keeping revisions loaded.
+
+    ``heads``, ``current``, ``history``, ``show`` and ``upgrade --sql``
+    requests are answered until interrupted; see :class:`.AlembicServer`.
+
+    Where ``sqlalchemy.url`` is present in the configuration, an
+    :class:`~sqlalchemy.engine.Engine` is created from the
+    ``sqlalchemy.`` options and kept for the life of the server, so that
+    connections are pooled between requests; ``env.py`` makes use of them
+    by way of :attr:`.Config.attributes`, as described at
+    :ref:`connection_sharing`.
+
+    :param config: a :class:`.Config` instance.
+
+    :param socket_path: path of the Unix socket on which to listen.
+
+    """
+
+    # imported here as the server module itself runs commands
+    from .runtime import server as server_
+
+    section = config.get_section(config.config_ini_section, {})
+    if section.get("sqlalchemy.url"):
+        engine = engine_from_config(section, prefix="sqlalchemy.")
+    else:
+        engine = None
+
+    try:
+        server = server_.AlembicServer(config, socket_path, engine=engine)
+        config.print_stdout("Listening on %s", socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+    finally:
+        if engine is not None:
+            engine.dispose()
+
 
 def show(config, rev):
     """Show the revision(s) denoted by the given symbol.
@@ -430,7 +716,9 @@ def history(config, rev_range=None, verbose=False, indicate_current=False):
         _display_history(config, script, base, head)
 
 
-def heads(config, verbose=False, resolve_dependencies=False):
+def heads(
+    config, verbose=False, resolve_dependencies=False, write_manifest=False
+):
     """Show current available heads in the script directory.
 
     :param config: a :class:`.Config` instance.
@@ -439,9 +727,15 @@ def heads(config, verbose=False, resolve_dependencies=False):
 
     :param resolve_dependencies: treat dependency version as down revisions.
 
+    :param write_manifest: also write the heads manifest used by
+     :func:`.check_database`; see
+     :meth:`.ScriptDirectory.write_heads_manifest`.
+
     """
 
     script = ScriptDirectory.from_config(config)
+    if write_manifest:
+        script.write_heads_manifest()
     if resolve_dependencies:
         heads = script.get_revisions("heads")
     else:
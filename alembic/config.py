@@ -137,6 +137,8 @@ class Config(object):
 
     """
 
+    _script_directory = None
+
     @util.memoized_property
     def attributes(self):
         """A Python dictionary for storage of additional state.
@@ -358,6 +360,14 @@ class CommandLine(object):
                         "which this revision should depend on.",
                     ),
                 ),
+                "profile": (
+                    "--profile",
+                    dict(
+                        action="store_true",
+                        help="Report timings and SQL statement counts "
+                        "for the autogenerate process",
+                    ),
+                ),
                 "rev_id": (
                     "--rev-id",
                     dict(
@@ -394,6 +404,46 @@ class CommandLine(object):
                         help="Treat dependency versions as down revisions",
                     ),
                 ),
+                "workers": (
+                    "--workers",
+                    dict(
+                        type=int,
+                        help="Number of worker processes; defaults to the "
+                        "number of CPUs",
+                    ),
+                ),
+                "segments": (
+                    "--segments",
+                    dict(
+                        type=int,
+                        help="Number of segments into which revisions are "
+                        "split; defaults to the number of workers",
+                    ),
+                ),
+                "scratch_url": (
+                    "--scratch-url",
+                    dict(
+                        type=str,
+                        help="URL of scratch databases, including the "
+                        "token %%(name)s",
+                    ),
+                ),
+                "output_dir": (
+                    "--output-dir",
+                    dict(
+                        type=str,
+                        help="With --sql, write the SQL of each revision "
+                        "to a separate file in this directory",
+                    ),
+                ),
+                "write_manifest": (
+                    "--write-manifest",
+                    dict(
+                        action="store_true",
+                        help="Write the heads manifest file to the script "
+                        "directory",
+                    ),
+                ),
                 "autogenerate": (
                     "--autogenerate",
                     dict(
@@ -449,6 +499,7 @@ class CommandLine(object):
                 "directory": "location of scripts directory",
                 "revision": "revision identifier",
                 "revisions": "one or more revisions, or 'heads' for all heads",
+                "socket_path": "path of the Unix socket on which to listen",
             }
             for arg in kwargs:
                 if arg in kwargs_opts:
@@ -101,6 +101,15 @@ class ColumnComment(AlterColumn):
         self.comment = comment
 
 
+class AlterTableActions(AlterTable):
+    """Represent a single ALTER TABLE statement applying several
+    actions, given as already-compiled strings, in sequence."""
+
+    def __init__(self, name, actions, schema=None):
+        super(AlterTableActions, self).__init__(name, schema=schema)
+        self.actions = actions
+
+
 @compiles(RenameTable)
 def visit_rename_table(element, compiler, **kw):
     return "%s RENAME TO %s" % (
@@ -172,6 +181,14 @@ def visit_column_default(element, compiler, **kw):
     )
 
 
+@compiles(AlterTableActions)
+def visit_alter_table_actions(element, compiler, **kw):
+    return "%s %s" % (
+        alter_table(compiler, element.table_name, element.schema),
+        ", ".join(element.actions),
+    )
+
+
 def quote_dotted(name, quote):
     """quote the elements of a dotted name"""
 
@@ -1,9 +1,17 @@
 from collections import namedtuple
+import contextlib
+import logging
+import random
 import re
+import time
 
 from sqlalchemy import cast
+from sqlalchemy import exc as sqla_exc
 from sqlalchemy import schema
+from sqlalchemy import Table
 from sqlalchemy import text
+from sqlalchemy.sql.expression import SelectBase
+from sqlalchemy.sql.expression import UpdateBase
 
 from . import base
 from .. import util
@@ -12,6 +20,8 @@ from ..util.compat import string_types
 from ..util.compat import text_type
 from ..util.compat import with_metaclass
 
+log = logging.getLogger(__name__)
+
 
 class ImplMeta(type):
     def __init__(cls, classname, bases, dict_):
@@ -26,6 +36,30 @@ _impls = {}
 Params = namedtuple("Params", ["token0", "tokens", "args", "kwargs"])
 
 
+class CachedStatement(object):
+    """A statement, given by a function of string values, whose compiled
+    form in offline mode is cached by the :class:`.DefaultImpl` under a
+    key, the values being substituted into it each time it's emitted.
+
+    This is used for statements which are emitted repeatedly with the
+    same structure, such as those against the version table.  The function
+    must render each value literally, e.g. using
+    :func:`~sqlalchemy.sql.expression.literal_column`, so that it appears
+    in the compiled form.
+
+    """
+
+    def __init__(self, key, construct_fn, **values):
+        self.key = key
+        self.construct_fn = construct_fn
+        self.values = values
+
+    def construct(self):
+        """Return the statement for the values given."""
+
+        return self.construct_fn(**self.values)
+
+
 class DefaultImpl(with_metaclass(ImplMeta)):
 
     """Provide the entrypoint for major migration operations,
@@ -47,6 +81,16 @@ class DefaultImpl(with_metaclass(ImplMeta)):
     type_synonyms = ({"NUMERIC", "DECIMAL"},)
     type_arg_extract = ()
 
+    coalesce_alter_types = ()
+    """DDL constructs which may be combined, when directed against the
+    same table, into a single ALTER TABLE statement when
+    :meth:`.DefaultImpl.coalesce_alter_table` is in effect.
+
+    Empty by default, meaning each construct is emitted as its own
+    statement.
+
+    """
+
     def __init__(
         self,
         dialect,
@@ -62,8 +106,22 @@ class DefaultImpl(with_metaclass(ImplMeta)):
         self.literal_binds = context_opts.get("literal_binds", False)
 
         self.output_buffer = output_buffer
+        self.statement_writer = context_opts.get("statement_writer")
+        self.output_revision = None
         self.memo = {}
+        self._compiled_cache = {}
         self.context_opts = context_opts
+        self._coalesce_alter = context_opts.get("coalesce_alter_table", False)
+        self._alter_table_actions = []
+        self._batch_tables = {}
+        self.lock_timeout = context_opts.get("lock_timeout")
+        self.lock_timeout_retries = context_opts.get("lock_timeout_retries", 0)
+        self.lock_timeout_retry_interval = context_opts.get(
+            "lock_timeout_retry_interval", 1.0
+        )
+        self._lock_timeout_applied = False
+        self._lock_timeout_reset = None
+        self._in_offline_transaction = False
         if transactional_ddl is not None:
             self.transactional_ddl = transactional_ddl
 
@@ -77,9 +135,39 @@ class DefaultImpl(with_metaclass(ImplMeta)):
     def get_by_dialect(cls, dialect):
         return _impls[dialect.name]
 
-    def static_output(self, text):
-        self.output_buffer.write(text_type(text + "\n\n"))
-        self.output_buffer.flush()
+    def static_output(self, text, kind="other"):
+        """Emit text to the "offline" SQL stream.
+
+        Where a ``statement_writer`` is configured, the text is passed to
+        its ``write_statement()`` method in place of the output buffer,
+        along with the identifier of the revision whose migration is in
+        progress, if any, and the given kind of statement, one of the kinds
+        documented at :class:`.OfflineStatement`.
+
+        """
+        if self.statement_writer is not None:
+            self.statement_writer.write_statement(
+                self.output_revision, text_type(text), kind
+            )
+        else:
+            self.output_buffer.write(text_type(text + "\n\n"))
+            self.output_buffer.flush()
+
+    def _statement_kind(self, construct):
+        if isinstance(construct, schema.DDLElement):
+            kind, table = "ddl", getattr(construct, "element", None)
+        elif isinstance(construct, UpdateBase):
+            kind, table = "dml", construct.table
+        else:
+            return "other"
+        if (
+            isinstance(table, Table)
+            and table.name
+            == self.context_opts.get("version_table", "alembic_version")
+            and table.schema == self.context_opts.get("version_table_schema")
+        ):
+            return "version"
+        return kind
 
     def requires_recreate_in_batch(self, batch_op):
         """Return True if the given :class:`.BatchOperationsImpl`
@@ -101,10 +189,180 @@ class DefaultImpl(with_metaclass(ImplMeta)):
 
         """
 
+    def alter_column_autocommit(self, nullable, kw):
+        """Return True if the given :meth:`.alter_column` has to be run
+        within :meth:`.MigrationContext.autocommit_block`, so that each
+        of the statements it emits is committed on its own.
+
+        The Postgresql dialect uses this for the
+        ``postgresql_not_null_check`` option.
+
+        """
+        return False
+
+    @contextlib.contextmanager
+    def batch_recreate_settings(self, journal_mode=None, synchronous=None):
+        """Return a context manager establishing connection settings for
+        the recreation of several tables in batch mode, as used by
+        :meth:`.Operations.batch_alter_tables`.
+
+        The SQLite dialect uses this to turn off foreign key enforcement
+        and to tune its journal and synchronous settings, restoring them
+        afterwards.
+
+        """
+        yield
+
+    def verify_batch_recreate(self, tables):
+        """Check the integrity of tables recreated in batch mode by
+        :meth:`.Operations.batch_alter_tables`, raising
+        :class:`~alembic.util.CommandError` if problems are found.
+
+        """
+
     @property
     def bind(self):
         return self.connection
 
+    @contextlib.contextmanager
+    def coalesce_alter_table(self):
+        """Return a context manager within which consecutive ALTER TABLE
+        actions against the same table are combined into a single
+        statement where the dialect supports it.
+
+        Pending actions are emitted when a construct that can't be
+        combined with them is executed, and when the block ends.  If
+        already in effect, e.g. via the
+        :paramref:`.EnvironmentContext.configure.coalesce_alter_table`
+        option, the block has no additional effect.
+
+        """
+        if self._coalesce_alter:
+            yield
+            return
+
+        self._coalesce_alter = True
+        try:
+            yield
+            self._coalesce_alter = False
+            self.flush_alter_table()
+        finally:
+            self._coalesce_alter = False
+            del self._alter_table_actions[:]
+
+    def flush_alter_table(self):
+        """Emit any ALTER TABLE actions held pending by
+        :meth:`.DefaultImpl.coalesce_alter_table`."""
+
+        actions, self._alter_table_actions = self._alter_table_actions, []
+        if not actions:
+            return
+        elif len(actions) == 1:
+            construct = actions[0][0]
+        else:
+            table_name, schema = actions[0][1]
+            construct = base.AlterTableActions(
+                table_name, [clause for _, _, clause, _, _ in actions], schema
+            )
+
+        coalesce, self._coalesce_alter = self._coalesce_alter, False
+        try:
+            self._exec(construct)
+        finally:
+            self._coalesce_alter = coalesce
+
+    def _hold_alter_table_action(self, construct):
+        if not isinstance(construct, self.coalesce_alter_types):
+            return False
+
+        if isinstance(construct, base.AlterTable):
+            table_key = (construct.table_name, construct.schema)
+        else:
+            table = construct.element.table
+            table_key = (table.name, table.schema)
+
+        # an action which adds, drops or renames a column or constraint
+        # isn't combined with any other action referring to that name, nor
+        # is an action combined with another of the same kind against the
+        # same column
+        if isinstance(construct, (base.AddColumn, base.DropColumn)):
+            names = {("column", construct.column.name)}
+            exclusive = True
+        elif isinstance(construct, base.AlterColumn):
+            newname = getattr(construct, "newname", None)
+            names = {("column", construct.column_name)}
+            exclusive = newname not in (None, construct.column_name)
+            if exclusive:
+                names.add(("column", newname))
+        else:
+            name = construct.element.name
+            names = {("constraint", name)} if name is not None else set()
+            exclusive = True
+
+        pending = self._alter_table_actions
+        if pending and (
+            table_key != pending[0][1]
+            or any(
+                names.intersection(pending_names)
+                and (
+                    exclusive
+                    or pending_exclusive
+                    or type(construct) is type(pending_construct)
+                )
+                for (
+                    pending_construct,
+                    _,
+                    _,
+                    pending_names,
+                    pending_exclusive,
+                ) in pending
+            )
+        ):
+            self.flush_alter_table()
+
+        prefix = text_type(
+            base.AlterTableActions(table_key[0], [], table_key[1]).compile(
+                dialect=self.dialect
+            )
+        )
+        clause = text_type(construct.compile(dialect=self.dialect)).strip()
+        if not clause.startswith(prefix):
+            self.flush_alter_table()
+            return False
+
+        self._alter_table_actions.append(
+            (construct, table_key, clause[len(prefix) :], names, exclusive)
+        )
+        return True
+
+    def _invalidate_batch_tables(self, construct):
+        # discard the structure of tables retained from previous batch
+        # operations when they're altered; statements whose target can't
+        # be determined, such as plain SQL strings, discard everything
+        if isinstance(construct, (UpdateBase, SelectBase, CachedStatement)):
+            return
+        elif isinstance(construct, base.RenameTable):
+            keys = [
+                (construct.table_name, construct.schema),
+                (construct.new_table_name, construct.schema),
+            ]
+        elif isinstance(construct, base.AlterTable):
+            keys = [(construct.table_name, construct.schema)]
+        elif isinstance(construct, schema._CreateDropBase):
+            element = construct.element
+            if not isinstance(element, schema.Table):
+                element = getattr(element, "table", None)
+            if element is None:
+                self._batch_tables.clear()
+                return
+            keys = [(element.name, element.schema)]
+        else:
+            self._batch_tables.clear()
+            return
+
+        for key in keys:
+            self._batch_tables.pop(key, None)
+
     def _exec(
         self,
         construct,
@@ -112,6 +370,17 @@ class DefaultImpl(with_metaclass(ImplMeta)):
         multiparams=(),
         params=util.immutabledict(),
     ):
+        if self._batch_tables:
+            self._invalidate_batch_tables(construct)
+
+        if self._coalesce_alter and self._hold_alter_table_action(construct):
+            return None
+        elif self._alter_table_actions:
+            self.flush_alter_table()
+
+        if self.lock_timeout is not None and not self._lock_timeout_applied:
+            self._apply_lock_timeout()
+
         if isinstance(construct, string_types):
             construct = text(construct)
         if self.as_sql:
@@ -119,27 +388,222 @@ class DefaultImpl(with_metaclass(ImplMeta)):
                 # TODO: coverage
                 raise Exception("Execution arguments not allowed with as_sql")
 
-            if self.literal_binds and not isinstance(
-                construct, schema.DDLElement
-            ):
-                compile_kw = dict(compile_kwargs={"literal_binds": True})
+            if isinstance(construct, CachedStatement):
+                sql, kind = self._render_cached(construct)
             else:
-                compile_kw = {}
-
-            self.static_output(
-                text_type(
-                    construct.compile(dialect=self.dialect, **compile_kw)
-                )
-                .replace("\t", "    ")
-                .strip()
-                + self.command_terminator
-            )
+                sql = self._compile_offline(construct)
+                kind = self._statement_kind(construct)
+            self.static_output(sql + self.command_terminator, kind)
         else:
+            if isinstance(construct, CachedStatement):
+                construct = construct.construct()
             conn = self.connection
             if execution_options:
                 conn = conn.execution_options(**execution_options)
+            if self.lock_timeout_retries:
+                return self._exec_with_retry(
+                    conn, construct, multiparams, params
+                )
             return conn.execute(construct, *multiparams, **params)
 
+    def _compile_offline(self, construct):
+        if self.literal_binds and not isinstance(construct, schema.DDLElement):
+            compile_kw = dict(compile_kwargs={"literal_binds": True})
+        else:
+            compile_kw = {}
+
+        return (
+            text_type(construct.compile(dialect=self.dialect, **compile_kw))
+            .replace("\t", "    ")
+            .strip()
+        )
+
+    def _render_cached(self, statement):
+        # the construct is compiled once per key with a placeholder token
+        # in place of each value, which becomes a %-format template
+        try:
+            template, kind = self._compiled_cache[statement.key]
+        except KeyError:
+            tokens = dict(
+                (name, "__alembic_%s__" % name) for name in statement.values
+            )
+            construct = statement.construct_fn(**tokens)
+            template = self._compile_offline(construct).replace("%", "%%")
+            for name, token in tokens.items():
+                template = template.replace(token, "%%(%s)s" % name)
+            kind = self._statement_kind(construct)
+            self._compiled_cache[statement.key] = template, kind
+        return template % statement.values, kind
+
+    def _exec_with_retry(self, conn, construct, multiparams, params):
+        """Execute the given construct, retrying up to
+        ``lock_timeout_retries`` times with a jittered, exponentially
+        increasing wait in between where it fails because a lock could not
+        be acquired in time."""
+
+        use_savepoint = self.transactional_ddl and conn.in_transaction()
+        attempt = 0
+        while True:
+            savepoint = conn.begin_nested() if use_savepoint else None
+            try:
+                result = conn.execute(construct, *multiparams, **params)
+            except sqla_exc.DBAPIError as err:
+                if savepoint is not None:
+                    savepoint.rollback()
+                if attempt >= self.lock_timeout_retries or (
+                    not self._is_lock_timeout(err)
+                ):
+                    raise
+                attempt += 1
+                wait = self.lock_timeout_retry_interval * 2 ** (attempt - 1)
+                wait -= random.uniform(0, wait / 2.0)
+                log.warning(
+                    "Lock timeout running %r; retrying in %.2f seconds "
+                    "(attempt %d of %d)",
+                    err.statement,
+                    wait,
+                    attempt,
+                    self.lock_timeout_retries,
+                )
+                time.sleep(wait)
+            else:
+                if savepoint is not None:
+                    savepoint.commit()
+                return result
+
+    lock_timeout_transactional = False
+    """True if the lock timeout established by
+    :meth:`._lock_timeout_statement` lasts only until the end of the
+    transaction within which it's established, so that it's established
+    again for the first statement of each transaction."""
+
+    def _apply_lock_timeout(self):
+        self._lock_timeout_applied = True
+        statement = self._lock_timeout_statement(self.lock_timeout)
+        if statement is None:
+            util.warn(
+                "The lock_timeout option is not supported by the %s dialect"
+                % self.dialect.name
+            )
+        else:
+            if self._lock_timeout_reset is None:
+                self._lock_timeout_reset = self._lock_timeout_reset_statement()
+            self._exec(statement)
+
+    def reset_lock_timeout(self):
+        """Return the lock timeout of the connection to its previous
+        setting, once migrations are complete, so that it doesn't remain
+        in effect on a pooled connection."""
+
+        statement, self._lock_timeout_reset = self._lock_timeout_reset, None
+        if statement is not None:
+            # the flag is set so that the reset isn't preceded by the
+            # lock timeout being established again
+            self._lock_timeout_applied = True
+            try:
+                self._exec(statement)
+            finally:
+                self._lock_timeout_applied = False
+
+    def _transaction_begun(self):
+        self._in_offline_transaction = self.as_sql
+
+    def _transaction_ended(self):
+        # called when a transaction is committed or rolled back
+        self._in_offline_transaction = False
+        if self.lock_timeout_transactional:
+            self._lock_timeout_applied = False
+
+    def _in_transaction(self):
+        if self.as_sql:
+            return self._in_offline_transaction
+        return self.connection.in_transaction()
+
+    def _lock_timeout_statement(self, seconds):
+        """Return the statement which sets the time a statement will
+        wait to acquire a lock to the given number of seconds, or None
+        if not supported by this backend."""
+
+        return None
+
+    def _lock_timeout_reset_statement(self):
+        """Return the statement which returns the time a statement will
+        wait to acquire a lock to its previous setting, or None if there's
+        nothing to reset; called before the statement given by
+        :meth:`._lock_timeout_statement` is run."""
+
+        return None
+
+    def _is_lock_timeout(self, err):
+        """Return True if the given :class:`~sqlalchemy.exc.DBAPIError`
+        indicates that a lock could not be acquired in time."""
+
+        return False
+
+    @contextlib.contextmanager
+    def migration_lock(self, key, lock_table):
+        """Hold a lock identified by the given key for the duration of the
+        block, so that concurrent migration runs against the same database
+        proceed one at a time.
+
+        Used by :meth:`.MigrationContext.run_migrations` when the
+        :paramref:`.EnvironmentContext.configure.migration_lock` option is
+        set.  By default, the row for the given key within the given
+        :class:`~sqlalchemy.schema.Table` is locked by updating it; the lock
+        is then held until the enclosing transaction ends.  If not present,
+        the table and row are first created using a separate connection
+        and committed, so that of several concurrent first runs, all but
+        one wait on the row rather than fail to create it.  Backends which
+        provide named locks override this method.
+
+        """
+        conn = self.connection
+        if not conn.in_transaction():
+            util.warn(
+                "The migration_lock option requires that migrations run "
+                "within a transaction on the %s dialect; proceeding "
+                "without a lock" % self.dialect.name
+            )
+            yield
+            return
+        if not self._lock_migration_row(conn, key, lock_table):
+            self._seed_migration_lock(key, lock_table)
+            if not self._lock_migration_row(conn, key, lock_table):
+                raise util.CommandError(
+                    "Could not acquire migration lock %r" % key
+                )
+        yield
+
+    def _lock_migration_row(self, conn, key, lock_table):
+        if not sqla_compat._connectable_has_table(
+            conn, lock_table.name, lock_table.schema
+        ):
+            return False
+        result = conn.execute(
+            lock_table.update()
+            .where(lock_table.c.lock_key == key)
+            .values(lock_key=key)
+        )
+        return bool(result.rowcount)
+
+    def _seed_migration_lock(self, key, lock_table):
+        with self.connection.engine.connect() as conn:
+            try:
+                with conn.begin():
+                    lock_table.create(conn, checkfirst=True)
+            except sqla_exc.DBAPIError:
+                # created by a concurrent run in the meantime
+                if not sqla_compat._connectable_has_table(
+                    conn, lock_table.name, lock_table.schema
+                ):
+                    raise
+            try:
+                with conn.begin():
+                    conn.execute(lock_table.insert().values(lock_key=key))
+            except sqla_exc.IntegrityError:
+                # inserted by a concurrent run in the meantime
+                pass
+
     def execute(self, sql, execution_options=None):
         self._exec(sql, execution_options)
 
@@ -234,7 +698,7 @@ class DefaultImpl(with_metaclass(ImplMeta)):
                 )
             )
 
-    def add_column(self, table_name, column, schema=None):
+    def add_column(self, table_name, column, schema=None, **kw):
         self._exec(base.AddColumn(table_name, column, schema=schema))
 
     def drop_column(self, table_name, column, schema=None, **kw):
@@ -244,6 +708,18 @@ class DefaultImpl(with_metaclass(ImplMeta)):
         if const._create_rule is None or const._create_rule(self):
             self._exec(schema.AddConstraint(const))
 
+    def validate_constraint(self, table_name, constraint_name, schema=None):
+        raise NotImplementedError(
+            "VALIDATE CONSTRAINT is not supported by the %s dialect"
+            % self.dialect.name
+        )
+
+    def rebuild_index(self, index):
+        raise NotImplementedError(
+            "ALTER INDEX .. REBUILD is not supported by the %s dialect"
+            % self.dialect.name
+        )
+
     def drop_constraint(self, const):
         self._exec(schema.DropConstraint(const))
 
@@ -294,6 +770,17 @@ class DefaultImpl(with_metaclass(ImplMeta)):
     def drop_index(self, index):
         self._exec(schema.DropIndex(index))
 
+    def table_statistics(self, table_name, schema=None):
+        """Return a tuple of the approximate number of rows in the given
+        table and its size in bytes including indexes, either of which may
+        be None where not known, as is the case if the table doesn't exist.
+
+        Used by :meth:`.ImpactReport.annotate`.  Returns ``(None, None)``
+        by default.
+
+        """
+        return None, None
+
     def bulk_insert(self, table, rows, multiinsert=True):
         if not isinstance(rows, list):
             raise TypeError("List expected")
@@ -441,6 +928,33 @@ class DefaultImpl(with_metaclass(ImplMeta)):
     ):
         return rendered_inspector_default != rendered_metadata_default
 
+    def schema_fingerprints(self, inspector, schemas):
+        """Return a dictionary of schema name to a structural fingerprint
+        for each of the given schemas, or ``None`` if the dialect
+        does not support this.
+
+        Schemas which share a fingerprint are assumed to be structurally
+        identical; this is used by autogenerate when the
+        :paramref:`.EnvironmentContext.configure.dedupe_schemas` option is
+        in use.  Schemas which contain no tables may be omitted from
+        the result.
+
+        """
+        return None
+
+    def prefetch_server_default_comparisons(self, comparisons):
+        """A hook called by autogenerate with the server default
+        comparisons for all columns present in both the database and the
+        model, before individual columns are compared.
+
+        ``comparisons`` is a list of tuples, each consisting of the
+        same arguments that would be passed to
+        :meth:`.DefaultImpl.compare_server_default`.  Dialects which
+        need the database to evaluate these comparisons may do so here
+        in bulk, rather than emitting a round trip per column.
+
+        """
+
     def correct_for_autogen_constraints(
         self,
         conn_uniques,
@@ -500,7 +1014,7 @@ class DefaultImpl(with_metaclass(ImplMeta)):
         via :meth:`.EnvironmentContext.begin_transaction`.
 
         """
-        self.static_output("BEGIN" + self.command_terminator)
+        self.static_output("BEGIN" + self.command_terminator, "transaction")
 
     def emit_commit(self):
         """Emit the string ``COMMIT``, or the backend-specific
@@ -510,7 +1024,11 @@ class DefaultImpl(with_metaclass(ImplMeta)):
         via :meth:`.EnvironmentContext.begin_transaction`.
 
         """
-        self.static_output("COMMIT" + self.command_terminator)
+        self.static_output("COMMIT" + self.command_terminator, "transaction")
 
     def render_type(self, type_obj, autogen_context):
         return False
+
+
+def _milliseconds(seconds):
+    return int(round(seconds * 1000))
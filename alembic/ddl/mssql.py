@@ -1,7 +1,15 @@
+import contextlib
+import re
+
+from sqlalchemy import MetaData
+from sqlalchemy import Table
+from sqlalchemy import text
 from sqlalchemy import types as sqltypes
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.schema import Column
 from sqlalchemy.schema import CreateIndex
+from sqlalchemy.schema import DDLElement
+from sqlalchemy.schema import Index
 from sqlalchemy.sql.expression import ClauseElement
 from sqlalchemy.sql.expression import Executable
 
@@ -17,6 +25,7 @@ from .base import format_server_default
 from .base import format_table_name
 from .base import format_type
 from .base import RenameTable
+from .impl import _milliseconds
 from .impl import DefaultImpl
 from .. import util
 
@@ -37,16 +46,80 @@ class MSSQLImpl(DefaultImpl):
     def _exec(self, construct, *args, **kw):
         result = super(MSSQLImpl, self)._exec(construct, *args, **kw)
         if self.as_sql and self.batch_separator:
-            self.static_output(self.batch_separator)
+            self.static_output(self.batch_separator, "separator")
         return result
 
     def emit_begin(self):
-        self.static_output("BEGIN TRANSACTION" + self.command_terminator)
+        self.static_output(
+            "BEGIN TRANSACTION" + self.command_terminator, "transaction"
+        )
 
     def emit_commit(self):
         super(MSSQLImpl, self).emit_commit()
         if self.as_sql and self.batch_separator:
-            self.static_output(self.batch_separator)
+            self.static_output(self.batch_separator, "separator")
+
+    def _lock_timeout_statement(self, seconds):
+        return "SET LOCK_TIMEOUT %d" % _milliseconds(seconds)
+
+    def _lock_timeout_reset_statement(self):
+        # -1, the default, waits indefinitely
+        return "SET LOCK_TIMEOUT -1"
+
+    def _is_lock_timeout(self, err):
+        # "Lock request time out period exceeded"
+        return re.search(r"\b1222\b", str(err.orig)) is not None
+
+    @contextlib.contextmanager
+    def migration_lock(self, key, lock_table):
+        conn = self.connection
+        in_transaction = conn.in_transaction()
+        owner = "Transaction" if in_transaction else "Session"
+        result = conn.execute(
+            text(
+                "SET NOCOUNT ON; DECLARE @result INTEGER; "
+                "EXEC @result = sp_getapplock @Resource = :key, "
+                "@LockMode = 'Exclusive', @LockOwner = '%s', "
+                "@LockTimeout = -1; "
+                "SELECT @result" % owner
+            ),
+            key=key,
+        ).scalar()
+        if result is None or result < 0:
+            raise util.CommandError(
+                "Could not acquire migration lock %r (sp_getapplock "
+                "returned %s)" % (key, result)
+            )
+        if in_transaction:
+            yield
+            return
+        try:
+            yield
+        finally:
+            conn.execute(
+                text(
+                    "EXEC sp_releaseapplock @Resource = :key, "
+                    "@LockOwner = 'Session'"
+                ),
+                key=key,
+            )
+
+    def table_statistics(self, table_name, schema=None):
+        row = self.connection.execute(
+            text(
+                "SELECT "
+                "sum(CASE WHEN index_id < 2 THEN row_count ELSE 0 END), "
+                "sum(reserved_page_count) * 8192 "
+                "FROM sys.dm_db_partition_stats "
+                "WHERE object_id = object_id(:name)"
+            ),
+            name=self.dialect.identifier_preparer.format_table(
+                Table(table_name, MetaData(), schema=schema)
+            ),
+        ).first()
+        if row is None or row[0] is None:
+            return None, None
+        return row[0], row[1]
 
     def alter_column(
         self,
@@ -118,7 +191,30 @@ class MSSQLImpl(DefaultImpl):
         for col in mssql_include:
             if col not in index.table.c:
                 index.table.append_column(Column(col, sqltypes.NullType))
-        self._exec(CreateIndex(index))
+        self._exec(
+            MSSQLCreateIndex(index, **self._online_index_options(index))
+        )
+
+    def rebuild_index(self, index):
+        self._exec(
+            MSSQLRebuildIndex(index, **self._online_index_options(index))
+        )
+
+    def _online_index_options(self, index):
+        """Return the ONLINE, MAXDOP and RESUMABLE options for a CREATE
+        INDEX or ALTER INDEX statement, falling back to the
+        ``mssql_online``, ``mssql_maxdop`` and ``mssql_resumable`` context
+        options where not given."""
+
+        options = {}
+        for name in ("online", "maxdop", "resumable"):
+            value = index.dialect_options["mssql"][name]
+            if value is None:
+                value = self.context_opts.get("mssql_%s" % name)
+            options[name] = value
+        if options["maxdop"] is not None:
+            options["maxdop"] = int(options["maxdop"])
+        return options
 
     def bulk_insert(self, table, rows, **kw):
         if self.as_sql:
@@ -157,6 +253,27 @@ class MSSQLImpl(DefaultImpl):
         )
 
 
+Index.argument_for("mssql", "online", None)
+Index.argument_for("mssql", "maxdop", None)
+Index.argument_for("mssql", "resumable", None)
+
+
+class MSSQLCreateIndex(CreateIndex):
+    def __init__(self, element, online=None, maxdop=None, resumable=None):
+        super(MSSQLCreateIndex, self).__init__(element)
+        self.online = online
+        self.maxdop = maxdop
+        self.resumable = resumable
+
+
+class MSSQLRebuildIndex(DDLElement):
+    def __init__(self, element, online=None, maxdop=None, resumable=None):
+        self.element = element
+        self.online = online
+        self.maxdop = maxdop
+        self.resumable = resumable
+
+
 class _ExecDropConstraint(Executable, ClauseElement):
     def __init__(self, tname, colname, type_, schema):
         self.tname = tname
@@ -172,6 +289,49 @@ class _ExecDropFKConstraint(Executable, ClauseElement):
         self.schema = schema
 
 
+@compiles(MSSQLCreateIndex, "mssql")
+def visit_create_index(element, compiler, **kw):
+    return compiler.visit_create_index(element, **kw) + _mssql_index_options(
+        element
+    )
+
+
+@compiles(MSSQLRebuildIndex, "mssql")
+def visit_rebuild_index(element, compiler, **kw):
+    return "ALTER INDEX %s ON %s REBUILD%s" % (
+        compiler.preparer.quote(element.element.name),
+        format_table_name(
+            compiler, element.element.table.name, element.element.table.schema
+        ),
+        _mssql_index_options(element),
+    )
+
+
+def _mssql_index_options(element):
+    """render the WITH clause of a CREATE INDEX or ALTER INDEX statement
+    for the ONLINE, MAXDOP and RESUMABLE options."""
+
+    options = [
+        "%s = %s" % (name, value)
+        for name, value in (
+            ("ONLINE", _on_off(element.online)),
+            ("MAXDOP", element.maxdop),
+            ("RESUMABLE", _on_off(element.resumable)),
+        )
+        if value is not None
+    ]
+    if options:
+        return " WITH (%s)" % ", ".join(options)
+    else:
+        return ""
+
+
+def _on_off(value):
+    if value is None:
+        return None
+    return "ON" if value else "OFF"
+
+
 @compiles(_ExecDropConstraint, "mssql")
 def _exec_drop_col_constraint(element, compiler, **kw):
     schema, tname, colname, type_ = (
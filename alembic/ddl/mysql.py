@@ -1,20 +1,30 @@
+import contextlib
+import math
 import re
 
+from sqlalchemy import Index
 from sqlalchemy import schema
+from sqlalchemy import text
 from sqlalchemy import types as sqltypes
 from sqlalchemy.ext.compiler import compiles
 
+from .base import AddColumn
 from .base import alter_table
 from .base import AlterColumn
 from .base import ColumnDefault
 from .base import ColumnName
 from .base import ColumnNullable
 from .base import ColumnType
+from .base import DropColumn
 from .base import format_column_name
 from .base import format_server_default
+from .base import visit_add_column
+from .base import visit_drop_column
 from .impl import DefaultImpl
 from .. import util
 from ..autogenerate import compare
+from ..operations import ops
+from ..runtime import impact
 from ..util.compat import string_types
 from ..util.sqla_compat import _is_mariadb
 from ..util.sqla_compat import _is_type_bound
@@ -26,6 +36,140 @@ class MySQLImpl(DefaultImpl):
     transactional_ddl = False
     type_synonyms = DefaultImpl.type_synonyms + ({"BOOL", "TINYINT"},)
     type_arg_extract = [r"character set ([\w\-_]+)", r"collate ([\w\-_]+)"]
+    coalesce_alter_types = (
+        AddColumn,
+        DropColumn,
+        AlterColumn,
+        schema.AddConstraint,
+        schema.DropConstraint,
+    )
+
+    def _lock_timeout_statement(self, seconds):
+        # lock_wait_timeout accepts whole seconds only
+        return "SET SESSION lock_wait_timeout = %d" % max(
+            1, int(math.ceil(seconds))
+        )
+
+    def _lock_timeout_reset_statement(self):
+        return "SET SESSION lock_wait_timeout = DEFAULT"
+
+    def _is_lock_timeout(self, err):
+        # ER_LOCK_WAIT_TIMEOUT
+        return bool(err.orig.args) and err.orig.args[0] == 1205
+
+    @contextlib.contextmanager
+    def migration_lock(self, key, lock_table):
+        # lock names are limited to 64 characters; named locks are held
+        # by the session regardless of transactions
+        name = key[:64]
+        conn = self.connection
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:name, -1)"), name=name
+        ).scalar()
+        if acquired != 1:
+            raise util.CommandError(
+                "Could not acquire migration lock %r" % name
+            )
+        try:
+            yield
+        finally:
+            self._release_lock(conn, name)
+
+    def _release_lock(self, conn, name):
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), name=name)
+
+    def table_statistics(self, table_name, schema=None):
+        row = self.connection.execute(
+            text(
+                "SELECT table_rows, data_length + index_length "
+                "FROM information_schema.tables "
+                "WHERE table_schema = coalesce(:schema, database()) "
+                "AND table_name = :table_name"
+            ),
+            table_name=table_name,
+            schema=schema,
+        ).first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    def add_column(self, table_name, column, schema=None, **kw):
+        self._exec(
+            MySQLAddColumn(
+                table_name,
+                column,
+                schema=schema,
+                **self._online_ddl_options(
+                    kw.get("mysql_algorithm"), kw.get("mysql_lock")
+                )
+            )
+        )
+
+    def drop_column(self, table_name, column, schema=None, **kw):
+        self._exec(
+            MySQLDropColumn(
+                table_name,
+                column,
+                schema=schema,
+                **self._online_ddl_options(
+                    kw.get("mysql_algorithm"), kw.get("mysql_lock")
+                )
+            )
+        )
+
+    def create_index(self, index):
+        self._exec(
+            MySQLCreateIndex(
+                index,
+                **self._online_ddl_options(
+                    index.dialect_options["mysql"]["algorithm"],
+                    index.dialect_options["mysql"]["lock"],
+                )
+            )
+        )
+
+    def drop_index(self, index):
+        self._exec(
+            MySQLDropIndex(
+                index,
+                **self._online_ddl_options(
+                    index.dialect_options["mysql"]["algorithm"],
+                    index.dialect_options["mysql"]["lock"],
+                )
+            )
+        )
+
+    def _online_ddl_options(self, algorithm=None, lock=None):
+        """Return the ALGORITHM and LOCK options for an ALTER TABLE or
+        index statement, falling back to the ``mysql_algorithm`` and
+        ``mysql_lock`` context options where not given."""
+
+        options = {}
+        for name, value, choices in (
+            ("algorithm", algorithm, _online_ddl_algorithms),
+            ("lock", lock, _online_ddl_locks),
+        ):
+            if value is None:
+                value = self.context_opts.get("mysql_%s" % name)
+            if value is not None:
+                value = value.upper()
+                if value not in choices:
+                    raise util.CommandError(
+                        "Unknown MySQL %s option %r; expected one of %s"
+                        % (name.upper(), value, ", ".join(choices))
+                    )
+            options[name] = value
+        return options
+
+    def _hold_alter_table_action(self, construct):
+        # ALGORITHM and LOCK apply to a whole ALTER TABLE statement, so
+        # that actions specifying them are emitted on their own
+        if getattr(construct, "algorithm", None) or getattr(
+            construct, "lock", None
+        ):
+            self.flush_alter_table()
+            return False
+        return super(MySQLImpl, self)._hold_alter_table_action(construct)
 
     def alter_column(
         self,
@@ -45,6 +189,9 @@ class MySQLImpl(DefaultImpl):
         existing_comment=None,
         **kw
     ):
+        online_ddl = self._online_ddl_options(
+            kw.get("mysql_algorithm"), kw.get("mysql_lock")
+        )
         if name is not None or self._is_mysql_allowed_functional_default(
             type_ if type_ is not None else existing_type, server_default
         ):
@@ -69,6 +216,7 @@ class MySQLImpl(DefaultImpl):
                     comment=comment
                     if comment is not False
                     else existing_comment,
+                    **online_ddl
                 )
             )
         elif (
@@ -98,12 +246,17 @@ class MySQLImpl(DefaultImpl):
                     comment=comment
                     if comment is not False
                     else existing_comment,
+                    **online_ddl
                 )
             )
         elif server_default is not False:
             self._exec(
                 MySQLAlterDefault(
-                    table_name, column_name, server_default, schema=schema
+                    table_name,
+                    column_name,
+                    server_default,
+                    schema=schema,
+                    **online_ddl
                 )
             )
 
@@ -244,11 +397,56 @@ class MySQLImpl(DefaultImpl):
                 cnfk.onupdate = "RESTRICT"
 
 
+_online_ddl_algorithms = ("DEFAULT", "INSTANT", "INPLACE", "NOCOPY", "COPY")
+_online_ddl_locks = ("DEFAULT", "NONE", "SHARED", "EXCLUSIVE")
+
+Index.argument_for("mysql", "algorithm", None)
+Index.argument_for("mysql", "lock", None)
+
+
+class MySQLAddColumn(AddColumn):
+    def __init__(self, name, column, schema=None, algorithm=None, lock=None):
+        super(MySQLAddColumn, self).__init__(name, column, schema=schema)
+        self.algorithm = algorithm
+        self.lock = lock
+
+
+class MySQLDropColumn(DropColumn):
+    def __init__(self, name, column, schema=None, algorithm=None, lock=None):
+        super(MySQLDropColumn, self).__init__(name, column, schema=schema)
+        self.algorithm = algorithm
+        self.lock = lock
+
+
+class MySQLCreateIndex(schema.CreateIndex):
+    def __init__(self, element, algorithm=None, lock=None):
+        super(MySQLCreateIndex, self).__init__(element)
+        self.algorithm = algorithm
+        self.lock = lock
+
+
+class MySQLDropIndex(schema.DropIndex):
+    def __init__(self, element, algorithm=None, lock=None):
+        super(MySQLDropIndex, self).__init__(element)
+        self.algorithm = algorithm
+        self.lock = lock
+
+
 class MySQLAlterDefault(AlterColumn):
-    def __init__(self, name, column_name, default, schema=None):
+    def __init__(
+        self,
+        name,
+        column_name,
+        default,
+        schema=None,
+        algorithm=None,
+        lock=None,
+    ):
         super(AlterColumn, self).__init__(name, schema=schema)
         self.column_name = column_name
         self.default = default
+        self.algorithm = algorithm
+        self.lock = lock
 
 
 class MySQLChangeColumn(AlterColumn):
@@ -263,6 +461,8 @@ class MySQLChangeColumn(AlterColumn):
         default=False,
         autoincrement=None,
         comment=False,
+        algorithm=None,
+        lock=None,
     ):
         super(AlterColumn, self).__init__(name, schema=schema)
         self.column_name = column_name
@@ -271,6 +471,8 @@ class MySQLChangeColumn(AlterColumn):
         self.default = default
         self.autoincrement = autoincrement
         self.comment = comment
+        self.algorithm = algorithm
+        self.lock = lock
         if type_ is None:
             raise util.CommandError(
                 "All MySQL CHANGE/MODIFY COLUMN operations "
@@ -294,20 +496,49 @@ def _mysql_doesnt_support_individual(element, compiler, **kw):
     )
 
 
+@compiles(MySQLAddColumn, "mysql")
+def _mysql_add_column(element, compiler, **kw):
+    return visit_add_column(element, compiler, **kw) + _mysql_online_ddl(
+        element, ", "
+    )
+
+
+@compiles(MySQLDropColumn, "mysql")
+def _mysql_drop_column(element, compiler, **kw):
+    return visit_drop_column(element, compiler, **kw) + _mysql_online_ddl(
+        element, ", "
+    )
+
+
+@compiles(MySQLCreateIndex, "mysql")
+def _mysql_create_index(element, compiler, **kw):
+    return compiler.visit_create_index(element, **kw) + _mysql_online_ddl(
+        element, " "
+    )
+
+
+@compiles(MySQLDropIndex, "mysql")
+def _mysql_drop_index(element, compiler, **kw):
+    return compiler.visit_drop_index(element, **kw) + _mysql_online_ddl(
+        element, " "
+    )
+
+
 @compiles(MySQLAlterDefault, "mysql")
 def _mysql_alter_default(element, compiler, **kw):
-    return "%s ALTER COLUMN %s %s" % (
+    return "%s ALTER COLUMN %s %s%s" % (
         alter_table(compiler, element.table_name, element.schema),
         format_column_name(compiler, element.column_name),
         "SET DEFAULT %s" % format_server_default(compiler, element.default)
         if element.default is not None
         else "DROP DEFAULT",
+        _mysql_online_ddl(element, ", "),
     )
 
 
 @compiles(MySQLModifyColumn, "mysql")
 def _mysql_modify_column(element, compiler, **kw):
-    return "%s MODIFY %s %s" % (
+    return "%s MODIFY %s %s%s" % (
         alter_table(compiler, element.table_name, element.schema),
         format_column_name(compiler, element.column_name),
         _mysql_colspec(
@@ -318,12 +549,13 @@ def _mysql_modify_column(element, compiler, **kw):
             autoincrement=element.autoincrement,
             comment=element.comment,
         ),
+        _mysql_online_ddl(element, ", "),
     )
 
 
 @compiles(MySQLChangeColumn, "mysql")
 def _mysql_change_column(element, compiler, **kw):
-    return "%s CHANGE %s %s %s" % (
+    return "%s CHANGE %s %s %s%s" % (
         alter_table(compiler, element.table_name, element.schema),
         format_column_name(compiler, element.column_name),
         format_column_name(compiler, element.newname),
@@ -335,6 +567,21 @@ def _mysql_change_column(element, compiler, **kw):
             autoincrement=element.autoincrement,
             comment=element.comment,
         ),
+        _mysql_online_ddl(element, ", "),
+    )
+
+
+def _mysql_online_ddl(element, separator):
+    """render the ALGORITHM and LOCK clauses of an ALTER TABLE or
+    index statement, preceded by the given separator."""
+
+    return "".join(
+        "%s%s=%s" % (separator, name, value)
+        for name, value in (
+            ("ALGORITHM", element.algorithm),
+            ("LOCK", element.lock),
+        )
+        if value is not None
     )
 
 
@@ -398,3 +645,42 @@ def _mysql_drop_constraint(element, compiler, **kw):
             "No generic 'DROP CONSTRAINT' in MySQL - "
             "please specify constraint type"
         )
+
+
+def _supports_instant(impl, mysql_version, mariadb_version):
+    version = impl.dialect.server_version_info
+    if version is None:
+        return False
+    elif _is_mariadb(impl.dialect):
+        return tuple(v for v in version if isinstance(v, int)) >= (
+            mariadb_version
+        )
+    else:
+        return version >= mysql_version
+
+
+@impact.classifiers.dispatch_for(ops.AddColumnOp, "mysql")
+def _add_column_impact(impl, operation):
+    if _supports_instant(impl, (8, 0, 12), (10, 3, 2)):
+        return impact.METADATA_ONLY
+    else:
+        return impact.FULL_REWRITE
+
+
+@impact.classifiers.dispatch_for(ops.DropColumnOp, "mysql")
+def _drop_column_impact(impl, operation):
+    if _supports_instant(impl, (8, 0, 29), (10, 4, 0)):
+        return impact.METADATA_ONLY
+    else:
+        return impact.FULL_REWRITE
+
+
+@impact.classifiers.dispatch_for(ops.AlterColumnOp, "mysql")
+def _alter_column_impact(impl, operation):
+    if (
+        operation.modify_type is not None
+        or operation.modify_nullable is not None
+    ):
+        return impact.FULL_REWRITE
+    else:
+        return impact.METADATA_ONLY
@@ -1,4 +1,9 @@
+import math
+
 from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.schema import DDLElement
+from sqlalchemy.schema import Index
 from sqlalchemy.sql import sqltypes
 
 from .base import AddColumn
@@ -35,7 +40,7 @@ class OracleImpl(DefaultImpl):
     def _exec(self, construct, *args, **kw):
         result = super(OracleImpl, self)._exec(construct, *args, **kw)
         if self.as_sql and self.batch_separator:
-            self.static_output(self.batch_separator)
+            self.static_output(self.batch_separator, "separator")
         return result
 
     def emit_begin(self):
@@ -44,6 +49,94 @@ class OracleImpl(DefaultImpl):
     def emit_commit(self):
         self._exec("COMMIT")
 
+    def _lock_timeout_statement(self, seconds):
+        # DDL_LOCK_TIMEOUT accepts whole seconds only
+        return "ALTER SESSION SET DDL_LOCK_TIMEOUT = %d" % max(
+            1, int(math.ceil(seconds))
+        )
+
+    def _lock_timeout_reset_statement(self):
+        return "ALTER SESSION SET DDL_LOCK_TIMEOUT = 0"
+
+    def _is_lock_timeout(self, err):
+        # ORA-00054: resource busy and acquire with NOWAIT specified or
+        # timeout expired
+        return "ORA-00054" in str(err.orig)
+
+    def create_index(self, index):
+        self._exec(
+            OracleCreateIndex(index, **self._online_index_options(index))
+        )
+
+    def rebuild_index(self, index):
+        self._exec(
+            OracleRebuildIndex(index, **self._online_index_options(index))
+        )
+
+    def _online_index_options(self, index):
+        """Return the ONLINE and PARALLEL options for a CREATE INDEX or
+        ALTER INDEX statement, falling back to the ``oracle_online`` and
+        ``oracle_parallel`` context options where not given."""
+
+        options = {}
+        for name in ("online", "parallel"):
+            value = index.dialect_options["oracle"][name]
+            if value is None:
+                value = self.context_opts.get("oracle_%s" % name)
+            options[name] = value
+        return options
+
+
+Index.argument_for("oracle", "online", None)
+Index.argument_for("oracle", "parallel", None)
+
+
+class OracleCreateIndex(CreateIndex):
+    def __init__(self, element, online=None, parallel=None):
+        super(OracleCreateIndex, self).__init__(element)
+        self.online = online
+        self.parallel = parallel
+
+
+class OracleRebuildIndex(DDLElement):
+    def __init__(self, element, online=None, parallel=None):
+        self.element = element
+        self.online = online
+        self.parallel = parallel
+
+
+@compiles(OracleCreateIndex, "oracle")
+def visit_create_index(element, compiler, **kw):
+    return compiler.visit_create_index(element, **kw) + _oracle_index_options(
+        element
+    )
+
+
+@compiles(OracleRebuildIndex, "oracle")
+def visit_rebuild_index(element, compiler, **kw):
+    return "ALTER INDEX %s REBUILD%s" % (
+        format_table_name(
+            compiler, element.element.name, element.element.table.schema
+        ),
+        _oracle_index_options(element),
+    )
+
+
+def _oracle_index_options(element):
+    """render the ONLINE and PARALLEL clauses of a CREATE INDEX or
+    ALTER INDEX statement."""
+
+    text = ""
+    if element.online:
+        text += " ONLINE"
+    if element.parallel is True:
+        text += " PARALLEL"
+    elif element.parallel is False:
+        text += " NOPARALLEL"
+    elif element.parallel is not None:
+        text += " PARALLEL %d" % int(element.parallel)
+    return text
+
 
 @compiles(AddColumn, "oracle")
 def visit_add_column(element, compiler, **kw):
@@ -1,8 +1,12 @@
+import contextlib
+import hashlib
 import logging
 import re
 
 from sqlalchemy import Column
+from sqlalchemy import exc as sqla_exc
 from sqlalchemy import Numeric
+from sqlalchemy import schema as sa_schema
 from sqlalchemy import text
 from sqlalchemy import types as sqltypes
 from sqlalchemy.dialects.postgresql import BIGINT
@@ -11,16 +15,23 @@ from sqlalchemy.dialects.postgresql import INTEGER
 from sqlalchemy.sql.expression import ColumnClause
 from sqlalchemy.sql.expression import UnaryExpression
 from sqlalchemy.types import NULLTYPE
+from sqlalchemy.util import OrderedSet
 
+from .base import AddColumn
 from .base import alter_column
 from .base import alter_table
-from .base import AlterColumn
+from .base import AlterTable
 from .base import ColumnComment
+from .base import ColumnDefault
+from .base import ColumnNullable
+from .base import ColumnType
 from .base import compiles
+from .base import DropColumn
 from .base import format_column_name
 from .base import format_table_name
 from .base import format_type
 from .base import RenameTable
+from .impl import _milliseconds
 from .impl import DefaultImpl
 from .. import util
 from ..autogenerate import render
@@ -28,6 +39,7 @@ from ..operations import ops
 from ..operations import schemaobj
 from ..operations.base import BatchOperations
 from ..operations.base import Operations
+from ..runtime import impact
 from ..util import compat
 from ..util import sqla_compat
 
@@ -42,18 +54,120 @@ class PostgresqlImpl(DefaultImpl):
         {"FLOAT", "DOUBLE PRECISION"},
     )
 
+    coalesce_alter_types = (
+        AddColumn,
+        DropColumn,
+        ColumnNullable,
+        ColumnType,
+        ColumnDefault,
+        sa_schema.AddConstraint,
+        sa_schema.DropConstraint,
+    )
+
+    server_default_compare_batch_size = 250
+    """Maximum number of server default comparisons evaluated within a
+    single SELECT by :meth:`.prefetch_server_default_comparisons`."""
+
+    _server_default_comparisons = util.immutabledict()
+
+    lock_timeout_transactional = True
+
+    def _lock_timeout_statement(self, seconds):
+        # within a transaction, the setting lasts only until it ends,
+        # whether committed or rolled back
+        return "SET %slock_timeout = %d" % (
+            "LOCAL " if self._in_transaction() else "",
+            _milliseconds(seconds),
+        )
+
+    def _lock_timeout_reset_statement(self):
+        if self._in_transaction():
+            return None
+        return "RESET lock_timeout"
+
+    def _is_lock_timeout(self, err):
+        # lock_not_available
+        return getattr(err.orig, "pgcode", None) == "55P03"
+
+    @contextlib.contextmanager
+    def migration_lock(self, key, lock_table):
+        # advisory locks are keyed on a bigint
+        lock_id = int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:15], 16)
+        conn = self.connection
+        if conn.in_transaction():
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                lock_id=lock_id,
+            )
+            yield
+        else:
+            conn.execute(
+                text("SELECT pg_advisory_lock(:lock_id)"), lock_id=lock_id
+            )
+            try:
+                yield
+            finally:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:lock_id)"),
+                    lock_id=lock_id,
+                )
+
+    def table_statistics(self, table_name, schema=None):
+        row = self.connection.execute(
+            text(
+                "SELECT c.reltuples, pg_total_relation_size(c.oid) "
+                "FROM pg_catalog.pg_class c JOIN pg_catalog.pg_namespace n "
+                "ON n.oid = c.relnamespace "
+                "WHERE c.relname = :table_name AND c.relkind IN ('r', 'p') "
+                "AND n.nspname = coalesce(:schema, current_schema())"
+            ),
+            table_name=table_name,
+            schema=schema,
+        ).first()
+        if row is None:
+            return None, None
+        # reltuples is an estimate, which is negative, or zero prior to
+        # PostgreSQL 14, for a table that has never been analyzed
+        return (int(row[0]) if row[0] >= 0 else None), row[1]
+
     def prep_table_for_batch(self, table):
         for constraint in table.constraints:
             if constraint.name is not None:
                 self.drop_constraint(constraint)
 
-    def compare_server_default(
+    def add_constraint(self, const):
+        if (
+            isinstance(
+                const,
+                (sa_schema.ForeignKeyConstraint, sa_schema.CheckConstraint),
+            )
+            and const.dialect_options["postgresql"]["not_valid"]
+        ):
+            if const._create_rule is None or const._create_rule(self):
+                self._exec(PostgresqlAddConstraintNotValid(const))
+        else:
+            super(PostgresqlImpl, self).add_constraint(const)
+
+    def validate_constraint(self, table_name, constraint_name, schema=None):
+        self._exec(
+            PostgresqlValidateConstraint(
+                table_name, constraint_name, schema=schema
+            )
+        )
+
+    def _server_default_compare_expressions(
         self,
         inspector_column,
         metadata_column,
         rendered_metadata_default,
         rendered_inspector_default,
     ):
+        """Return a ``(conn_default, metadata_default)`` tuple of SQL
+        expressions which need to be compared by the database, or a
+        boolean "is different" result if the comparison can be decided
+        without a round trip.
+
+        """
         # don't do defaults for SERIAL columns
         if (
             metadata_column.primary_key
@@ -87,13 +201,75 @@ class PostgresqlImpl(DefaultImpl):
         ):
             rendered_metadata_default = "'%s'" % rendered_metadata_default
 
-        return not self.connection.scalar(
-            text(
-                "SELECT %s = %s"
-                % (conn_col_default, rendered_metadata_default)
+        return (conn_col_default, rendered_metadata_default)
+
+    def compare_server_default(
+        self,
+        inspector_column,
+        metadata_column,
+        rendered_metadata_default,
+        rendered_inspector_default,
+    ):
+        expressions = self._server_default_compare_expressions(
+            inspector_column,
+            metadata_column,
+            rendered_metadata_default,
+            rendered_inspector_default,
+        )
+        if not isinstance(expressions, tuple):
+            return expressions
+
+        if expressions in self._server_default_comparisons:
+            return not self._server_default_comparisons[expressions]
+
+        return not self.connection.scalar(text("SELECT %s = %s" % expressions))
+
+    def prefetch_server_default_comparisons(self, comparisons):
+        self._server_default_comparisons = results = {}
+
+        pending = OrderedSet()
+        for comparison in comparisons:
+            expressions = self._server_default_compare_expressions(*comparison)
+            if isinstance(expressions, tuple):
+                pending.add(expressions)
+
+        pending = list(pending)
+        batch_size = self.server_default_compare_batch_size
+        for idx in range(0, len(pending), batch_size):
+            self._evaluate_server_default_comparisons(
+                pending[idx : idx + batch_size], results
             )
+
+    def _evaluate_server_default_comparisons(self, pending, results):
+        stmt = text(
+            "SELECT %s"
+            % ", ".join("%s = %s" % expressions for expressions in pending)
         )
 
+        # run within a SAVEPOINT so that an expression which fails to
+        # evaluate doesn't abort the enclosing transaction
+        trans = self.connection.begin_nested()
+        try:
+            row = self.connection.execute(stmt).first()
+        except sqla_exc.DBAPIError:
+            trans.rollback()
+            if len(pending) == 1:
+                # leave this one out of the results; it will be
+                # evaluated, and raise, on its own when compared
+                log.debug(
+                    "Could not evaluate server default comparison %s = %s",
+                    *pending[0]
+                )
+                return
+            # bisect the batch so that only the failing
+            # expression(s) are excluded
+            half = len(pending) // 2
+            self._evaluate_server_default_comparisons(pending[:half], results)
+            self._evaluate_server_default_comparisons(pending[half:], results)
+        else:
+            trans.commit()
+            results.update(zip(pending, row))
+
     def alter_column(
         self,
         table_name,
@@ -118,6 +294,23 @@ class PostgresqlImpl(DefaultImpl):
                 "postgresql_using must be used with the type_ parameter"
             )
 
+        not_null_check = None
+        if kw.pop("postgresql_not_null_check", False) and nullable is False:
+            # the column is checked by a NOT VALID constraint, which is
+            # then validated without blocking writes; SET NOT NULL on
+            # PostgreSQL 12 and above makes use of the validated
+            # constraint rather than scanning the table under lock.  Each
+            # statement is committed on its own, via the autocommit block
+            # established by alter_column_autocommit(), as the lock taken
+            # by ADD CONSTRAINT would otherwise be held through VALIDATE
+            not_null_check = self._not_null_check(
+                table_name, column_name, schema
+            )
+            self.add_constraint(not_null_check)
+            self.validate_constraint(
+                table_name, not_null_check.name, schema=schema
+            )
+
         if type_ is not None:
             self._exec(
                 PostgresqlColumnType(
@@ -147,15 +340,117 @@ class PostgresqlImpl(DefaultImpl):
             **kw
         )
 
-    def autogen_column_reflect(self, inspector, table, column_info):
-        if column_info.get("default") and isinstance(
-            column_info["type"], (INTEGER, BIGINT)
-        ):
-            seq_match = re.match(
-                r"nextval\('(.+?)'::regclass\)", column_info["default"]
+        if not_null_check is not None:
+            # SET NOT NULL has to be complete before the constraint is
+            # dropped, rather than be combined into the same statement
+            self.flush_alter_table()
+            self.drop_constraint(not_null_check)
+
+    def alter_column_autocommit(self, nullable, kw):
+        return bool(kw.get("postgresql_not_null_check")) and nullable is False
+
+    def _not_null_check(self, table_name, column_name, schema):
+        name = ("ck_%s_%s_not_null" % (table_name, column_name))[
+            : self.dialect.max_identifier_length
+        ]
+        table = sa_schema.Table(
+            table_name,
+            sa_schema.MetaData(),
+            Column(column_name, NULLTYPE),
+            schema=schema,
+        )
+        const = sa_schema.CheckConstraint(
+            table.c[column_name].isnot(None),
+            name=name,
+            postgresql_not_valid=True,
+        )
+        table.append_constraint(const)
+        return const
+
+    def schema_fingerprints(self, inspector, schemas):
+        # each table, column, constraint, index, view and enum is rendered
+        # as a line of text with identifiers qualified by its own schema
+        # made unqualified, and the sorted lines are hashed per schema, all
+        # in one query; the qualifier is matched as by _schema_qualifier()
+        # in autogenerate, so that the text of schemas grouped together
+        # is exactly that produced by projecting one onto the other
+        rows = sqla_compat._exec_on_inspector(
+            inspector,
+            text(
+                "select nspname, md5(string_agg(item, E'\\n' order by item)) "
+                "from (select n.nspname, "
+                "regexp_replace(items.item, "
+                "'(^|[^[:alnum:]_$\"])' || "
+                "regexp_replace(quote_ident(n.nspname), '(\\W)', '\\\\\\1', "
+                "'g') || '\\.', '\\1', 'g') "
+                "as item from ("
+                "select c.relnamespace as nsp, "
+                "'r:' || c.relkind || ':' || c.relname || ':' || "
+                "coalesce(obj_description(c.oid, 'pg_class'), '') as item "
+                "from pg_class c where c.relkind in ('r', 'p', 'v', 'm') "
+                "union all "
+                "select c.relnamespace, "
+                "'a:' || c.relname || ':' || a.attname || ':' || "
+                "format_type(a.atttypid, a.atttypmod) || ':' || "
+                "a.attnotnull || ':' || "
+                "coalesce(pg_get_expr(d.adbin, d.adrelid), '') || ':' || "
+                "coalesce(col_description(c.oid, a.attnum), '') "
+                "from pg_class c join pg_attribute a on a.attrelid=c.oid "
+                "left join pg_attrdef d on d.adrelid=c.oid and "
+                "d.adnum=a.attnum "
+                "where c.relkind in ('r', 'p', 'v', 'm') and a.attnum > 0 "
+                "and not a.attisdropped "
+                "union all "
+                "select c.relnamespace, "
+                "'c:' || c.relname || ':' || con.conname || ':' || "
+                "pg_get_constraintdef(con.oid) "
+                "from pg_constraint con join pg_class c on "
+                "c.oid=con.conrelid "
+                "union all "
+                "select c.relnamespace, "
+                "'i:' || c.relname || ':' || pg_get_indexdef(i.indexrelid) "
+                "from pg_index i join pg_class c on c.oid=i.indrelid "
+                "union all "
+                "select c.relnamespace, "
+                "'v:' || c.relname || ':' || pg_get_viewdef(c.oid) "
+                "from pg_class c where c.relkind in ('v', 'm') "
+                "union all "
+                "select t.typnamespace, "
+                "'e:' || t.typname || ':' || "
+                "string_agg(e.enumlabel, ',' order by e.enumsortorder) "
+                "from pg_type t join pg_enum e on e.enumtypid=t.oid "
+                "group by t.typnamespace, t.typname"
+                ") as items join pg_namespace n on n.oid=items.nsp "
+                "where n.nspname = any(:schemas)) as normalized "
+                "group by nspname"
+            ),
+            schemas=[
+                schema if schema is not None else inspector.default_schema_name
+                for schema in schemas
+            ],
+        )
+        fingerprints = dict(rows)
+        if inspector.default_schema_name in fingerprints:
+            fingerprints[None] = fingerprints.pop(
+                inspector.default_schema_name
             )
-            if seq_match:
-                info = sqla_compat._exec_on_inspector(
+        return fingerprints
+
+    def _sequence_owners(self, inspector, schema):
+        """Return a dictionary of sequence name to the name of the
+        column which owns it, for all owned sequences on tables in the
+        given schema.
+
+        The result is cached on the inspector, so that reflecting
+        many tables emits a single query per schema.
+
+        """
+        if schema is None:
+            schema = inspector.default_schema_name
+        key = ("alembic_postgresql_sequence_owners", schema)
+        if key not in inspector.info_cache:
+            inspector.info_cache[key] = dict(
+                sqla_compat._exec_on_inspector(
                     inspector,
                     text(
                         "select c.relname, a.attname "
@@ -164,26 +459,40 @@ class PostgresqlImpl(DefaultImpl):
                         "d.classid='pg_class'::regclass and "
                         "d.refclassid='pg_class'::regclass "
                         "join pg_class t on t.oid=d.refobjid "
+                        "join pg_namespace n on n.oid=t.relnamespace "
                         "join pg_attribute a on a.attrelid=t.oid and "
                         "a.attnum=d.refobjsubid "
-                        "where c.relkind='S' and c.relname=:seqname"
+                        "where c.relkind='S' and n.nspname=:schema"
                     ),
-                    seqname=seq_match.group(1),
-                ).first()
-                if info:
-                    seqname, colname = info
-                    if colname == column_info["name"]:
-                        log.info(
-                            "Detected sequence named '%s' as "
-                            "owned by integer column '%s(%s)', "
-                            "assuming SERIAL and omitting",
-                            seqname,
-                            table.name,
-                            colname,
-                        )
-                        # sequence, and the owner is this column,
-                        # its a SERIAL - whack it!
-                        del column_info["default"]
+                    schema=schema,
+                )
+            )
+        return inspector.info_cache[key]
+
+    def autogen_column_reflect(self, inspector, table, column_info):
+        if column_info.get("default") and isinstance(
+            column_info["type"], (INTEGER, BIGINT)
+        ):
+            seq_match = re.match(
+                r"nextval\('(.+?)'::regclass\)", column_info["default"]
+            )
+            if seq_match:
+                seqname = seq_match.group(1)
+                colname = self._sequence_owners(inspector, table.schema).get(
+                    seqname
+                )
+                if colname == column_info["name"]:
+                    log.info(
+                        "Detected sequence named '%s' as "
+                        "owned by integer column '%s(%s)', "
+                        "assuming SERIAL and omitting",
+                        seqname,
+                        table.name,
+                        colname,
+                    )
+                    # sequence, and the owner is this column,
+                    # its a SERIAL - whack it!
+                    del column_info["default"]
 
     def correct_for_autogen_constraints(
         self,
@@ -250,14 +559,46 @@ class PostgresqlImpl(DefaultImpl):
         )
 
 
-class PostgresqlColumnType(AlterColumn):
+class PostgresqlColumnType(ColumnType):
     def __init__(self, name, column_name, type_, **kw):
         using = kw.pop("using", None)
-        super(PostgresqlColumnType, self).__init__(name, column_name, **kw)
-        self.type_ = sqltypes.to_instance(type_)
+        super(PostgresqlColumnType, self).__init__(
+            name, column_name, type_, **kw
+        )
         self.using = using
 
 
+sa_schema.ForeignKeyConstraint.argument_for("postgresql", "not_valid", False)
+sa_schema.CheckConstraint.argument_for("postgresql", "not_valid", False)
+
+
+class PostgresqlAddConstraintNotValid(sa_schema.AddConstraint):
+    pass
+
+
+class PostgresqlValidateConstraint(AlterTable):
+    def __init__(self, name, constraint_name, schema=None):
+        super(PostgresqlValidateConstraint, self).__init__(name, schema=schema)
+        self.constraint_name = constraint_name
+
+
+@compiles(PostgresqlAddConstraintNotValid, "postgresql")
+def visit_add_constraint_not_valid(element, compiler, **kw):
+    text = compiler.visit_add_constraint(element, **kw)
+    # newer SQLAlchemy versions render NOT VALID themselves
+    if not text.rstrip().endswith("NOT VALID"):
+        text += " NOT VALID"
+    return text
+
+
+@compiles(PostgresqlValidateConstraint, "postgresql")
+def visit_validate_constraint(element, compiler, **kw):
+    return "%s VALIDATE CONSTRAINT %s" % (
+        alter_table(compiler, element.table_name, element.schema),
+        format_column_name(compiler, element.constraint_name),
+    )
+
+
 @compiles(RenameTable, "postgresql")
 def visit_rename_table(element, compiler, **kw):
     return "%s RENAME TO %s" % (
@@ -423,6 +764,175 @@ class CreateExcludeConstraintOp(ops.AddConstraintOp):
         return operations.invoke(op)
 
 
+@Operations.register_operation("validate_constraint")
+@BatchOperations.register_operation(
+    "validate_constraint", "batch_validate_constraint"
+)
+class ValidateConstraintOp(ops.MigrateOperation):
+    """Represent a validate constraint operation."""
+
+    def __init__(self, constraint_name, table_name, schema=None):
+        self.constraint_name = constraint_name
+        self.table_name = table_name
+        self.schema = schema
+
+    @classmethod
+    def validate_constraint(
+        cls, operations, constraint_name, table_name, schema=None
+    ):
+        """Issue a "validate constraint" instruction using the current
+        migration context.
+
+        .. note::  This method is Postgresql specific.
+
+        A foreign key or check constraint created with the
+        ``postgresql_not_valid`` option, e.g.::
+
+            from alembic import op
+
+            op.create_foreign_key(
+                "fk_user_address",
+                "address",
+                "user",
+                ["user_id"],
+                ["id"],
+                postgresql_not_valid=True,
+            )
+
+        is enforced for new rows right away, without scanning the
+        existing rows of the table while holding a lock which blocks
+        writes.  The existing rows are checked afterwards using
+        ``ALTER TABLE .. VALIDATE CONSTRAINT``, which allows writes to
+        continue::
+
+            op.validate_constraint("fk_user_address", "address")
+
+        :param constraint_name: Name of the constraint.
+        :param table_name: String name of the table.
+        :param schema: Optional schema name to operate within.
+
+        """
+        op = cls(constraint_name, table_name, schema=schema)
+        return operations.invoke(op)
+
+    @classmethod
+    def batch_validate_constraint(cls, operations, constraint_name):
+        """Issue a "validate constraint" instruction using the
+        current batch migration context.
+
+        .. note::  This method is Postgresql specific.
+
+        .. seealso::
+
+            :meth:`.Operations.validate_constraint`
+
+        """
+        op = cls(
+            constraint_name,
+            operations.impl.table_name,
+            schema=operations.impl.schema,
+        )
+        return operations.invoke(op)
+
+
+@Operations.implementation_for(ValidateConstraintOp)
+def validate_constraint(operations, operation):
+    operations.impl.validate_constraint(
+        operation.table_name,
+        operation.constraint_name,
+        schema=operation.schema,
+    )
+
+
+@render.renderers.dispatch_for(ValidateConstraintOp)
+def _validate_constraint(autogen_context, op):
+    if autogen_context._has_batch:
+        template = "%(prefix)svalidate_constraint(%(name)r)"
+    else:
+        template = (
+            "%(prefix)svalidate_constraint(%(name)r, %(table_name)r%(schema)s)"
+        )
+    return template % {
+        "prefix": render._alembic_autogenerate_prefix(autogen_context),
+        "name": render._render_gen_name(autogen_context, op.constraint_name),
+        "table_name": render._ident(op.table_name),
+        "schema": (", schema=%r" % render._ident(op.schema))
+        if op.schema
+        else "",
+    }
+
+
+@impact.classifiers.dispatch_for(ValidateConstraintOp)
+def _validate_constraint_impact(impl, operation):
+    return impact.VALIDATION_SCAN
+
+
+@impact.classifiers.dispatch_for(ops.AddColumnOp, "postgresql")
+def _add_column_impact(impl, operation):
+    server_default = operation.column.server_default
+    if server_default is None:
+        return impact.METADATA_ONLY
+
+    # as of PostgreSQL 11, a non-volatile default is stored in the catalog
+    # rather than written to each row; only a plain string is assumed
+    # to be non-volatile
+    version = impl.dialect.server_version_info
+    if (
+        version is not None
+        and version >= (11,)
+        and isinstance(
+            getattr(server_default, "arg", None), compat.string_types
+        )
+    ):
+        return impact.METADATA_ONLY
+    return impact.FULL_REWRITE
+
+
+@impact.classifiers.dispatch_for(ops.AlterColumnOp, "postgresql")
+def _alter_column_impact(impl, operation):
+    if operation.modify_type is not None and (
+        "postgresql_using" in operation.kw
+        or not _is_widened_type(operation.existing_type, operation.modify_type)
+    ):
+        return impact.FULL_REWRITE
+    elif operation.modify_nullable is False:
+        return impact.VALIDATION_SCAN
+    else:
+        return impact.METADATA_ONLY
+
+
+@impact.classifiers.dispatch_for(ops.CreateForeignKeyOp, "postgresql")
+@impact.classifiers.dispatch_for(ops.CreateCheckConstraintOp, "postgresql")
+def _add_constraint_impact(impl, operation):
+    if operation.kw.get("postgresql_not_valid"):
+        return impact.METADATA_ONLY
+    else:
+        return impact.VALIDATION_SCAN
+
+
+def _is_widened_type(existing_type, type_):
+    """Return True if the given type is a string type of the same kind as
+    the existing type with the same or greater length, which PostgreSQL
+    changes without rewriting the table."""
+
+    if existing_type is None:
+        return False
+    existing_type = sqltypes.to_instance(existing_type)
+    type_ = sqltypes.to_instance(type_)
+    return (
+        isinstance(type_, sqltypes.String)
+        and type(existing_type) is type(type_)
+        and existing_type.collation == type_.collation
+        and (
+            type_.length is None
+            or (
+                existing_type.length is not None
+                and type_.length >= existing_type.length
+            )
+        )
+    )
+
+
 @render.renderers.dispatch_for(CreateExcludeConstraintOp)
 def _add_exclude_constraint(autogen_context, op):
     return _exclude_constraint(op.to_constraint(), autogen_context, alter=True)
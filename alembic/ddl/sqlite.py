@@ -1,10 +1,16 @@
+import contextlib
 import re
 
 from sqlalchemy import cast
+from sqlalchemy import inspect
 from sqlalchemy import JSON
+from sqlalchemy import text
 
+from .impl import _milliseconds
 from .impl import DefaultImpl
 from .. import util
+from ..operations import ops
+from ..runtime import impact
 
 
 class SQLiteImpl(DefaultImpl):
@@ -15,21 +21,195 @@ class SQLiteImpl(DefaultImpl):
     see: http://bugs.python.org/issue10740
     """
 
+    @util.memoized_property
+    def sqlite_version_info(self):
+        """The version of the SQLite library in use as a tuple, or None
+        if it can't be determined, as is the case in offline mode."""
+
+        if self.as_sql or self.dialect.dbapi is None:
+            return None
+        return getattr(self.dialect.dbapi, "sqlite_version_info", None)
+
+    def _lock_timeout_statement(self, seconds):
+        return "PRAGMA busy_timeout = %d" % _milliseconds(seconds)
+
+    def _lock_timeout_reset_statement(self):
+        # the previous setting isn't known in offline mode
+        if self.as_sql:
+            return None
+        return "PRAGMA busy_timeout = %d" % (
+            self.connection.execute(text("PRAGMA busy_timeout")).scalar()
+        )
+
+    def _is_lock_timeout(self, err):
+        return "database is locked" in str(err.orig)
+
     def requires_recreate_in_batch(self, batch_op):
         """Return True if the given :class:`.BatchOperationsImpl`
         would need the table to be recreated and copied in order to
         proceed.
 
-        Normally, only returns True on SQLite when operations other
-        than add_column are present.
+        Returns True on SQLite when operations other than add_column,
+        create_index and drop_index are present, with the exception of
+        those that the SQLite library in use supports natively; a plain
+        column rename on SQLite 3.25 or greater, and a drop of a column
+        that isn't part of a key, index, constraint, trigger or view on
+        SQLite 3.35 or greater.
 
         """
-        for op in batch_op.batch:
-            if op[0] not in ("add_column", "create_index", "drop_index"):
+        version = self.sqlite_version_info or (0,)
+        # names of columns added or renamed in this batch, which aren't
+        # yet present in the database to be examined for a native drop
+        names = set()
+        for opname, arg, kw in batch_op.batch:
+            if opname in ("create_index", "drop_index"):
+                continue
+            elif opname == "add_column":
+                names.add(arg[1].name)
+            elif (
+                opname == "alter_column"
+                and version >= (3, 25)
+                and self._is_rename_only(kw)
+            ):
+                names.update((arg[1], kw["name"]))
+            elif (
+                opname == "drop_column"
+                and version >= (3, 35)
+                and arg[1].name not in names
+                and self._can_drop_column_natively(
+                    arg[0], arg[1].name, kw.get("schema")
+                )
+            ):
+                names.add(arg[1].name)
+            else:
                 return True
         else:
             return False
 
+    def _is_rename_only(self, kw):
+        return (
+            kw.get("name") is not None
+            and kw.get("nullable") is None
+            and kw.get("server_default", False) is False
+            and kw.get("type_") is None
+            and kw.get("comment", False) is False
+            and kw.get("autoincrement") is None
+        )
+
+    def _can_drop_column_natively(self, table_name, column_name, schema):
+        # SQLite refuses to drop a column that is part of the primary key,
+        # a unique constraint, an index or a foreign key, or which is
+        # referred to by a CHECK constraint, a trigger or a view; the
+        # table is recreated in these cases, erring on the side of
+        # recreating for any expression that mentions the name.
+        inspector = inspect(self.connection)
+        if column_name in inspector.get_pk_constraint(
+            table_name, schema=schema
+        ).get("constrained_columns", ()):
+            return False
+        for const in inspector.get_unique_constraints(
+            table_name, schema=schema
+        ):
+            if column_name in const["column_names"]:
+                return False
+        for const in inspector.get_foreign_keys(table_name, schema=schema):
+            if column_name in const["constrained_columns"]:
+                return False
+
+        mentions_column = re.compile(
+            r"(?<![\w$])[\"`\[]?%s[\"`\]]?(?![\w$])" % re.escape(column_name),
+            re.I,
+        )
+        for const in inspector.get_check_constraints(
+            table_name, schema=schema
+        ):
+            if mentions_column.search(const["sqltext"]):
+                return False
+
+        master = "sqlite_master"
+        if schema:
+            master = "%s.%s" % (
+                self.dialect.identifier_preparer.quote_schema(schema),
+                master,
+            )
+        for (sql,) in self.connection.execute(
+            text(
+                "SELECT sql FROM %s WHERE sql IS NOT NULL AND ("
+                "(type = 'index' AND tbl_name = :table_name) "
+                "OR type IN ('trigger', 'view'))" % master
+            ),
+            table_name=table_name,
+        ):
+            if mentions_column.search(sql):
+                return False
+        return True
+
+    _offline_batch_settings = {
+        "foreign_keys": "ON",
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    }
+
+    @contextlib.contextmanager
+    def batch_recreate_settings(self, journal_mode=None, synchronous=None):
+        pragmas = [("foreign_keys", "OFF")]
+        if journal_mode is not None:
+            pragmas.append(("journal_mode", journal_mode))
+        if synchronous is not None:
+            pragmas.append(("synchronous", synchronous))
+
+        # in offline mode the previous settings aren't known; foreign key
+        # enforcement is turned back on, as it's turned off in case it's
+        # in use, and the other settings return to the SQLite defaults
+        previous = []
+        if self.as_sql:
+            previous = [
+                (name, self._offline_batch_settings[name])
+                for name, value in pragmas
+            ]
+        else:
+            for name, value in pragmas:
+                previous.append(
+                    (
+                        name,
+                        self.connection.execute(
+                            text("PRAGMA %s" % name)
+                        ).scalar(),
+                    )
+                )
+
+        for name, value in pragmas:
+            self._exec("PRAGMA %s=%s" % (name, value))
+        try:
+            yield
+        finally:
+            for name, value in reversed(previous):
+                self._exec("PRAGMA %s=%s" % (name, value))
+
+    def verify_batch_recreate(self, tables):
+        if self.as_sql:
+            return
+
+        preparer = self.dialect.identifier_preparer
+        violations = []
+        for table in tables:
+            pragma = "PRAGMA %sforeign_key_check(%s)" % (
+                "%s." % preparer.quote_schema(table.schema)
+                if table.schema
+                else "",
+                preparer.quote(table.name),
+            )
+            for row in self.connection.execute(text(pragma)):
+                violations.append(
+                    "row %s of table %s refers to a missing row of "
+                    "table %s" % (row[1], row[0], row[2])
+                )
+        if violations:
+            raise util.CommandError(
+                "Foreign key violations found after recreating tables: %s"
+                % "; ".join(violations)
+            )
+
     def add_constraint(self, const):
         # attempt to distinguish between an
         # auto-gen constraint and an explicit one
@@ -47,6 +227,25 @@ class SQLiteImpl(DefaultImpl):
                 "SQLite migrations using a copy-and-move strategy."
             )
 
+    def table_statistics(self, table_name, schema=None):
+        quote = self.dialect.identifier_preparer.quote
+        if schema:
+            master = "%s.sqlite_master" % quote(schema)
+            table = "%s.%s" % (quote(schema), quote(table_name))
+        else:
+            master = "sqlite_master"
+            table = quote(table_name)
+        if not self.connection.scalar(
+            text(
+                "SELECT count(*) FROM %s WHERE type = 'table' "
+                "AND name = :table_name" % master
+            ),
+            table_name=table_name,
+        ):
+            return None, None
+        # SQLite keeps no estimate of the number of rows
+        return self.connection.scalar("SELECT count(*) FROM %s" % table), None
+
     def drop_constraint(self, const):
         if const._create_rule is None:
             raise NotImplementedError(
@@ -146,3 +345,34 @@ class SQLiteImpl(DefaultImpl):
 #    for const in column.constraints:
 #        text += compiler.process(AddConstraint(const))
 #    return text
+
+
+@impact.classifiers.dispatch_for(ops.AddColumnOp, "sqlite")
+def _add_column_impact(impl, operation):
+    return impact.METADATA_ONLY
+
+
+@impact.classifiers.dispatch_for(ops.AlterColumnOp, "sqlite")
+def _alter_column_impact(impl, operation):
+    # a column rename alone is native as of SQLite 3.25; anything else
+    # recreates the table in batch mode
+    version = impl.dialect.server_version_info
+    if (
+        operation.modify_name is not None
+        and operation.modify_type is None
+        and operation.modify_nullable is None
+        and operation.modify_server_default is False
+        and operation.modify_comment is False
+        and version is not None
+        and version >= (3, 25, 0)
+    ):
+        return impact.METADATA_ONLY
+    else:
+        return impact.FULL_REWRITE
+
+
+@impact.classifiers.dispatch_for(ops.DropColumnOp, "sqlite")
+@impact.classifiers.dispatch_for(ops.AddConstraintOp, "sqlite")
+@impact.classifiers.dispatch_for(ops.DropConstraintOp, "sqlite")
+def _recreate_impact(impl, operation):
+    return impact.FULL_REWRITE
@@ -165,10 +165,13 @@ class Operations(util.ModuleClsProxy):
     @classmethod
     @contextmanager
     def context(cls, migration_context):
+        previous = cls._get_proxy()
         op = Operations(migration_context)
         op._install_proxy()
         yield op
         op._remove_proxy()
+        if previous is not None:
+            previous._install_proxy()
 
     @contextmanager
     def batch_alter_table(
@@ -183,6 +186,7 @@ class Operations(util.ModuleClsProxy):
         reflect_args=(),
         reflect_kwargs=util.immutabledict(),
         naming_convention=None,
+        coalesce_alter_table=False,
     ):
         """Invoke a series of per-table migrations in batch.
 
@@ -226,6 +230,14 @@ class Operations(util.ModuleClsProxy):
         The copy operation by default uses reflection to retrieve the current
         structure of the table, and therefore :meth:`.batch_alter_table`
         in this mode requires that the migration is run in "online" mode.
+        Once a table has been recreated, its new structure is retained
+        for the lifetime of the :class:`.MigrationContext`, so that
+        subsequent batch blocks against the same table, in the same or
+        following migrations, use it rather than reflecting the table
+        again; the retained structure is discarded when the table is
+        altered by other operations, when SQL that can't be attributed to
+        a particular table is executed, or when
+        :meth:`.Operations.get_bind` is called.
         The ``copy_from`` parameter may be passed which refers to an existing
         :class:`.Table` object, which will bypass this reflection step.
 
@@ -240,7 +252,15 @@ class Operations(util.ModuleClsProxy):
          recreated. At its default of ``"auto"``, the SQLite dialect will
          recreate the table if any operations other than ``add_column()``,
          ``create_index()``, or ``drop_index()`` are
-         present. Other options include ``"always"`` and ``"never"``.
+         present, unless the SQLite library in use supports the remaining
+         operations natively; a column rename without other changes is
+         emitted as ``ALTER TABLE .. RENAME COLUMN`` on SQLite 3.25 and
+         above, and a drop of a column that isn't part of a key, index,
+         constraint, trigger or view is emitted as ``ALTER TABLE ..
+         DROP COLUMN`` on SQLite 3.35 and above.  The native forms
+         require an online connection; in offline mode the table is
+         recreated as before.  Other options include ``"always"`` and
+         ``"never"``.
         :param copy_from: optional :class:`~sqlalchemy.schema.Table` object
          that will act as the structure of the table being copied.  If omitted,
          table reflection is used to retrieve the structure of the table.
@@ -328,6 +348,19 @@ class Operations(util.ModuleClsProxy):
 
          .. versionadded:: 1.4.0
 
+        :param coalesce_alter_table: when the table is not recreated, e.g.
+         with :paramref:`.batch_alter_table.recreate` set to ``"never"``,
+         combine consecutive directives within the batch into as few
+         multi-action ALTER TABLE statements as possible, rather than
+         emitting one statement per directive.  This takes effect on
+         backends which support multiple actions per ALTER TABLE,
+         currently PostgreSQL and MySQL; elsewhere the directives are
+         emitted individually as usual.
+
+         .. seealso::
+
+            :paramref:`.EnvironmentContext.configure.coalesce_alter_table`
+
         .. note:: batch mode requires SQLAlchemy 0.8 or above.
 
         .. seealso::
@@ -347,11 +380,94 @@ class Operations(util.ModuleClsProxy):
             reflect_kwargs,
             naming_convention,
             partial_reordering,
+            coalesce_alter_table=coalesce_alter_table,
         )
         batch_op = BatchOperations(self.migration_context, impl=impl)
         yield batch_op
         impl.flush()
 
+    @contextmanager
+    def batch_alter_tables(
+        self, journal_mode=None, synchronous=None, integrity_check=True
+    ):
+        """Perform the table recreations of several
+        :meth:`.Operations.batch_alter_table` blocks together, in one pass.
+
+        E.g.::
+
+            with op.batch_alter_tables():
+                with op.batch_alter_table("parent") as batch_op:
+                    batch_op.alter_column("data", type_=String(100))
+
+                with op.batch_alter_table("child") as batch_op:
+                    batch_op.drop_column("legacy")
+
+        Each "recreate" style batch block within the context creates and
+        populates nothing at first; when the context ends, the new tables
+        are created and populated, referenced tables ahead of the tables
+        that refer to them, after which the indexes of all tables are
+        created, followed by an integrity check of the new tables.
+        Blocks that don't recreate their table, and other operations
+        within the context, proceed immediately as usual.  Note that a
+        table still awaiting recreation retains its original structure
+        until the context ends, so that such operations shouldn't
+        refer to it.  A table that is named by a second batch block
+        within the context is recreated at that point.
+
+        On SQLite, foreign key enforcement is turned off once for the
+        duration of the context, and the journal mode and synchronous
+        settings of the connection may optionally be tuned for bulk
+        copying; the previous values of these settings are restored when
+        the context ends.   In offline mode, where the previous values
+        can't be read, foreign key enforcement is turned back on, and the
+        journal mode and synchronous setting, where given, are returned
+        to the SQLite defaults of ``DELETE`` and ``FULL``.   The integrity
+        check runs ``PRAGMA foreign_key_check`` for
+        each new table, raising :class:`~alembic.util.CommandError` if
+        any rows refer to rows that don't exist.  Other backends don't
+        currently apply any settings or checks.
+
+        .. note:: Turning off foreign key enforcement on SQLite has
+           no effect within a transaction; when running migrations
+           within a transaction, ``PRAGMA foreign_keys=OFF`` should be
+           established on the connection before the transaction begins.
+           The journal mode similarly can't be changed within a
+           transaction when the database uses write-ahead logging.
+
+        :param journal_mode: SQLite journal mode to use for the duration
+         of the context, e.g. ``"MEMORY"``; defaults to ``None``, which
+         leaves the journal mode unchanged.  A journal mode of ``"MEMORY"``
+         or ``"OFF"`` speeds up copying, at the risk of a corrupt database
+         should the process or the system fail during the migration.
+        :param synchronous: SQLite synchronous setting to use for the
+         duration of the context, e.g. ``"OFF"``; defaults to ``None``,
+         which leaves the setting unchanged.  As with ``journal_mode``,
+         ``"OFF"`` trades durability on power loss for speed.
+        :param integrity_check: when ``False``, skip the integrity check
+         of the new tables.   The check is always skipped in offline
+         mode.
+
+        .. seealso::
+
+            :ref:`batch_multiple_tables`
+
+        """
+        migration_context = self.migration_context
+        if migration_context._batch_recreate_group is not None:
+            yield
+            return
+
+        group = batch.BatchRecreateGroup(self, integrity_check)
+        with self.impl.batch_recreate_settings(
+            journal_mode=journal_mode, synchronous=synchronous
+        ):
+            migration_context._batch_recreate_group = group
+            try:
+                yield
+                group.flush()
+            finally:
+                migration_context._batch_recreate_group = None
+
     def get_context(self):
         """Return the :class:`.MigrationContext` object that's
         currently in use.
@@ -367,6 +483,10 @@ class Operations(util.ModuleClsProxy):
         .. versionadded:: 0.8.0
 
         """
+        if self.migration_context._impact_report is not None:
+            self.migration_context._impact_report.record(
+                self.migration_context, operation
+            )
         fn = self._to_impl.dispatch(
             operation, self.migration_context.impl.__dialect__
         )
@@ -473,8 +593,19 @@ class Operations(util.ModuleClsProxy):
 
         In a SQL script context, this value is ``None``. [TODO: verify this]
 
+        Any ALTER TABLE actions held pending by the
+        :paramref:`.EnvironmentContext.configure.coalesce_alter_table`
+        option are emitted first, so that statements executed on the
+        connection observe them.  As statements executed directly on the
+        connection may alter any table, the table structures retained by
+        :meth:`.Operations.batch_alter_table` in place of reflection are
+        discarded.
+
         """
-        return self.migration_context.impl.bind
+        impl = self.migration_context.impl
+        impl.flush_alter_table()
+        impl._batch_tables.clear()
+        return impl.bind
 
 
 class BatchOperations(Operations):
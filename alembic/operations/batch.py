@@ -1,5 +1,6 @@
 from sqlalchemy import CheckConstraint
 from sqlalchemy import Column
+from sqlalchemy import exc as sqla_exc
 from sqlalchemy import ForeignKeyConstraint
 from sqlalchemy import Index
 from sqlalchemy import MetaData
@@ -33,6 +34,7 @@ class BatchOperationsImpl(object):
         reflect_kwargs,
         naming_convention,
         partial_reordering,
+        coalesce_alter_table=False,
     ):
         self.operations = operations
         self.table_name = table_name
@@ -46,6 +48,9 @@ class BatchOperationsImpl(object):
         self.table_args = table_args
         self.table_kwargs = dict(table_kwargs)
         self.reflect_args = reflect_args
+        # a table retained from an earlier recreation is used in place
+        # of reflection only when reflection isn't customized
+        self.reuse_table = not reflect_args and not reflect_kwargs
         self.reflect_kwargs = dict(reflect_kwargs)
         self.reflect_kwargs.setdefault(
             "listeners", list(self.reflect_kwargs.get("listeners", ()))
@@ -55,6 +60,7 @@ class BatchOperationsImpl(object):
         )
         self.naming_convention = naming_convention
         self.partial_reordering = partial_reordering
+        self.coalesce_alter_table = coalesce_alter_table
         self.batch = []
 
     @property
@@ -74,21 +80,36 @@ class BatchOperationsImpl(object):
             return False
 
     def flush(self):
+        group = self.operations.migration_context._batch_recreate_group
+        if group is not None:
+            # a table recreated by an earlier block in the same group is
+            # completed first, so that this block sees its current state
+            group.complete(self.table_name, self.schema)
+
         should_recreate = self._should_recreate()
 
         if not should_recreate:
-            for opname, arg, kw in self.batch:
-                fn = getattr(self.operations.impl, opname)
-                fn(*arg, **kw)
+            if self.coalesce_alter_table:
+                with self.impl.coalesce_alter_table():
+                    self._alter_in_place()
+            else:
+                self._alter_in_place()
         else:
             if self.naming_convention:
                 m1 = MetaData(naming_convention=self.naming_convention)
             else:
                 m1 = MetaData()
 
+            table_key = (self.table_name, self.schema)
             if self.copy_from is not None:
                 existing_table = self.copy_from
                 reflected = False
+            elif self.reuse_table and table_key in self.impl._batch_tables:
+                # the structure left by an earlier recreation of the table
+                existing_table = self.impl._batch_tables[table_key].tometadata(
+                    m1
+                )
+                reflected = True
             else:
                 existing_table = Table(
                     self.table_name,
@@ -113,11 +134,24 @@ class BatchOperationsImpl(object):
                 fn = getattr(batch_impl, opname)
                 fn(*arg, **kw)
 
-            batch_impl._create(self.impl)
+            if group is not None:
+                group.add(batch_impl)
+            else:
+                batch_impl._create(self.impl)
+
+    def _alter_in_place(self):
+        for opname, arg, kw in self.batch:
+            fn = getattr(self.operations.impl, opname)
+            fn(*arg, **kw)
 
     def alter_column(self, *arg, **kw):
         self.batch.append(("alter_column", arg, kw))
 
+    def alter_column_autocommit(self, nullable, kw):
+        # statements within a batch are run within the migration's
+        # transaction as the batch is flushed
+        return False
+
     def add_column(self, *arg, **kw):
         if (
             "insert_before" in kw or "insert_after" in kw
@@ -137,6 +171,9 @@ class BatchOperationsImpl(object):
     def drop_constraint(self, const):
         self.batch.append(("drop_constraint", (const,), {}))
 
+    def validate_constraint(self, *arg, **kw):
+        self.batch.append(("validate_constraint", arg, kw))
+
     def rename_table(self, *arg, **kw):
         self.batch.append(("rename_table", arg, kw))
 
@@ -153,6 +190,73 @@ class BatchOperationsImpl(object):
         raise NotImplementedError("Can't drop table in batch mode")
 
 
+class BatchRecreateGroup(object):
+    """Collect the table recreations of several batch blocks, to be
+    performed together by :meth:`.Operations.batch_alter_tables`."""
+
+    def __init__(self, operations, integrity_check):
+        self.operations = operations
+        self.integrity_check = integrity_check
+        self.batch_impls = OrderedDict()
+
+    @property
+    def impl(self):
+        return self.operations.impl
+
+    def add(self, batch_impl):
+        key = (batch_impl.table.name, batch_impl.table.schema)
+        self.batch_impls[key] = batch_impl
+
+    def complete(self, table_name, schema):
+        batch_impl = self.batch_impls.pop((table_name, schema), None)
+        if batch_impl is not None:
+            batch_impl._create(self.impl)
+            self._verify([batch_impl])
+
+    def _sorted_batch_impls(self):
+        # referenced tables are copied ahead of the tables that refer
+        # to them; foreign key cycles retain the order of the blocks
+        pairs = set()
+        for key, batch_impl in self.batch_impls.items():
+            for const in batch_impl.table.foreign_key_constraints:
+                referent = _referent_key(const)
+                if referent != key and referent in self.batch_impls:
+                    pairs.add((referent, key))
+        try:
+            keys = list(
+                topological.sort(
+                    pairs, list(self.batch_impls), deterministic_order=True
+                )
+            )
+        except sqla_exc.CircularDependencyError:
+            keys = list(self.batch_impls)
+        return [self.batch_impls[key] for key in keys]
+
+    def _verify(self, batch_impls):
+        if self.integrity_check:
+            self.impl.verify_batch_recreate(
+                [batch_impl.table for batch_impl in batch_impls]
+            )
+
+    def flush(self):
+        batch_impls = self._sorted_batch_impls()
+        self.batch_impls.clear()
+
+        for batch_impl in batch_impls:
+            batch_impl._copy_to_new_table(self.impl)
+        for batch_impl in batch_impls:
+            batch_impl._create_indexes(self.impl)
+        self._verify(batch_impls)
+
+
+def _referent_key(constraint):
+    parts = constraint.elements[0]._get_colspec().split(".")
+    if len(parts) == 3:
+        return parts[1], parts[0]
+    else:
+        return parts[-2], None
+
+
 class ApplyBatchImpl(object):
     def __init__(
         self,
@@ -344,6 +448,10 @@ class ApplyBatchImpl(object):
                 )
 
     def _create(self, op_impl):
+        self._copy_to_new_table(op_impl)
+        self._create_indexes(op_impl)
+
+    def _copy_to_new_table(self, op_impl):
         self._transfer_elements_to_new_table()
 
         op_impl.prep_table_for_batch(self.table)
@@ -374,12 +482,43 @@ class ApplyBatchImpl(object):
             op_impl.rename_table(
                 self.temp_table_name, self.table.name, schema=self.table.schema
             )
-            self.new_table.name = self.table.name
-            try:
-                for idx in self._gather_indexes_from_both_tables():
-                    op_impl.create_index(idx)
-            finally:
-                self.new_table.name = self.temp_table_name
+
+    def _create_indexes(self, op_impl):
+        self.new_table.name = self.table.name
+        try:
+            for idx in self._gather_indexes_from_both_tables():
+                op_impl.create_index(idx)
+        finally:
+            self.new_table.name = self.temp_table_name
+
+        # a renamed column continues to be keyed on its old name within
+        # the new table, which reflection wouldn't reproduce; the table is
+        # reflected again in that case
+        if self.reflected and all(
+            col.key == col.name for col in self.new_table.c
+        ):
+            op_impl._batch_tables[
+                (self.table.name, self.table.schema)
+            ] = self._table_for_reuse()
+
+    def _table_for_reuse(self):
+        """Return the structure of the recreated table, for use by
+        subsequent batch operations in place of reflecting it."""
+
+        table = self.new_table.tometadata(MetaData(), name=self.table.name)
+        for idx in self.indexes.values():
+            colnames = [col.name for col in idx.columns]
+            if idx.name in self.new_indexes or not all(
+                name in table.c for name in colnames
+            ):
+                continue
+            Index(
+                idx.name,
+                unique=idx.unique,
+                *[table.c[name] for name in colnames],
+                **idx.kwargs
+            )
+        return table
 
     def alter_column(
         self,
@@ -525,6 +664,10 @@ class ApplyBatchImpl(object):
                 for col in const.columns:
                     self.columns[col.name].primary_key = False
 
+    def validate_constraint(self, table_name, constraint_name, **kw):
+        # constraints of the new table are created in full along with it
+        pass
+
     def create_index(self, idx):
         self.new_indexes[idx.name] = idx
 
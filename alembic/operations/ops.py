@@ -524,6 +524,7 @@ class CreateForeignKeyOp(AddConstraintOp):
 
         kw["source_schema"] = source_schema
         kw["referent_schema"] = target_schema
+        kw.update(constraint.dialect_kwargs)
 
         return cls(
             constraint.name,
@@ -615,6 +616,12 @@ class CreateForeignKeyOp(AddConstraintOp):
          DEFERRABLE when issuing DDL for this constraint.
         :param source_schema: Optional schema name of the source table.
         :param referent_schema: Optional schema name of the destination table.
+        :param postgresql_not_valid: Optional boolean.  When ``True``, on
+         Postgresql only, create the constraint as ``NOT VALID``, so that
+         it's enforced for new rows without checking the existing rows of
+         the table under a lock which blocks writes; the existing rows are
+         checked afterwards using
+         :meth:`~.Operations.validate_constraint`.
 
         .. versionchanged:: 0.8.0 The following positional argument names
            have been changed:
@@ -741,6 +748,7 @@ class CreateCheckConstraintOp(AddConstraintOp):
             constraint.sqltext,
             schema=constraint_table.schema,
             _orig_constraint=constraint,
+            **constraint.dialect_kwargs
         )
 
     def to_constraint(self, migration_context=None):
@@ -810,6 +818,13 @@ class CreateCheckConstraintOp(AddConstraintOp):
          .. versionadded:: 0.7.0 'schema' can now accept a
             :class:`~sqlalchemy.sql.elements.quoted_name` construct.
 
+        :param postgresql_not_valid: Optional boolean.  When ``True``, on
+         Postgresql only, create the constraint as ``NOT VALID``, so that
+         it's enforced for new rows without checking the existing rows of
+         the table under a lock which blocks writes; the existing rows are
+         checked afterwards using
+         :meth:`~.Operations.validate_constraint`.
+
         .. versionchanged:: 0.8.0 The following positional argument names
            have been changed:
 
@@ -966,6 +981,19 @@ class CreateIndexOp(MigrateOperation):
             ``<dialectname>_<argname>``.
             See the documentation regarding an individual dialect at
             :ref:`dialect_toplevel` for detail on documented arguments.
+            In addition, ``mysql_algorithm`` and ``mysql_lock`` render
+            MySQL's ``ALGORITHM`` and ``LOCK`` clauses with the statement;
+            see :paramref:`.Operations.alter_column.mysql_algorithm`.
+            On Microsoft SQL Server, ``mssql_online=True``,
+            ``mssql_maxdop=<n>`` and ``mssql_resumable=True`` render the
+            ``WITH (ONLINE = ON, MAXDOP = n, RESUMABLE = ON)`` clause,
+            building the index without blocking writes to the table.  On
+            Oracle, ``oracle_online=True`` and ``oracle_parallel=<n>``
+            render the ``ONLINE`` and ``PARALLEL n`` clauses.  Where not
+            given, these default to the options of the same name passed to
+            :meth:`.EnvironmentContext.configure`.  An existing index may
+            be rebuilt with the same options using
+            :meth:`.Operations.rebuild_index`.
 
         .. versionchanged:: 0.8.0 The following positional argument names
            have been changed:
@@ -1079,6 +1107,9 @@ class DropIndexOp(MigrateOperation):
             ``<dialectname>_<argname>``.
             See the documentation regarding an individual dialect at
             :ref:`dialect_toplevel` for detail on documented arguments.
+            In addition, ``mysql_algorithm`` and ``mysql_lock`` render
+            MySQL's ``ALGORITHM`` and ``LOCK`` clauses with the statement;
+            see :paramref:`.Operations.alter_column.mysql_algorithm`.
 
             .. versionadded:: 0.9.5 Support for dialect-specific keyword
                arguments for DROP INDEX
@@ -1118,6 +1149,64 @@ class DropIndexOp(MigrateOperation):
         return operations.invoke(op)
 
 
+@Operations.register_operation("rebuild_index")
+class RebuildIndexOp(MigrateOperation):
+    """Represent a rebuild index operation."""
+
+    def __init__(self, index_name, table_name=None, schema=None, **kw):
+        self.index_name = index_name
+        self.table_name = table_name
+        self.schema = schema
+        self.kw = kw
+
+    def to_index(self, migration_context=None):
+        schema_obj = schemaobj.SchemaObjects(migration_context)
+
+        return schema_obj.index(
+            self.index_name,
+            self.table_name,
+            ["x"],
+            schema=self.schema,
+            **self.kw
+        )
+
+    @classmethod
+    def rebuild_index(
+        cls, operations, index_name, table_name=None, schema=None, **kw
+    ):
+        r"""Issue a "rebuild index" instruction using the current
+        migration context.
+
+        .. note::  This method is specific to Microsoft SQL Server and
+           Oracle.
+
+        e.g.::
+
+            rebuild_index(
+                "ix_account_name", "account",
+                mssql_online=True, mssql_maxdop=4
+            )
+
+        emits ``ALTER INDEX .. REBUILD``, along with the options which
+        allow the index to be rebuilt while the table remains available for
+        writes.
+
+        :param index_name: name of the index.
+        :param table_name: name of the owning table.  Microsoft SQL Server
+         requires this.
+        :param schema: Optional schema name to operate within.
+        :param \**kw: Additional keyword arguments not mentioned above are
+            dialect specific, and passed in the form
+            ``<dialectname>_<argname>``.  These include the
+            ``mssql_online``, ``mssql_maxdop``, ``mssql_resumable``,
+            ``oracle_online`` and ``oracle_parallel`` options also accepted
+            by :meth:`.Operations.create_index`.
+
+        """
+        op = cls(index_name, table_name=table_name, schema=schema, **kw)
+        return operations.invoke(op)
+
+
 @Operations.register_operation("create_table")
 class CreateTableOp(MigrateOperation):
     """Represent a create table operation."""
@@ -1758,6 +1847,34 @@ class AlterColumnOp(AlterTableOp):
 
          .. versionadded:: 0.8.8
 
+        :param postgresql_not_null_check: Optional boolean.  When ``True``
+         along with ``nullable=False``, on Postgresql only, first create a
+         ``NOT VALID`` check constraint that the column is not null and
+         validate it, then emit ``SET NOT NULL``, and finally drop the
+         check constraint.  On Postgresql 12 and above, ``SET NOT NULL``
+         then makes use of the validated constraint rather than scanning
+         the table under a lock which blocks writes.  So that the lock
+         taken when the constraint is created isn't held while it's
+         validated, the statements are run within
+         :meth:`.MigrationContext.autocommit_block`, each being committed
+         on its own; as with any autocommit block, the migration's
+         transaction up to this point is committed first, so that
+         :paramref:`.EnvironmentContext.configure.transaction_per_migration`
+         is recommended.  Within a batch operation, the statements are
+         run within the migration's transaction as usual.
+
+        :param mysql_algorithm: Optional string.  On MySQL only, render
+         an ``ALGORITHM`` clause such as ``INSTANT`` or ``INPLACE`` with
+         the statement, so that the database raises an error rather than
+         falling back to a table copy when the change can't be made
+         with the given algorithm.  Defaults to the
+         ``mysql_algorithm`` option passed to
+         :meth:`.EnvironmentContext.configure`.
+        :param mysql_lock: Optional string.  On MySQL only, render a
+         ``LOCK`` clause such as ``NONE`` or ``SHARED`` with the
+         statement.  Defaults to the ``mysql_lock`` option passed to
+         :meth:`.EnvironmentContext.configure`.
+
         """
 
         alt = cls(
@@ -1871,7 +1988,7 @@ class AddColumnOp(AlterTableOp):
         return cls(tname, col, schema=schema)
 
     @classmethod
-    def add_column(cls, operations, table_name, column, schema=None):
+    def add_column(cls, operations, table_name, column, schema=None, **kw):
         """Issue an "add column" instruction using the current
         migration context.
 
@@ -1922,15 +2039,26 @@ class AddColumnOp(AlterTableOp):
          .. versionadded:: 0.7.0 'schema' can now accept a
             :class:`~sqlalchemy.sql.elements.quoted_name` construct.
 
+        :param mysql_algorithm: Optional string.  On MySQL only, render
+         an ``ALGORITHM`` clause such as ``INSTANT`` or ``INPLACE`` with
+         the statement, so that the database raises an error rather than
+         falling back to a table copy when the change can't be made
+         with the given algorithm.  Defaults to the
+         ``mysql_algorithm`` option passed to
+         :meth:`.EnvironmentContext.configure`.
+        :param mysql_lock: Optional string.  On MySQL only, render a
+         ``LOCK`` clause such as ``NONE`` or ``SHARED`` with the
+         statement.  Defaults to the ``mysql_lock`` option passed to
+         :meth:`.EnvironmentContext.configure`.
 
         """
 
-        op = cls(table_name, column, schema=schema)
+        op = cls(table_name, column, schema=schema, **kw)
         return operations.invoke(op)
 
     @classmethod
     def batch_add_column(
-        cls, operations, column, insert_before=None, insert_after=None
+        cls, operations, column, insert_before=None, insert_after=None, **kw
     ):
         """Issue an "add column" instruction using the current
         batch migration context.
@@ -1941,7 +2069,6 @@ class AddColumnOp(AlterTableOp):
 
         """
 
-        kw = {}
         if insert_before:
             kw["insert_before"] = insert_before
         if insert_after:
@@ -2043,6 +2170,18 @@ class DropColumnOp(AlterTableOp):
 
          .. versionadded:: 0.6.2
 
+        :param mysql_algorithm: Optional string.  On MySQL only, render
+         an ``ALGORITHM`` clause such as ``INSTANT`` or ``INPLACE`` with
+         the statement, so that the database raises an error rather than
+         falling back to a table copy when the change can't be made
+         with the given algorithm.  Defaults to the
+         ``mysql_algorithm`` option passed to
+         :meth:`.EnvironmentContext.configure`.
+        :param mysql_lock: Optional string.  On MySQL only, render a
+         ``LOCK`` clause such as ``NONE`` or ``SHARED`` with the
+         statement.  Defaults to the ``mysql_lock`` option passed to
+         :meth:`.EnvironmentContext.configure`.
+
         """
 
         op = cls(table_name, column_name, schema=schema, **kw)
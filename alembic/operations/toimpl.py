@@ -40,21 +40,30 @@ def alter_column(operations, operation):
             if _count_constraint(constraint):
                 operations.impl.drop_constraint(constraint)
 
-    operations.impl.alter_column(
-        table_name,
-        column_name,
-        nullable=nullable,
-        server_default=server_default,
-        name=new_column_name,
-        type_=type_,
-        schema=schema,
-        existing_type=existing_type,
-        existing_server_default=existing_server_default,
-        existing_nullable=existing_nullable,
-        comment=comment,
-        existing_comment=existing_comment,
-        **operation.kw
-    )
+    def _alter_column():
+        operations.impl.alter_column(
+            table_name,
+            column_name,
+            nullable=nullable,
+            server_default=server_default,
+            name=new_column_name,
+            type_=type_,
+            schema=schema,
+            existing_type=existing_type,
+            existing_server_default=existing_server_default,
+            existing_nullable=existing_nullable,
+            comment=comment,
+            existing_comment=existing_comment,
+            **operation.kw
+        )
+
+    if operations.impl.alter_column_autocommit(nullable, operation.kw):
+        operations.impl.flush_alter_table()
+        with operations.migration_context.autocommit_block():
+            _alter_column()
+            operations.impl.flush_alter_table()
+    else:
+        _alter_column()
 
     if type_:
         t = operations.schema_obj.table(
@@ -95,6 +104,13 @@ def drop_index(operations, operation):
     )
 
 
+@Operations.implementation_for(ops.RebuildIndexOp)
+def rebuild_index(operations, operation):
+    operations.impl.rebuild_index(
+        operation.to_index(operations.migration_context)
+    )
+
+
 @Operations.implementation_for(ops.CreateTableOp)
 def create_table(operations, operation):
     table = operation.to_table(operations.migration_context)
@@ -292,6 +292,11 @@ class EnvironmentContext(util.ModuleClsProxy):
         dialect_opts=None,
         transactional_ddl=None,
         transaction_per_migration=False,
+        migration_lock=False,
+        coalesce_alter_table=False,
+        lock_timeout=None,
+        lock_timeout_retries=0,
+        lock_timeout_retry_interval=1.0,
         output_buffer=None,
         starting_rev=None,
         tag=None,
@@ -301,10 +306,12 @@ class EnvironmentContext(util.ModuleClsProxy):
         include_symbol=None,
         include_object=None,
         include_schemas=False,
+        dedupe_schemas=False,
         process_revision_directives=None,
         compare_type=False,
         compare_server_default=False,
         render_item=None,
+        profile_autogenerate=False,
         literal_binds=False,
         upgrade_token="upgrades",
         downgrade_token="downgrades",
@@ -371,6 +378,56 @@ class EnvironmentContext(util.ModuleClsProxy):
 
          .. versionadded:: 0.6.5
 
+        :param coalesce_alter_table: if True, consecutive operations such
+         as :meth:`.Operations.add_column`, :meth:`.Operations.alter_column`,
+         :meth:`.Operations.drop_column` and
+         :meth:`.Operations.create_foreign_key` which are directed at the
+         same table are combined into a single ALTER TABLE statement with
+         multiple actions, so that the table is locked, and on MySQL
+         possibly rebuilt, only once.  Pending actions are emitted as soon
+         as any other statement is to be run, including the update of the
+         version table at the end of each migration, and when
+         :meth:`.Operations.get_bind` is called.  Actions which add, drop or
+         rename a particular column or constraint are never combined with
+         other actions referring to the same name.  This takes effect on
+         backends which support multiple actions per ALTER TABLE,
+         currently PostgreSQL and MySQL.
+
+         .. seealso::
+
+            :paramref:`.Operations.batch_alter_table.coalesce_alter_table`
+
+        :param lock_timeout: the number of seconds, which may be
+         fractional, that a statement emitted by a migration will wait to
+         acquire a lock before failing, rather than waiting behind a long
+         running transaction while queueing every subsequent query on the
+         table.  This is established on the connection before the first
+         statement, using ``SET lock_timeout`` on PostgreSQL,
+         ``SET SESSION lock_wait_timeout`` on MySQL, ``SET LOCK_TIMEOUT``
+         on SQL Server, ``ALTER SESSION SET DDL_LOCK_TIMEOUT`` on Oracle
+         and ``PRAGMA busy_timeout`` on SQLite, and is also rendered in
+         offline ``--sql`` mode.  On PostgreSQL, ``SET LOCAL`` is used
+         within a transaction, so that the setting is established again
+         following each commit or rollback.  Once
+         :meth:`.MigrationContext.run_migrations` completes, whether or not
+         successfully, the setting is returned to its previous value, so
+         that it doesn't remain in effect on a pooled connection; in
+         offline mode on SQLite, where the previous value isn't known, it's
+         left in place.
+
+        :param lock_timeout_retries: the number of times a statement which
+         failed because a lock could not be acquired in time is retried,
+         defaulting to zero.  Each retry is logged as a warning on the
+         ``alembic.ddl.impl`` logger.  Where DDL is transactional, each
+         statement is run within a SAVEPOINT so that the failure of one
+         attempt doesn't abort the enclosing transaction.
+
+        :param lock_timeout_retry_interval: the number of seconds to wait
+         before the first retry, defaulting to one.  The wait doubles with
+         each subsequent retry, and each wait is reduced by a random amount
+         of up to half, so that several migration processes retrying
+         against the same lock don't do so in step.
+
         :param output_buffer: a file-like object that will be used
          for textual output
          when the ``--sql`` option is used to generate SQL scripts.
@@ -426,6 +483,30 @@ class EnvironmentContext(util.ModuleClsProxy):
             flag and additionally established that the Alembic version table
             has a primary key constraint by default.
 
+        :param migration_lock: when True, or given a string key, hold a lock
+         while :meth:`.MigrationContext.run_migrations` proceeds, so that
+         when many processes run ``alembic upgrade`` against the same
+         database at once, only one of them runs the migrations; the others
+         wait for the lock, then read the current revision of the database
+         and find that there's nothing left to do.  The lock is identified by
+         the given key, or by default by the name and schema of the version
+         table.  On PostgreSQL, an advisory lock is taken using
+         ``pg_advisory_xact_lock()``, or ``pg_advisory_lock()`` when not
+         within a transaction; on MySQL, ``GET_LOCK()`` is used and on SQL
+         Server, ``sp_getapplock``.  Where taken within a transaction, the
+         lock is held until the transaction ends, so that the update of the
+         version table is visible to the waiting processes; as the named
+         locks of MySQL aren't tied to transactions, ``RELEASE_LOCK()`` is
+         deferred until the :meth:`.EnvironmentContext.begin_transaction`
+         block ends.  A transaction begun by ``env.py`` on the connection
+         itself is only committed after that block, so ``env.py`` should
+         rely on :meth:`.EnvironmentContext.begin_transaction` alone when
+         this option is used with MySQL.  On other
+         backends, a row is locked within a table named after the version
+         table with the suffix ``_lock``, created if not present, which
+         requires that migrations run within a transaction.  Has no effect
+         in offline ``--sql`` mode.
+
         :param on_version_apply: a callable or collection of callables to be
             run for each migration step.
             The callables will be run in the order they are given, once for
@@ -631,6 +712,27 @@ class EnvironmentContext(util.ModuleClsProxy):
 
             :paramref:`.EnvironmentContext.configure.include_object`
 
+            :paramref:`.EnvironmentContext.configure.dedupe_schemas`
+
+        :param dedupe_schemas: If True, and
+         :paramref:`.EnvironmentContext.configure.include_schemas` is also
+         True, autogenerate will ask the dialect for a structural
+         fingerprint of each schema, using a single catalog query.  Schemas
+         which share a fingerprint, such as those of a "schema per tenant"
+         database, are then reflected from the database only once; the
+         reflection results for the remaining schemas in the group are
+         derived from the first, with references to its schema name
+         converted.  Each schema is still compared to the model and
+         receives its own migration operations.  The default schema is
+         always reflected directly.
+
+         This option currently has an effect on the PostgreSQL backend
+         only; other backends reflect each schema as usual.
+
+         .. seealso::
+
+            :paramref:`.EnvironmentContext.configure.include_schemas`
+
         :param render_item: Callable that can be used to override how
          any schema item, i.e. column, constraint, type,
          etc., is rendered for autogenerate.  The callable receives a
@@ -660,6 +762,20 @@ class EnvironmentContext(util.ModuleClsProxy):
 
             :ref:`autogen_render_types`
 
+        :param profile_autogenerate: If True, an :class:`.AutogenProfile`
+         is established as the :attr:`.AutogenContext.profile` attribute,
+         which collects timings for the comparison and rendering phases,
+         for each comparison function including those registered by the
+         end user, for each reflection method that required a catalog
+         query, and for each call to the
+         :paramref:`.EnvironmentContext.configure.render_item` hook, along
+         with the number of SQL statements emitted during comparison.  When
+         :func:`.produce_migrations` is used, the report is logged at the
+         INFO level on the ``alembic.autogenerate.api`` logger.  The
+         ``--profile`` option of ``alembic revision --autogenerate``
+         enables the same profiling without this option being set, and
+         prints the report once the revision has been generated.
+
         :param upgrade_token: When autogenerate completes, the text of the
          candidate upgrade operations will be present in this template
          variable when ``script.py.mako`` is rendered.  Defaults to
@@ -773,6 +889,34 @@ class EnvironmentContext(util.ModuleClsProxy):
          be placed between each statement when generating offline
          Oracle migrations.  Defaults to ``/``.  Oracle doesn't add a
          semicolon between statements like most other backends.
+        :param mysql_algorithm: The ``ALGORITHM`` to render with MySQL
+         ``ALTER TABLE``, ``CREATE INDEX`` and ``DROP INDEX`` statements
+         emitted by :meth:`.Operations.add_column`,
+         :meth:`.Operations.drop_column`, :meth:`.Operations.alter_column`,
+         :meth:`.Operations.create_index` and
+         :meth:`.Operations.drop_index`, e.g. ``"INSTANT"`` or
+         ``"INPLACE"``, where not given by the operation itself.  MySQL
+         raises an error for a statement that can't be performed using the
+         given algorithm, rather than choosing one that copies the table.
+        :param mysql_lock: The ``LOCK`` to render with the same statements,
+         e.g. ``"NONE"``, where not given by the operation itself.
+        :param mssql_online: When ``True``, render ``ONLINE = ON`` with
+         SQL Server ``CREATE INDEX`` and ``ALTER INDEX .. REBUILD``
+         statements emitted by :meth:`.Operations.create_index` and
+         :meth:`.Operations.rebuild_index`, where not given by the
+         operation itself as ``mssql_online``.
+        :param mssql_maxdop: The ``MAXDOP`` to render with the same
+         statements, where not given by the operation itself.
+        :param mssql_resumable: When ``True``, render ``RESUMABLE = ON``
+         with the same statements, where not given by the operation itself.
+        :param oracle_online: When ``True``, render ``ONLINE`` with Oracle
+         ``CREATE INDEX`` and ``ALTER INDEX .. REBUILD`` statements emitted
+         by :meth:`.Operations.create_index` and
+         :meth:`.Operations.rebuild_index`, where not given by the operation
+         itself as ``oracle_online``.
+        :param oracle_parallel: The degree of parallelism to render as
+         ``PARALLEL n`` with the same statements, where not given by the
+         operation itself.
 
         """
         opts = self.context_opts
@@ -789,10 +933,17 @@ class EnvironmentContext(util.ModuleClsProxy):
         if template_args and "template_args" in opts:
             opts["template_args"].update(template_args)
         opts["transaction_per_migration"] = transaction_per_migration
+        opts["migration_lock"] = migration_lock
+        opts["coalesce_alter_table"] = coalesce_alter_table
+        opts["lock_timeout"] = lock_timeout
+        opts["lock_timeout_retries"] = lock_timeout_retries
+        opts["lock_timeout_retry_interval"] = lock_timeout_retry_interval
         opts["target_metadata"] = target_metadata
         opts["include_symbol"] = include_symbol
         opts["include_object"] = include_object
         opts["include_schemas"] = include_schemas
+        opts["dedupe_schemas"] = dedupe_schemas
+        opts["profile_autogenerate"] = profile_autogenerate
         opts["render_as_batch"] = render_as_batch
         opts["upgrade_token"] = upgrade_token
         opts["downgrade_token"] = downgrade_token
@@ -0,0 +1,260 @@
+"""Pre-flight analysis of the impact of pending migrations."""
+
+from .. import util
+from ..operations import ops
+from ..operations.base import Operations
+from ..util.compat import StringIO
+
+METADATA_ONLY = "metadata-only"
+"""The operation changes only the catalog, and completes in a time
+independent of the size of the table."""
+
+INDEX_BUILD = "index build"
+"""The operation builds an index, reading every row of the table."""
+
+VALIDATION_SCAN = "validation scan"
+"""The operation reads every row of the table to check that a constraint
+is met, without rewriting it."""
+
+FULL_REWRITE = "full rewrite"
+"""The operation copies every row of the table to new storage."""
+
+UNCLASSIFIED = "unclassified"
+"""The impact of the operation can't be determined, as is the case for
+arbitrary SQL passed to :meth:`.Operations.execute`."""
+
+classifiers = util.Dispatcher()
+"""Dispatcher of functions which classify an operation as one of
+:data:`.METADATA_ONLY`, :data:`.INDEX_BUILD`, :data:`.VALIDATION_SCAN`,
+:data:`.FULL_REWRITE` or :data:`.UNCLASSIFIED`, keyed on the type of
+operation and optionally the dialect name.  Each function receives the
+:class:`.DefaultImpl` in use, whose dialect may provide the server version,
+and the :class:`.MigrateOperation`."""
+
+
+class OperationImpact(object):
+    """The classified impact of a single operation within an upgrade.
+
+    .. seealso::
+
+        :class:`.ImpactReport`
+
+    """
+
+    def __init__(self, operation, impact, table_name=None, schema=None):
+        self.operation = operation
+        self.impact = impact
+        self.table_name = table_name
+        self.schema = schema
+
+    revision = None
+    """The revision identifier of the migration which invokes the
+    operation."""
+
+    rows = None
+    """The approximate number of rows in the table as of the analysis, or
+    None if not known, such as when the table doesn't exist yet or no
+    database connection was available."""
+
+    size = None
+    """The approximate size of the table and its indexes in bytes as of the
+    analysis, or None if not known."""
+
+
+class ImpactReport(object):
+    """Classifies the operations which a range of migrations would invoke.
+
+    The migration steps are run in "offline" mode, as is the case for
+    ``alembic upgrade --sql``, so that nothing is emitted to the database;
+    each operation invoked is classified according to the dialect and,
+    where a database connection is available, its server version, as one
+    of :data:`.METADATA_ONLY`, :data:`.INDEX_BUILD`,
+    :data:`.VALIDATION_SCAN`, :data:`.FULL_REWRITE` or
+    :data:`.UNCLASSIFIED`.  Where the server version isn't known, the
+    classification errs towards the more expensive outcome.
+
+    An :class:`.ImpactReport` is normally produced by the
+    :func:`.command.impact` command.
+
+    """
+
+    def __init__(self):
+        self.impacts = []
+        self._pending = []
+
+    impacts = None
+    """A list of :class:`.OperationImpact` objects, in the order that the
+    operations would be invoked."""
+
+    def analyze(self, migration_context, fn):
+        """Run the migration steps returned by the given function, which
+        receives the current heads and a :class:`.MigrationContext` in the
+        same way as the ``fn`` argument to :class:`.EnvironmentContext`,
+        against an offline copy of the given :class:`.MigrationContext`,
+        recording the operations invoked by each step."""
+
+        heads = migration_context.get_current_heads()
+        opts = dict(migration_context.opts)
+        opts.update(
+            as_sql=True,
+            fn=fn,
+            output_buffer=StringIO(),
+            starting_rev=list(heads) or None,
+            on_version_apply=(self._end_step,),
+            impact_report=self,
+        )
+        opts.pop("output_encoding", None)
+        offline_context = migration_context.__class__(
+            migration_context.dialect, None, opts
+        )
+        with Operations.context(offline_context):
+            offline_context.run_migrations()
+
+    def record(self, migration_context, operation):
+        """Classify and record the given operation."""
+
+        classify = classifiers.dispatch(
+            operation, migration_context.impl.__dialect__
+        )
+        table_name, schema = _table_for_operation(operation)
+        self._pending.append(
+            OperationImpact(
+                operation,
+                classify(migration_context.impl, operation),
+                table_name=table_name,
+                schema=schema,
+            )
+        )
+
+    def _end_step(self, ctx, step, heads, run_args):
+        for impact in self._pending:
+            impact.revision = step.up_revision_id
+        self.impacts.extend(self._pending)
+        self._pending[:] = []
+
+    def annotate(self, migration_context):
+        """Annotate each recorded operation with the row count and size of
+        its table, using the connection of the given
+        :class:`.MigrationContext`."""
+
+        statistics = {}
+        for impact in self.impacts:
+            if impact.table_name is None:
+                continue
+            key = (impact.schema, impact.table_name)
+            if key not in statistics:
+                statistics[key] = migration_context.impl.table_statistics(
+                    impact.table_name, schema=impact.schema
+                )
+            impact.rows, impact.size = statistics[key]
+
+    def report(self):
+        """Return the recorded operations as a string suitable for
+        display."""
+
+        lines = ["Upgrade impact:"]
+        rows = [
+            (
+                impact.revision or "",
+                impact.operation.__class__.__name__,
+                "%s.%s" % (impact.schema, impact.table_name)
+                if impact.schema
+                else impact.table_name or "",
+                impact.impact,
+                "%d" % impact.rows if impact.rows is not None else "",
+                _format_size(impact.size),
+            )
+            for impact in self.impacts
+        ]
+        headings = ("revision", "operation", "table", "impact", "rows", "size")
+        widths = [
+            max([len(row[idx]) for row in rows] + [len(heading)])
+            for idx, heading in enumerate(headings)
+        ]
+        template = "  %-*s %-*s %-*s %-*s %*s %*s"
+        for row in [headings] + rows:
+            lines.append(
+                (
+                    template
+                    % tuple(
+                        elem
+                        for width, value in zip(widths, row)
+                        for elem in (width, value)
+                    )
+                ).rstrip()
+            )
+        if not rows:
+            lines.append("  No operations are pending.")
+        return "\n".join(lines)
+
+
+def _table_for_operation(operation):
+    if isinstance(operation, ops.CreateForeignKeyOp):
+        return operation.source_table, operation.kw.get("source_schema")
+    return (
+        getattr(operation, "table_name", None),
+        getattr(operation, "schema", None),
+    )
+
+
+def _format_size(size):
+    if size is None:
+        return ""
+    for unit in ("bytes", "kB", "MB", "GB"):
+        if size < 1024:
+            break
+        size /= 1024.0
+    else:
+        unit = "TB"
+    if unit == "bytes":
+        return "%d bytes" % size
+    return "%.1f %s" % (size, unit)
+
+
+@classifiers.dispatch_for(ops.MigrateOperation)
+def _unclassified(impl, operation):
+    return UNCLASSIFIED
+
+
+@classifiers.dispatch_for(ops.CreateTableOp)
+@classifiers.dispatch_for(ops.DropTableOp)
+@classifiers.dispatch_for(ops.RenameTableOp)
+@classifiers.dispatch_for(ops.CreateTableCommentOp)
+@classifiers.dispatch_for(ops.DropTableCommentOp)
+@classifiers.dispatch_for(ops.DropColumnOp)
+@classifiers.dispatch_for(ops.DropIndexOp)
+@classifiers.dispatch_for(ops.DropConstraintOp)
+def _metadata_only(impl, operation):
+    return METADATA_ONLY
+
+
+@classifiers.dispatch_for(ops.CreateIndexOp)
+@classifiers.dispatch_for(ops.RebuildIndexOp)
+@classifiers.dispatch_for(ops.CreatePrimaryKeyOp)
+@classifiers.dispatch_for(ops.CreateUniqueConstraintOp)
+def _index_build(impl, operation):
+    return INDEX_BUILD
+
+
+@classifiers.dispatch_for(ops.CreateForeignKeyOp)
+@classifiers.dispatch_for(ops.CreateCheckConstraintOp)
+def _validation_scan(impl, operation):
+    return VALIDATION_SCAN
+
+
+@classifiers.dispatch_for(ops.AddColumnOp)
+def _add_column(impl, operation):
+    if operation.column.server_default is None:
+        return METADATA_ONLY
+    else:
+        return FULL_REWRITE
+
+
+@classifiers.dispatch_for(ops.AlterColumnOp)
+def _alter_column(impl, operation):
+    if operation.modify_type is not None:
+        return FULL_REWRITE
+    elif operation.modify_nullable is False:
+        return VALIDATION_SCAN
+    else:
+        return METADATA_ONLY
@@ -14,6 +14,8 @@ from sqlalchemy.engine.strategies import MockEngineStrategy
 
 from .. import ddl
 from .. import util
+from ..ddl.impl import CachedStatement
+from ..util import compat
 from ..util import sqla_compat
 from ..util.compat import callable
 from ..util.compat import EncodedIO
@@ -22,8 +24,9 @@ log = logging.getLogger(__name__)
 
 
 class _ProxyTransaction(object):
-    def __init__(self, migration_context):
+    def __init__(self, migration_context, on_end=None):
         self.migration_context = migration_context
+        self.on_end = on_end
 
     @property
     def _proxied_transaction(self):
@@ -31,15 +34,26 @@ class _ProxyTransaction(object):
 
     def rollback(self):
         self._proxied_transaction.rollback()
+        self._ended()
 
     def commit(self):
         self._proxied_transaction.commit()
+        self._ended()
+
+    def _ended(self):
+        self.migration_context.impl._transaction_ended()
+        if self.on_end is not None:
+            on_end, self.on_end = self.on_end, None
+            on_end()
 
     def __enter__(self):
         return self
 
     def __exit__(self, type_, value, traceback):
-        self._proxied_transaction.__exit__(type_, value, traceback)
+        try:
+            self._proxied_transaction.__exit__(type_, value, traceback)
+        finally:
+            self._ended()
 
 
 class MigrationContext(object):
@@ -101,6 +115,10 @@ class MigrationContext(object):
         )
         self.on_version_apply_callbacks = opts.get("on_version_apply", ())
         self._transaction = None
+        self._transaction_block_depth = 0
+        self._held_migration_locks = []
+        self._batch_recreate_group = None
+        self._impact_report = opts.get("impact_report")
 
         if as_sql:
             self.connection = self._stdout_connection(connection)
@@ -143,6 +161,21 @@ class MigrationContext(object):
                 )
             )
 
+        migration_lock = opts.get("migration_lock", False)
+        if migration_lock is True:
+            migration_lock = "alembic:%s" % (
+                "%s.%s" % (version_table_schema, version_table)
+                if version_table_schema
+                else version_table
+            )
+        self._migration_lock = migration_lock
+        self._migration_lock_table = Table(
+            "%s_lock" % version_table,
+            MetaData(),
+            Column("lock_key", String(255), primary_key=True),
+            schema=version_table_schema,
+        )
+
         self._start_from_rev = opts.get("starting_rev")
         self.impl = ddl.DefaultImpl.get_by_dialect(dialect)(
             dialect,
@@ -271,12 +304,14 @@ class MigrationContext(object):
         if self.impl.transactional_ddl:
             if self.as_sql:
                 self.impl.emit_commit()
+                self.impl._transaction_ended()
 
             elif _in_connection_transaction:
                 assert self._transaction is not None
 
                 self._transaction.commit()
                 self._transaction = None
+                self.impl._transaction_ended()
 
         if not self.as_sql:
             current_level = self.connection.get_isolation_level()
@@ -292,6 +327,7 @@ class MigrationContext(object):
             if self.impl.transactional_ddl:
                 if self.as_sql:
                     self.impl.emit_begin()
+                    self.impl._transaction_begun()
 
                 elif _in_connection_transaction:
                     self._transaction = self.bind.begin()
@@ -339,11 +375,23 @@ class MigrationContext(object):
         """
         transaction_now = _per_migration == self._transaction_per_migration
 
+        if _per_migration:
+            on_end = None
+        else:
+            # a migration lock taken by run_migrations() within this
+            # block is held until the block ends
+            self._transaction_block_depth += 1
+            on_end = self._end_transaction_block
+
         if not transaction_now:
 
             @contextmanager
             def do_nothing():
-                yield
+                try:
+                    yield
+                finally:
+                    if on_end:
+                        on_end()
 
             return do_nothing()
 
@@ -351,21 +399,37 @@ class MigrationContext(object):
 
             @contextmanager
             def do_nothing():
-                yield
+                try:
+                    yield
+                finally:
+                    if on_end:
+                        on_end()
 
             return do_nothing()
         elif self.as_sql:
 
             @contextmanager
             def begin_commit():
-                self.impl.emit_begin()
-                yield
-                self.impl.emit_commit()
+                try:
+                    self.impl.emit_begin()
+                    self.impl._transaction_begun()
+                    yield
+                    self.impl.emit_commit()
+                    self.impl._transaction_ended()
+                finally:
+                    if on_end:
+                        on_end()
 
             return begin_commit()
         else:
             self._transaction = self.bind.begin()
-            return _ProxyTransaction(self)
+            return _ProxyTransaction(self, on_end)
+
+    def _end_transaction_block(self):
+        self._transaction_block_depth -= 1
+        if not self._transaction_block_depth:
+            while self._held_migration_locks:
+                self._held_migration_locks.pop().__exit__(None, None, None)
 
     def get_current_revision(self):
         """Return the current revision, usually that which is present
@@ -486,7 +550,48 @@ class MigrationContext(object):
          migration callable, that is the ``upgrade()`` or ``downgrade()``
          method within revision scripts.
 
+        When the :paramref:`.EnvironmentContext.configure.migration_lock`
+        option is set, a lock is acquired before the current revision of
+        the database is read, so that of several processes running
+        migrations at once, all but the first find that the database is
+        already current once they acquire the lock.  Within a
+        :meth:`.MigrationContext.begin_transaction` block, the lock is
+        released only once the block ends, that is after the transaction
+        it demarcates has been committed or rolled back.
+
         """
+        try:
+            if self._migration_lock and not self.as_sql:
+                self._run_migrations_locked(kw)
+            else:
+                self._run_migrations(kw)
+        except BaseException:
+            exc_info = sys.exc_info()
+            try:
+                self.impl.reset_lock_timeout()
+            except Exception:
+                # the connection may be unusable following the error
+                log.warning("Failed to reset the lock timeout", exc_info=True)
+            compat.reraise(*exc_info)
+        else:
+            self.impl.reset_lock_timeout()
+
+    def _run_migrations_locked(self, kw):
+        log.info("Acquiring migration lock %r", self._migration_lock)
+        lock = self.impl.migration_lock(
+            self._migration_lock, self._migration_lock_table
+        )
+        lock.__enter__()
+        log.info("Acquired migration lock")
+        try:
+            self._run_migrations(kw)
+        finally:
+            if self._transaction_block_depth:
+                self._held_migration_locks.append(lock)
+            else:
+                lock.__exit__(None, None, None)
+
+    def _run_migrations(self, kw):
         self.impl.start_migrations()
 
         if self.purge:
@@ -509,6 +614,8 @@ class MigrationContext(object):
         )
 
         for step in self._migrations_fn(heads, self):
+            if self.as_sql:
+                self.impl.output_revision = step.info.up_revision_id
             with self.begin_transaction(_per_migration=True):
                 if self.as_sql and not head_maintainer.heads:
                     # for offline mode, include a CREATE TABLE from
@@ -517,9 +624,10 @@ class MigrationContext(object):
                 log.info("Running %s", step)
                 if self.as_sql:
                     self.impl.static_output(
-                        "-- Running %s" % (step.short_log,)
+                        "-- Running %s" % (step.short_log,), "comment"
                     )
                 step.migration_fn(**kw)
+                self.impl.flush_alter_table()
 
                 # previously, we wouldn't stamp per migration
                 # if we were in a transaction, however given the more
@@ -534,6 +642,7 @@ class MigrationContext(object):
                         heads=set(head_maintainer.heads),
                         run_args=kw,
                     )
+            self.impl.output_revision = None
 
             if (
                 not starting_in_transaction
@@ -666,18 +775,22 @@ class HeadMaintainer(object):
         self.heads.add(version)
 
         self.context.impl._exec(
-            self.context._version.insert().values(
-                version_num=literal_column("'%s'" % version)
+            CachedStatement(
+                ("version", "insert"), self._insert_construct, to_=version
             )
         )
 
+    def _insert_construct(self, to_):
+        return self.context._version.insert().values(
+            version_num=literal_column("'%s'" % to_)
+        )
+
     def _delete_version(self, version):
         self.heads.remove(version)
 
         ret = self.context.impl._exec(
-            self.context._version.delete().where(
-                self.context._version.c.version_num
-                == literal_column("'%s'" % version)
+            CachedStatement(
+                ("version", "delete"), self._delete_construct, from_=version
             )
         )
         if (
@@ -692,17 +805,23 @@ class HeadMaintainer(object):
                 % (version, self.context.version_table, ret.rowcount)
             )
 
+    def _delete_construct(self, from_):
+        return self.context._version.delete().where(
+            self.context._version.c.version_num
+            == literal_column("'%s'" % from_)
+        )
+
     def _update_version(self, from_, to_):
         assert to_ not in self.heads
         self.heads.remove(from_)
         self.heads.add(to_)
 
         ret = self.context.impl._exec(
-            self.context._version.update()
-            .values(version_num=literal_column("'%s'" % to_))
-            .where(
-                self.context._version.c.version_num
-                == literal_column("'%s'" % from_)
+            CachedStatement(
+                ("version", "update"),
+                self._update_construct,
+                from_=from_,
+                to_=to_,
             )
         )
         if (
@@ -717,6 +836,16 @@ class HeadMaintainer(object):
                 % (from_, to_, self.context.version_table, ret.rowcount)
             )
 
+    def _update_construct(self, from_, to_):
+        return (
+            self.context._version.update()
+            .values(version_num=literal_column("'%s'" % to_))
+            .where(
+                self.context._version.c.version_num
+                == literal_column("'%s'" % from_)
+            )
+        )
+
     def update_to_step(self, step):
         if step.should_delete_branch(self.heads):
             vers = step.delete_version_num
@@ -0,0 +1,249 @@
+"""Structured output of the SQL generated in "offline" mode, as a stream of
+statements or as a file per revision."""
+
+import io
+import os
+import sys
+import threading
+
+from .. import command
+from ..util import compat
+
+DDL = "ddl"
+"""A schema statement, such as ``CREATE TABLE`` or ``ALTER TABLE``."""
+
+DML = "dml"
+"""An ``INSERT``, ``UPDATE`` or ``DELETE`` statement."""
+
+VERSION = "version"
+"""A statement against the version table, which creates or drops the table
+or records the revision reached."""
+
+TRANSACTION = "transaction"
+"""A statement which begins or commits a transaction."""
+
+COMMENT = "comment"
+"""A comment, such as the ``-- Running`` line which precedes the
+statements of each revision."""
+
+SEPARATOR = "separator"
+"""A batch separator, such as ``GO`` on SQL Server."""
+
+OTHER = "other"
+"""Any other text, such as a textual statement passed to
+:meth:`.Operations.execute` or text passed to
+:meth:`.EnvironmentContext.static_output`."""
+
+
+class OfflineStatement(object):
+    """A single statement generated in "offline" mode.
+
+    .. seealso::
+
+        :func:`.iter_statements`
+
+    """
+
+    def __init__(self, revision, text, kind):
+        self.revision = revision
+        self.text = text
+        self.kind = kind
+
+    revision = None
+    """The identifier of the revision whose migration generated the
+    statement, or None for a statement outside of any migration, such as
+    a ``COMMIT`` following all of them."""
+
+    text = None
+    """The text of the statement, including its terminator."""
+
+    kind = None
+    """One of :data:`.DDL`, :data:`.DML`, :data:`.VERSION`,
+    :data:`.TRANSACTION`, :data:`.COMMENT`, :data:`.SEPARATOR` or
+    :data:`.OTHER`."""
+
+    def __repr__(self):
+        return "OfflineStatement(%r, %r, %r)" % (
+            self.revision,
+            self.text,
+            self.kind,
+        )
+
+
+def iter_statements(
+    config, revision, downgrade=False, tag=None, buffer_size=1000
+):
+    """Generate the SQL of an upgrade or downgrade in "offline" mode,
+    yielding an :class:`.OfflineStatement` for each statement as it is
+    generated.
+
+    E.g.::
+
+        from alembic.runtime.offline import iter_statements
+
+        for statement in iter_statements(config, "ae1027a6acf:head"):
+            if statement.kind == "ddl":
+                review(statement.revision, statement.text)
+
+    The migrations are run, as for ``alembic upgrade --sql``, within a
+    separate thread, which is paused once ``buffer_size`` statements are
+    waiting to be consumed, so that no more than that number of statements
+    are held in memory at once.  Exceptions raised within the thread are
+    raised by the generator; if the generator is closed before it's
+    exhausted, the migrations are stopped.  No other migrations may be run
+    within the process while the generator is in progress.
+
+    :param config: a :class:`.Config` instance.
+
+    :param revision: string revision target, or range ``<fromrev>:<torev>``,
+     as would be passed to :func:`.command.upgrade` or
+     :func:`.command.downgrade` with ``--sql``.
+
+    :param downgrade: if True, generate the SQL of a downgrade.
+
+    :param tag: an arbitrary "tag" that can be intercepted by custom
+     ``env.py`` scripts via the :meth:`.EnvironmentContext.get_tag_argument`
+     method.
+
+    :param buffer_size: number of statements which may be generated ahead
+     of those consumed.
+
+    """
+
+    writer = _QueueWriter(buffer_size)
+    thread = threading.Thread(
+        target=writer.run,
+        args=(
+            command._downgrade if downgrade else command._upgrade,
+            config,
+            revision,
+            tag,
+        ),
+    )
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            statement = writer.queue.get()
+            if statement is None:
+                break
+            yield statement
+    finally:
+        writer.cancelled = True
+        thread.join()
+    if writer.exc_info is not None:
+        compat.reraise(*writer.exc_info)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _QueueWriter(object):
+    def __init__(self, buffer_size):
+        self.queue = compat.queue.Queue(buffer_size)
+        self.cancelled = False
+        self.exc_info = None
+
+    def _put(self, item):
+        while not self.cancelled:
+            try:
+                self.queue.put(item, timeout=0.1)
+            except compat.queue.Full:
+                continue
+            else:
+                return
+        raise _Cancelled()
+
+    def write_statement(self, revision, text, kind):
+        self._put(OfflineStatement(revision, text, kind))
+
+    def run(self, fn, config, revision, tag):
+        try:
+            fn(config, revision, True, tag, statement_writer=self)
+        except _Cancelled:
+            return
+        except BaseException:
+            self.exc_info = sys.exc_info()
+        try:
+            self._put(None)
+        except _Cancelled:
+            pass
+
+
+class RevisionFileWriter(object):
+    """Write the SQL generated in "offline" mode to a separate file for each
+    revision within a directory, as is done by ``alembic upgrade --sql``
+    given ``--output-dir``.
+
+    Each file is written through a buffer of ``buffer_size`` bytes, and is
+    closed once the statements of its revision are complete, so that
+    scripts of any size are written without being held in memory.  The
+    files are numbered in the order they're written, and are named for
+    their revision, e.g. ``0001_ae1027a6acf.sql``; statements outside of
+    any migration, such as a ``BEGIN`` and ``COMMIT`` surrounding all of
+    them when ``transaction_per_migration`` isn't set, are written to
+    files named for their number only, e.g. ``0004.sql``.  The files are
+    therefore to be run in order of their names.  Files of the same name
+    already present in the directory are overwritten.
+
+    :param directory: directory into which files are written, which is
+     created if not present.
+
+    :param encoding: encoding of the files.
+
+    :param buffer_size: size of the buffer of each file in bytes.
+
+    """
+
+    def __init__(self, directory, encoding="utf-8", buffer_size=1 << 20):
+        self.directory = directory
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.filenames = []
+        self._file = None
+        self._revision = None
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    filenames = None
+    """The names of the files written, in order."""
+
+    def write_statement(self, revision, text, kind):
+        """Write the given statement to the file of its revision."""
+
+        if self._file is None or revision != self._revision:
+            self._open(revision)
+        self._file.write(text + "\n\n")
+
+    def _open(self, revision):
+        self._close_file()
+        number = len(self.filenames) + 1
+        if revision is None:
+            filename = "%04d.sql" % number
+        else:
+            filename = "%04d_%s.sql" % (number, revision)
+        self._file = io.open(
+            os.path.join(self.directory, filename),
+            "w",
+            encoding=self.encoding,
+            buffering=self.buffer_size,
+        )
+        self._revision = revision
+        self.filenames.append(filename)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Close the file being written."""
+
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *arg):
+        self.close()
@@ -0,0 +1,317 @@
+"""A long-running process answering Alembic commands over a Unix socket,
+holding the configuration, revisions and ``env.py`` loaded between
+requests."""
+
+import json
+import os
+import socket
+import threading
+
+from .. import command
+from .. import util
+from ..script import Script
+from ..script.revision import RevisionError
+from ..util import compat
+
+_commands = {
+    "heads": (command.heads, (), ("verbose", "resolve_dependencies")),
+    "current": (command.current, (), ("verbose",)),
+    "history": (
+        command.history,
+        (),
+        ("rev_range", "verbose", "indicate_current"),
+    ),
+    "show": (command.show, ("rev",), ()),
+    "upgrade": (command.upgrade, ("revision",), ("sql", "tag")),
+}
+
+
+class AlembicServer(object):
+    """Answer Alembic commands sent over a Unix socket, keeping the
+    :class:`.Config`, the :class:`.ScriptDirectory` with its
+    :class:`.RevisionMap` and the compiled ``env.py`` loaded between
+    requests, so that each request doesn't pay for starting the
+    interpreter and loading the revision history.
+
+    E.g.::
+
+        from alembic.runtime.server import AlembicServer
+
+        server = AlembicServer(Config("alembic.ini"), "/tmp/alembic.sock")
+        try:
+            server.serve_forever()
+        finally:
+            server.close()
+
+    An :class:`.AlembicServer` is normally run by the :func:`.command.serve`
+    command.  Requests are sent using :func:`.send_request`.
+
+    Each request is a JSON object on a single line, naming the command
+    along with its arguments::
+
+        {"command": "history", "rev_range": "base:head", "verbose": true}
+
+    The commands ``heads``, ``current``, ``history``, ``show`` and
+    ``upgrade`` are supported, taking the arguments of the command
+    functions of the same name; ``upgrade`` is supported only with
+    ``"sql": true``.  Each response is a JSON object on a single line, either
+    ``{"status": "ok", "output": "..."}``, where ``output`` is the text
+    the command would have written to standard output, or
+    ``{"status": "error", "error": "..."}``.  Each connection is served by
+    its own thread, so that a client which keeps its connection open
+    doesn't hold up others, and any number of requests may be sent over
+    one connection; the requests of all connections are answered one at
+    a time.
+
+    Before each request, the version locations and ``env.py`` are checked
+    for changes.  Revision files which have been added are loaded and
+    added to the revision map using :meth:`.RevisionMap.add_revision`;
+    if any have been modified or removed, the revisions are loaded again.
+
+    :param config: a :class:`.Config` instance.
+
+    :param socket_path: path of the Unix socket on which to listen.  A
+     stale socket file left by a server which is no longer running is
+     replaced.
+
+    :param engine: optional :class:`~sqlalchemy.engine.Engine` from which
+     a connection is placed in :attr:`.Config.attributes` under the key
+     ``"connection"`` for each request which runs ``env.py`` against the
+     database, that is ``current`` and ``history`` with
+     ``indicate_current``, so that connections are pooled between
+     requests; ``env.py`` must make use of it, as described at
+     :ref:`connection_sharing`.
+
+    """
+
+    def __init__(self, config, socket_path, engine=None):
+        if not hasattr(socket, "AF_UNIX"):
+            raise util.CommandError(
+                "Unix sockets aren't supported on this platform"
+            )
+        self.config = config
+        self.socket_path = socket_path
+        self.engine = engine
+        self.session = command.MigrationSession(config)
+        self._lock = threading.Lock()
+        self._files = self._scan()
+        # load the revisions up front rather than on the first request
+        self.session.script.revision_map.heads
+        self._remove_stale_socket()
+        self._server = _UnixServer(socket_path, _RequestHandler)
+        self._server.alembic_server = self
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except socket.error:
+            os.remove(self.socket_path)
+        else:
+            raise util.CommandError(
+                "A server is already listening on %s" % self.socket_path
+            )
+        finally:
+            sock.close()
+
+    def serve_forever(self):
+        """Answer requests until :meth:`.shutdown` is called."""
+
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop :meth:`.serve_forever`, from another thread."""
+
+        self._server.shutdown()
+
+    def close(self):
+        """Close the socket and remove the socket file."""
+
+        self._server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def handle_request(self, request):
+        """Answer a single request, given and returned as a dictionary.
+
+        Requests are answered one at a time, whichever thread they're
+        received by.
+
+        """
+
+        with self._lock:
+            try:
+                self.refresh()
+                return {"status": "ok", "output": self._run(request)}
+            except util.CommandError as err:
+                return {"status": "error", "error": str(err)}
+            except Exception as err:
+                return {
+                    "status": "error",
+                    "error": "%s: %s" % (err.__class__.__name__, err),
+                }
+
+    def _run(self, request):
+        if not isinstance(request, dict) or "command" not in request:
+            raise util.CommandError("Request must be an object with a command")
+        request = dict(request)
+        name = request.pop("command")
+        if name not in _commands:
+            raise util.CommandError("Unsupported command %r" % (name,))
+        fn, positional, optional = _commands[name]
+        for arg in positional:
+            if arg not in request:
+                raise util.CommandError(
+                    "Command %r requires argument %r" % (name, arg)
+                )
+        unknown = set(request).difference(positional, optional)
+        if unknown:
+            raise util.CommandError(
+                "Unknown argument(s) for command %r: %s"
+                % (name, ", ".join(sorted(unknown)))
+            )
+        if fn is command.upgrade and not request.get("sql"):
+            raise util.CommandError("Only upgrade with sql is supported")
+
+        output = _Output()
+        stdout, output_buffer = self.config.stdout, self.config.output_buffer
+        self.config.stdout = self.config.output_buffer = output
+        try:
+            if self.engine is not None and (
+                fn is command.current or request.get("indicate_current")
+            ):
+                with self.engine.connect() as connection:
+                    self.config.attributes["connection"] = connection
+                    try:
+                        self.session.run(fn, **request)
+                    finally:
+                        del self.config.attributes["connection"]
+            else:
+                self.session.run(fn, **request)
+        finally:
+            self.config.stdout, self.config.output_buffer = (
+                stdout,
+                output_buffer,
+            )
+        return output.getvalue()
+
+    def _scan(self):
+        script = self.session.script
+        files = {}
+        for vers, file_ in script._revision_files():
+            path = os.path.join(vers, file_)
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime, stat.st_size)
+        if os.path.exists(script.env_py_location):
+            stat = os.stat(script.env_py_location)
+            files[script.env_py_location] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def refresh(self):
+        """Bring the revision map and ``env.py`` up to date with changes
+        to the files; this is called before each request."""
+
+        script = self.session.script
+        files = self._scan()
+        previous, self._files = self._files, files
+        if files == previous:
+            return
+
+        env_py = script.env_py_location
+        if files.get(env_py) != previous.get(env_py):
+            script._compile_env()
+
+        added = [path for path in files if path not in previous]
+        if any(
+            files.get(path) != stat
+            for path, stat in previous.items()
+            if path != env_py
+        ):
+            self.session.refresh()
+            return
+
+        # an unloaded map will include the new files once it is loaded
+        revision_map = script.revision_map
+        if "_revision_map" not in revision_map.__dict__:
+            return
+        map_ = revision_map._revision_map
+        try:
+            for path in sorted(added):
+                if path == env_py:
+                    continue
+                rev = Script._from_path(script, path)
+                if rev is None:
+                    continue
+                if rev.revision in map_ or any(
+                    downrev not in map_ for downrev in rev._all_down_revisions
+                ):
+                    # loading the map again reports or resolves these
+                    self.session.refresh()
+                    return
+                revision_map.add_revision(rev)
+        except RevisionError:
+            self.session.refresh()
+
+
+def send_request(socket_path, command_name, **kw):
+    """Send a request to an :class:`.AlembicServer`, returning the output
+    of the command, or raising :class:`.CommandError` with the error it
+    reported.
+
+    E.g.::
+
+        from alembic.runtime.server import send_request
+
+        heads = send_request("/tmp/alembic.sock", "heads", verbose=True)
+
+    """
+
+    request = dict(kw, command=command_name)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        stream = sock.makefile("rwb")
+        try:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            response = json.loads(stream.readline().decode("utf-8"))
+        finally:
+            stream.close()
+    finally:
+        sock.close()
+    if response["status"] != "ok":
+        raise util.CommandError(response["error"])
+    return response["output"]
+
+
+class _Output(compat.StringIO):
+    # read by util.write_outstream, so that non-ascii text is retained
+    encoding = "utf-8"
+
+
+class _UnixServer(
+    compat.socketserver.ThreadingMixIn, compat.socketserver.UnixStreamServer
+):
+    # threads of connections left open don't prevent the process exiting
+    daemon_threads = True
+    alembic_server = None
+
+
+class _RequestHandler(compat.socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in iter(self.rfile.readline, b""):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode("utf-8"))
+            except ValueError as err:
+                response = {
+                    "status": "error",
+                    "error": "Invalid request: %s" % err,
+                }
+            else:
+                response = self.server.alembic_server.handle_request(request)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
@@ -0,0 +1,379 @@
+"""Snapshots of a database at checkpoint revisions, allowing the state of
+the database at a revision to be restored without running migrations."""
+
+import copy
+import hashlib
+import os
+import shutil
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy import MetaData
+from sqlalchemy import pool
+from sqlalchemy import text
+
+from .. import command
+from .. import util
+from ..script import ScriptDirectory
+
+
+class DatabaseSnapshots(object):
+    """Migrate a database to a series of checkpoint revisions once,
+    snapshotting the database at each, so that the state of the database
+    at any checkpoint may be restored quickly, such as before each test
+    which requires it.
+
+    E.g.::
+
+        from alembic.runtime.snapshot import DatabaseSnapshots
+
+        snapshots = DatabaseSnapshots(
+            config, engine, checkpoints=["ae1027a6acf", "head"]
+        )
+        snapshots.create()
+
+        # within each test
+        snapshots.restore("ae1027a6acf")
+
+    Each snapshot is keyed on a hash of the revision identifier and of the
+    contents of the revision files leading up to it, along with ``env.py``,
+    so that when a migration changes, the snapshots which include it are no
+    longer used and are created again by :meth:`.create`.
+
+    The means of snapshotting depends on the database:
+
+    * PostgreSQL - each snapshot is a database created using
+      ``CREATE DATABASE ... TEMPLATE``, and is restored by recreating the
+      database from it.  Snapshots persist between processes.  No other
+      connections to the database may be open when snapshots are created
+      or restored.
+
+    * SQLite - each snapshot is a file copied using the SQLite backup API,
+      placed within ``snapshot_dir``, which defaults to the directory of the
+      database file.  Snapshots persist between processes.
+
+    * Other databases - the tables and their rows are copied into memory
+      using reflection, and are restored by dropping and recreating the
+      tables.  Snapshots persist only for the lifespan of the
+      :class:`.DatabaseSnapshots` object.
+
+    Migrations are run using :func:`.command.upgrade`, with a connection
+    from the given engine placed in :attr:`.Config.attributes` under the key
+    ``"connection"``, which ``env.py`` may make use of as described at
+    :ref:`connection_sharing`.  Unless an earlier checkpoint has a snapshot
+    to restore, the database is emptied before migrations are run by
+    :meth:`.create`, as it may be at any revision following an earlier run.
+    Snapshots of earlier runs remain present until removed using
+    :meth:`.drop`.
+
+    :param config: a :class:`.Config` instance.
+
+    :param engine: an :class:`~sqlalchemy.engine.Engine` for the database
+     which is migrated and restored.
+
+    :param checkpoints: revision identifiers, in order from oldest to
+     newest, at which to snapshot the database.  Each must resolve to a
+     single revision; ``"base"`` refers to the database with no migrations
+     run.
+
+    :param snapshot_dir: directory in which SQLite snapshot files are
+     placed.
+
+    """
+
+    def __init__(
+        self, config, engine, checkpoints=("head",), snapshot_dir=None
+    ):
+        self.config = config
+        self.engine = engine
+        self.checkpoints = list(checkpoints)
+        self.script = ScriptDirectory.from_config(config)
+        self._backend = _backends.get(engine.dialect.name, _ReflectionBackend)(
+            engine, snapshot_dir
+        )
+
+    def fingerprint(self, revision):
+        """Return the hash which identifies the snapshot of the given
+        revision."""
+
+        digest = hashlib.sha1()
+        if revision != "base":
+            script = self.script.get_revision(revision)
+            if script is None:
+                raise util.CommandError(
+                    "Checkpoint %r doesn't refer to a single revision"
+                    % (revision,)
+                )
+            ancestors = self.script.revision_map._get_ancestor_nodes([script])
+            for rev in sorted(ancestors, key=lambda rev: rev.revision):
+                digest.update(rev.revision.encode("ascii"))
+                if rev.path is not None:
+                    with open(rev.path, "rb") as file_:
+                        digest.update(file_.read())
+        if self.script.dir is not None and os.path.exists(
+            self.script.env_py_location
+        ):
+            with open(self.script.env_py_location, "rb") as file_:
+                digest.update(file_.read())
+        return digest.hexdigest()[:16]
+
+    def create(self):
+        """Migrate the database to each checkpoint in turn, snapshotting
+        it at each.
+
+        Checkpoints which already have an up to date snapshot are skipped,
+        restoring the snapshot where later checkpoints need to be created,
+        so that if all snapshots are present no migrations are run.  Where
+        no earlier snapshot is present, the database is emptied before the
+        first snapshot is created.
+
+        """
+        latest = None
+        migrating = False
+        for revision in self.checkpoints:
+            key = self.fingerprint(revision)
+            if self._backend.exists(key):
+                latest = key
+                continue
+            if latest is not None:
+                self._backend.restore(latest, self.engine)
+                latest = None
+            elif not migrating:
+                # the database may be at a later checkpoint from an earlier
+                # run, which would otherwise be snapshotted as this one
+                self._backend.reset(self.engine)
+            migrating = True
+            if revision != "base":
+                self._upgrade(revision)
+            self._backend.snapshot(key)
+
+    def restore(self, revision, engine=None):
+        """Restore the database to its state at the given checkpoint.
+
+        :param engine: optional :class:`~sqlalchemy.engine.Engine` for
+         another database of the same kind, on the same server in the case
+         of PostgreSQL, into which the snapshot is restored in place of the
+         snapshotted database.
+
+        """
+
+        key = self.fingerprint(revision)
+        if not self._backend.exists(key):
+            raise util.CommandError(
+                "No snapshot of revision %r is present; call create() first"
+                % (revision,)
+            )
+        self._backend.restore(
+            key, engine if engine is not None else self.engine
+        )
+
+    def drop(self):
+        """Remove all snapshots of the database, including those of
+        earlier runs which are no longer current; on PostgreSQL, these are
+        the databases which snapshots are created from."""
+
+        self._backend.drop_all()
+
+    def _upgrade(self, revision):
+        attributes = self.config.attributes
+        previous = attributes.get("connection")
+        with self.engine.connect() as connection:
+            attributes["connection"] = connection
+            try:
+                command.upgrade(self.config, revision)
+            finally:
+                if previous is not None:
+                    attributes["connection"] = previous
+                else:
+                    del attributes["connection"]
+        self.engine.dispose()
+
+
+class _ReflectionBackend(object):
+    def __init__(self, engine, snapshot_dir):
+        self.engine = engine
+        self.snapshots = {}
+
+    def exists(self, key):
+        return key in self.snapshots
+
+    def snapshot(self, key):
+        metadata = MetaData()
+        rows = {}
+        with self.engine.connect() as connection:
+            metadata.reflect(connection)
+            for table in metadata.sorted_tables:
+                rows[table.name] = [
+                    dict(row) for row in connection.execute(table.select())
+                ]
+        self.snapshots[key] = metadata, rows
+
+    def reset(self, engine):
+        current = MetaData()
+        with engine.begin() as connection:
+            current.reflect(connection)
+            current.drop_all(connection)
+
+    def restore(self, key, engine):
+        metadata, rows = self.snapshots[key]
+        self.reset(engine)
+        with engine.begin() as connection:
+            metadata.create_all(connection)
+            for table in metadata.sorted_tables:
+                if rows[table.name]:
+                    connection.execute(table.insert(), rows[table.name])
+
+    def drop_all(self):
+        self.snapshots.clear()
+
+
+class _SQLiteBackend(object):
+    def __init__(self, engine, snapshot_dir):
+        self.engine = engine
+        self.database = self._database(engine)
+        self.snapshot_dir = snapshot_dir or os.path.dirname(self.database)
+
+    def _path(self, key):
+        return os.path.join(
+            self.snapshot_dir,
+            "%s.%s.snapshot" % (os.path.basename(self.database), key),
+        )
+
+    def _database(self, engine):
+        database = engine.url.database
+        if not database or database == ":memory:":
+            raise util.CommandError(
+                "Snapshots of a SQLite database require a database file"
+            )
+        return os.path.abspath(database)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def _copy(self, source, dest):
+        if hasattr(sqlite3.Connection, "backup"):
+            source_conn = sqlite3.connect(source)
+            dest_conn = sqlite3.connect(dest)
+            try:
+                source_conn.backup(dest_conn)
+            finally:
+                dest_conn.close()
+                source_conn.close()
+        else:
+            shutil.copyfile(source, dest)
+
+    def snapshot(self, key):
+        self.engine.dispose()
+        self._copy(self.database, self._path(key))
+
+    def reset(self, engine):
+        engine.dispose()
+        database = self._database(engine)
+        if not os.path.exists(database):
+            return
+        if hasattr(sqlite3.Connection, "backup"):
+            # overwritten with an empty database, which takes care of any
+            # journal present as well
+            source_conn = sqlite3.connect(":memory:")
+            dest_conn = sqlite3.connect(database)
+            try:
+                source_conn.backup(dest_conn)
+            finally:
+                dest_conn.close()
+                source_conn.close()
+        else:
+            os.remove(database)
+
+    def restore(self, key, engine):
+        engine.dispose()
+        self._copy(self._path(key), self._database(engine))
+
+    def drop_all(self):
+        prefix = "%s." % os.path.basename(self.database)
+        for fname in os.listdir(self.snapshot_dir):
+            if fname.startswith(prefix) and fname.endswith(".snapshot"):
+                os.remove(os.path.join(self.snapshot_dir, fname))
+
+
+class _PostgresqlBackend(object):
+    def __init__(self, engine, snapshot_dir):
+        self.engine = engine
+        self.database = engine.url.database
+        url = copy.copy(engine.url)
+        if hasattr(url, "set"):
+            url = url.set(database="postgres")
+        else:
+            url.database = "postgres"
+        self.maintenance_engine = create_engine(
+            url, poolclass=pool.NullPool, isolation_level="AUTOCOMMIT"
+        )
+
+    def _name(self, key):
+        # database names are limited to 63 characters
+        return "%s%s" % (self._prefix, key)
+
+    @property
+    def _prefix(self):
+        return "%s_snap_" % self.database[:40]
+
+    def _quote(self, name):
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def exists(self, key):
+        with self.maintenance_engine.connect() as connection:
+            return (
+                connection.scalar(
+                    text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                    name=self._name(key),
+                )
+                is not None
+            )
+
+    def _create_from(self, name, template):
+        with self.maintenance_engine.connect() as connection:
+            connection.execute(
+                "CREATE DATABASE %s TEMPLATE %s"
+                % (self._quote(name), self._quote(template))
+            )
+
+    def snapshot(self, key):
+        self.engine.dispose()
+        self._create_from(self._name(key), self.database)
+
+    def _drop(self, name):
+        with self.maintenance_engine.connect() as connection:
+            connection.execute(
+                "DROP DATABASE IF EXISTS %s" % self._quote(name)
+            )
+
+    def reset(self, engine):
+        engine.dispose()
+        database = engine.url.database
+        self._drop(database)
+        with self.maintenance_engine.connect() as connection:
+            connection.execute("CREATE DATABASE %s" % self._quote(database))
+
+    def restore(self, key, engine):
+        engine.dispose()
+        database = engine.url.database
+        self._drop(database)
+        self._create_from(database, self._name(key))
+
+    def drop_all(self):
+        with self.maintenance_engine.connect() as connection:
+            names = [
+                row[0]
+                for row in connection.execute(
+                    text(
+                        "SELECT datname FROM pg_database "
+                        "WHERE left(datname, :length) = :prefix"
+                    ),
+                    length=len(self._prefix),
+                    prefix=self._prefix,
+                )
+            ]
+        for name in names:
+            self._drop(name)
+
+
+_backends = {"sqlite": _SQLiteBackend, "postgresql": _PostgresqlBackend}
@@ -0,0 +1,286 @@
+"""Verification of each revision by an upgrade, downgrade and upgrade
+round trip, with segments of the revision history verified in parallel."""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy import pool
+
+from .snapshot import DatabaseSnapshots
+from .. import command
+from .. import util
+from ..config import Config
+from ..script import ScriptDirectory
+
+PASSED = "passed"
+"""The revision completed its round trip."""
+
+FAILED = "failed"
+"""An error was raised during the round trip of the revision."""
+
+SKIPPED = "skipped"
+"""The revision wasn't verified, as an earlier revision within the same
+segment failed."""
+
+
+class RevisionResult(object):
+    """The outcome of the round trip of a single revision."""
+
+    def __init__(self, revision, status, duration=None, error=None):
+        self.revision = revision
+        self.status = status
+        self.duration = duration
+        self.error = error
+
+    revision = None
+    """The revision identifier."""
+
+    status = None
+    """One of :data:`.PASSED`, :data:`.FAILED` or :data:`.SKIPPED`."""
+
+    duration = None
+    """The time taken by the round trip in seconds, or None if skipped."""
+
+    error = None
+    """A description of the error raised, if failed."""
+
+
+class Stairway(object):
+    """Verify each revision with an upgrade, a downgrade by one step and
+    an upgrade again, in the manner of a "stairway" test.
+
+    The revisions are taken in order from the base to the heads, and split
+    into segments, each verified by a worker process against its own
+    scratch database.  The database for each segment is restored from a
+    snapshot, taken using :class:`.DatabaseSnapshots`, of a seed database
+    migrated to the revision preceding the segment, so that no worker
+    needs to run the migrations of earlier segments.
+
+    A :class:`.Stairway` is normally run by the :func:`.command.stairway`
+    command.
+
+    :param config: a :class:`.Config` instance.  Worker processes load
+     the configuration again from :attr:`.Config.config_file_name`, so
+     :attr:`.Config.attributes` aren't available to ``env.py`` within them.
+
+    :param workers: number of worker processes; defaults to the number of
+     CPUs.  When 1, or when the :class:`.Config` has no file, segments are
+     verified serially within the current process.
+
+    :param segments: number of segments; defaults to ``workers``.
+
+    :param scratch_url: database URL of the scratch databases, including
+     the token ``%(name)s``, which is replaced by ``seed`` for the seed
+     database and by ``segment<n>`` for the database of each segment.
+     SQLite and PostgreSQL are supported; for PostgreSQL, the seed database
+     must exist.  Defaults to SQLite files in a temporary directory.
+
+    """
+
+    def __init__(self, config, workers=None, segments=None, scratch_url=None):
+        self.config = config
+        self.workers = workers or multiprocessing.cpu_count()
+        if config.config_file_name is None:
+            self.workers = 1
+        self.segments = segments or self.workers
+        self.scratch_url = scratch_url
+        self.results = []
+
+    results = None
+    """A list of :class:`.RevisionResult` objects, in order from the base
+    revision to the heads, populated by :meth:`.run`."""
+
+    def run(self):
+        """Verify the revisions, returning the list of
+        :class:`.RevisionResult` objects."""
+
+        script = ScriptDirectory.from_config(self.config)
+        revisions = [
+            rev.revision for rev in reversed(list(script.walk_revisions()))
+        ]
+        segments = _split(revisions, self.segments)
+
+        scratch_dir = None
+        scratch_url = self.scratch_url
+        if scratch_url is None:
+            scratch_dir = tempfile.mkdtemp(prefix="alembic_stairway_")
+            scratch_url = "sqlite:///%s" % os.path.join(
+                scratch_dir, "%(name)s.db"
+            )
+        try:
+            checkpoints = util.unique_list(
+                [boundary for boundary, segment in segments]
+            )
+            seed_url = scratch_url % {"name": "seed"}
+            self._create_snapshots(seed_url, checkpoints)
+
+            args = [
+                (
+                    seed_url,
+                    scratch_url % {"name": "segment%d" % index},
+                    checkpoints,
+                    boundary,
+                    segment,
+                )
+                for index, (boundary, segment) in enumerate(segments)
+            ]
+            if self.workers > 1:
+                worker_pool = multiprocessing.Pool(self.workers)
+                try:
+                    outcomes = worker_pool.map(
+                        _verify_segment_in_process,
+                        [
+                            (
+                                self.config.config_file_name,
+                                self.config.config_ini_section,
+                                self.config.cmd_opts,
+                            )
+                            + arg
+                            for arg in args
+                        ],
+                    )
+                finally:
+                    worker_pool.close()
+                    worker_pool.join()
+            else:
+                outcomes = [
+                    _with_url(
+                        self.config, arg[1], _verify_segment, self.config, *arg
+                    )
+                    for arg in args
+                ]
+        finally:
+            if scratch_dir is not None:
+                shutil.rmtree(scratch_dir)
+
+        self.results = [result for outcome in outcomes for result in outcome]
+        return self.results
+
+    def _create_snapshots(self, seed_url, checkpoints):
+        engine = create_engine(seed_url, poolclass=pool.NullPool)
+
+        def create():
+            DatabaseSnapshots(self.config, engine, checkpoints).create()
+
+        _with_url(self.config, seed_url, create)
+
+    def report(self):
+        """Return the results as a string suitable for display."""
+
+        lines = ["Stairway verification:"]
+        rows = [
+            (
+                result.revision,
+                result.status,
+                "%.2fs" % result.duration
+                if result.duration is not None
+                else "",
+            )
+            for result in self.results
+        ]
+        headings = ("revision", "status", "time")
+        widths = [
+            max([len(row[idx]) for row in rows] + [len(heading)])
+            for idx, heading in enumerate(headings)
+        ]
+        for row in [headings] + rows:
+            lines.append(
+                (
+                    "  %-*s %-*s %*s"
+                    % (widths[0], row[0], widths[1], row[1], widths[2], row[2])
+                ).rstrip()
+            )
+        failures = [
+            result for result in self.results if result.status == FAILED
+        ]
+        if failures:
+            lines.append("Failures:")
+            for result in failures:
+                lines.append("  %s: %s" % (result.revision, result.error))
+        return "\n".join(lines)
+
+
+def _split(revisions, count):
+    count = max(1, min(count, len(revisions)))
+    segments = []
+    for index in range(count):
+        start = index * len(revisions) // count
+        end = (index + 1) * len(revisions) // count
+        boundary = revisions[start - 1] if start else "base"
+        segments.append((boundary, revisions[start:end]))
+    return segments
+
+
+def _with_url(config, url, fn, *arg):
+    # run with the given URL in place of sqlalchemy.url, as consumed by
+    # the env.py of the generic template
+    original = config.get_main_option("sqlalchemy.url")
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    try:
+        return fn(*arg)
+    finally:
+        if original is None:
+            config.remove_main_option("sqlalchemy.url")
+        else:
+            config.set_main_option(
+                "sqlalchemy.url", original.replace("%", "%%")
+            )
+
+
+def _verify_segment_in_process(arg):
+    config_file_name, config_ini_section, cmd_opts = arg[0:3]
+    config = Config(
+        config_file_name, ini_section=config_ini_section, cmd_opts=cmd_opts
+    )
+    return _with_url(config, arg[4], _verify_segment, config, *arg[3:])
+
+
+def _verify_segment(config, seed_url, url, checkpoints, boundary, segment):
+    seed_engine = create_engine(seed_url, poolclass=pool.NullPool)
+    engine = create_engine(url, poolclass=pool.NullPool)
+    DatabaseSnapshots(config, seed_engine, checkpoints).restore(
+        boundary, engine=engine
+    )
+
+    results = []
+    attributes = config.attributes
+    previous = attributes.get("connection")
+    script_directory = config._script_directory
+    with engine.connect() as connection:
+        try:
+            # the revisions and env.py are loaded once for the segment
+            session = command.MigrationSession(config, connection=connection)
+            for revision in segment:
+                if results and results[-1].status != PASSED:
+                    results.append(RevisionResult(revision, SKIPPED))
+                    continue
+                start = time.time()
+                try:
+                    session.upgrade(revision)
+                    session.downgrade("%s-1" % revision)
+                    session.upgrade(revision)
+                except Exception as err:
+                    results.append(
+                        RevisionResult(
+                            revision,
+                            FAILED,
+                            time.time() - start,
+                            "%s: %s" % (err.__class__.__name__, err),
+                        )
+                    )
+                else:
+                    results.append(
+                        RevisionResult(revision, PASSED, time.time() - start)
+                    )
+        finally:
+            config._script_directory = script_directory
+            if previous is not None:
+                attributes["connection"] = previous
+            else:
+                attributes.pop("connection", None)
+    engine.dispose()
+    return results
@@ -0,0 +1,156 @@
+"""Lightweight comparison of a database's revision with the revision
+scripts, for use at application startup."""
+
+from sqlalchemy import Column
+from sqlalchemy import exc as sqla_exc
+from sqlalchemy import MetaData
+from sqlalchemy import String
+from sqlalchemy import Table
+
+from ..config import Config
+from ..script import ScriptDirectory
+from ..util import sqla_compat
+from ..util.compat import string_types
+
+UP_TO_DATE = "up-to-date"
+"""The database is at the heads of the revision scripts."""
+
+BEHIND = "behind"
+"""The database is at revisions which are all known to the revision
+scripts, and an upgrade is pending."""
+
+AHEAD = "ahead"
+"""The database is at revisions not known to the revision scripts, as is the
+case when it has been upgraded by a newer deployment of the application."""
+
+DIVERGED = "diverged"
+"""The database is at revisions of which some are not known to the revision
+scripts and some are behind the heads, so that neither an upgrade with these
+scripts nor with those of the newer deployment brings it fully up to date
+without further work."""
+
+
+class DatabaseStatus(object):
+    """The result of :func:`.check_database`."""
+
+    def __init__(self, status, database_heads, script_heads):
+        self.status = status
+        self.database_heads = database_heads
+        self.script_heads = script_heads
+
+    status = None
+    """One of :data:`.UP_TO_DATE`, :data:`.BEHIND`, :data:`.AHEAD` or
+    :data:`.DIVERGED`."""
+
+    database_heads = None
+    """Tuple of the revision identifiers present in the version table."""
+
+    script_heads = None
+    """Tuple of the head revision identifiers of the revision scripts."""
+
+    @property
+    def is_current(self):
+        """True if the database is at the heads of the revision scripts."""
+
+        return self.status == UP_TO_DATE
+
+    def __repr__(self):
+        return "DatabaseStatus(%r, database_heads=%r, script_heads=%r)" % (
+            self.status,
+            self.database_heads,
+            self.script_heads,
+        )
+
+
+def check_database(
+    connectable,
+    config,
+    version_table="alembic_version",
+    version_table_schema=None,
+):
+    """Compare the revisions present in the version table of a database
+    with the heads of the revision scripts of the given configuration.
+
+    This is intended to be cheap enough to run each time an application
+    process starts, in order to verify that the database matches the
+    deployed code: the ``env.py`` script isn't run, and where the heads
+    manifest written by :meth:`.ScriptDirectory.write_heads_manifest` is
+    present and up to date, the revision scripts aren't loaded, leaving a
+    single SELECT of the version table.  Without the manifest, or where a
+    revision file is newer than it, the revision scripts are loaded in
+    order to determine the heads.
+
+    E.g.::
+
+        from alembic.runtime.status import check_database
+
+        status = check_database(engine, "myapp:migrations")
+        if not status.is_current:
+            raise SystemExit(
+                "database is %s: %s" % (status.status, status)
+            )
+
+    :param connectable: a :class:`~sqlalchemy.engine.Engine` or
+     :class:`~sqlalchemy.engine.Connection`.  If the version table may not
+     exist, pass an :class:`~sqlalchemy.engine.Engine`, as the failed
+     SELECT would otherwise abort a transaction in progress on some
+     backends.
+
+    :param config: a :class:`.Config` instance, from which the
+     :class:`.ScriptDirectory` is produced as by
+     :meth:`.ScriptDirectory.from_config`, so that options such as
+     ``version_locations`` are honored; or the location of the migration
+     environment as a string, as would be given as the
+     ``script_location`` configuration option.
+
+    :param version_table: name of the version table, as would be passed
+     to :paramref:`.EnvironmentContext.configure.version_table`.
+
+    :param version_table_schema: schema of the version table, as would be
+     passed to :paramref:`.EnvironmentContext.configure.version_table_schema`.
+
+    :return: a :class:`.DatabaseStatus`.
+
+    """
+    if isinstance(config, string_types):
+        script_location, config = config, Config()
+        config.set_main_option("script_location", script_location)
+    script = ScriptDirectory.from_config(config)
+    manifest = script.read_heads_manifest()
+    if manifest is None:
+        script_heads = tuple(script.get_heads())
+        revisions = set(rev.revision for rev in script.walk_revisions())
+    else:
+        script_heads, revisions = manifest
+
+    database_heads = _database_heads(
+        connectable, version_table, version_table_schema
+    )
+
+    unknown = set(database_heads).difference(revisions)
+    pending = set(database_heads).difference(unknown).difference(script_heads)
+    if unknown:
+        status = DIVERGED if pending else AHEAD
+    elif set(database_heads) == set(script_heads):
+        status = UP_TO_DATE
+    else:
+        status = BEHIND
+    return DatabaseStatus(status, database_heads, script_heads)
+
+
+def _database_heads(connectable, version_table, version_table_schema):
+    table = Table(
+        version_table,
+        MetaData(),
+        Column("version_num", String(32), nullable=False),
+        schema=version_table_schema,
+    )
+    try:
+        rows = connectable.execute(table.select()).fetchall()
+    except sqla_exc.DBAPIError:
+        if sqla_compat._connectable_has_table(
+            connectable, version_table, version_table_schema
+        ):
+            raise
+        return ()
+    return tuple(row[0] for row in rows)
@@ -1,4 +1,11 @@
 from .base import Script  # noqa
 from .base import ScriptDirectory  # noqa
+from .source import MemoryRevisionSource  # noqa
+from .source import RevisionSource  # noqa
 
-__all__ = ["ScriptDirectory", "Script"]
+__all__ = [
+    "ScriptDirectory",
+    "Script",
+    "RevisionSource",
+    "MemoryRevisionSource",
+]
@@ -1,5 +1,8 @@
+import ast
+import collections
 from contextlib import contextmanager
 import datetime
+import json
 import os
 import re
 import shutil
@@ -18,7 +21,14 @@ _legacy_rev = re.compile(r"([a-f0-9]+)\.py$")
 _mod_def_re = re.compile(r"(upgrade|downgrade)_([a-z0-9]+)")
 _slug_re = re.compile(r"\w+")
 _default_file_template = "%(rev)s_%(slug)s"
+_heads_manifest_filename = "heads_manifest.json"
 _split_on_space_comma = re.compile(r", *|(?: +)")
+_rev_header = re.compile(
+    r"^([ \t]*)(revision|down_revision|branch_labels|depends_on)"
+    r"[ \t]*(?::[^=\n]*)?=[ \t]*(.*?)[ \t\r]*$",
+    re.M,
+)
+_simple_header_value = re.compile(r"""None$|'([\w-]+)'$|"([\w-]+)"$""")
 
 
 class ScriptDirectory(object):
@@ -38,7 +48,18 @@ class ScriptDirectory(object):
 
         head_revision = script.get_current_head()
 
+    :param dir: the script directory, containing ``env.py`` and
+     ``script.py.mako``.  May be None when both ``revision_source`` and
+     ``env_fn`` are given.
 
+    :param revision_source: a :class:`.RevisionSource`, such as a
+     :class:`.MemoryRevisionSource`, from which revisions are loaded in
+     place of the ``versions/`` directory.
+
+    :param env_fn: a function run by :meth:`.run_env` in place of the
+     ``env.py`` script, e.g. one which calls upon
+     :meth:`.EnvironmentContext.configure` and
+     :meth:`.EnvironmentContext.run_migrations` via ``alembic.context``.
 
     """
 
@@ -52,6 +73,9 @@ class ScriptDirectory(object):
         output_encoding="utf-8",
         timezone=None,
         hook_config=None,
+        heads_manifest=False,
+        revision_source=None,
+        env_fn=None,
     ):
         self.dir = dir
         self.file_template = file_template
@@ -62,8 +86,17 @@ class ScriptDirectory(object):
         self.revision_map = revision.RevisionMap(self._load_revisions)
         self.timezone = timezone
         self.hook_config = hook_config
+        self.heads_manifest = heads_manifest
+        self.revision_source = revision_source
+        self.env_fn = env_fn
 
-        if not os.access(dir, os.F_OK):
+        if dir is None:
+            if revision_source is None or env_fn is None:
+                raise util.CommandError(
+                    "A script directory is required unless revision_source "
+                    "and env_fn are given"
+                )
+        elif not os.access(dir, os.F_OK):
             raise util.CommandError(
                 "Path doesn't exist: %r.  Please use "
                 "the 'init' command to create a new "
@@ -89,6 +122,35 @@ class ScriptDirectory(object):
             return (os.path.abspath(os.path.join(self.dir, "versions")),)
 
     def _load_revisions(self):
+        if self.revision_source is not None:
+            for script in self.revision_source.load_revisions(self):
+                yield script
+            return
+
+        # scripts generated before the map was loaded follow the others, in
+        # the order generated, as they would have had the map been loaded
+        generated, self._generated_scripts = (
+            self._generated_scripts,
+            util.immutabledict(),
+        )
+        for vers, file_ in self._revision_files():
+            if os.path.abspath(os.path.join(vers, file_)) in generated:
+                continue
+            script = Script._from_filename(self, vers, file_)
+            if script is None:
+                continue
+            yield script
+        for script in generated.values():
+            yield script
+
+    def _load_revision_headers(self):
+        for vers, file_ in self._revision_files():
+            rev = Script._from_headers(self, vers, file_)
+            if rev is None:
+                continue
+            yield rev
+
+    def _revision_files(self):
         if self.version_locations:
             paths = [
                 vers
@@ -101,18 +163,32 @@ class ScriptDirectory(object):
         dupes = set()
         for vers in paths:
             for file_ in Script._list_py_dir(self, vers):
-                path = os.path.realpath(os.path.join(vers, file_))
-                if path in dupes:
-                    util.warn(
-                        "File %s loaded twice! ignoring. Please ensure "
-                        "version_locations is unique." % path
-                    )
-                    continue
-                dupes.add(path)
-                script = Script._from_filename(self, vers, file_)
-                if script is None:
-                    continue
-                yield script
+                # files within a single directory can't be duplicates
+                if len(paths) > 1:
+                    path = os.path.realpath(os.path.join(vers, file_))
+                    if path in dupes:
+                        util.warn(
+                            "File %s loaded twice! ignoring. Please ensure "
+                            "version_locations is unique." % path
+                        )
+                        continue
+                    dupes.add(path)
+                yield vers, file_
+
+    _header_revision_map = None
+    _generated_scripts = util.immutabledict()
+
+    def _generation_revision_map(self):
+        # the full revision map imports every revision script; when it
+        # hasn't been loaded already, the heads are located using a map of
+        # the identifiers parsed from the header of each file instead
+        if "_revision_map" in self.revision_map.__dict__:
+            return self.revision_map
+        if self._header_revision_map is None:
+            self._header_revision_map = revision.RevisionMap(
+                self._load_revision_headers
+            )
+        return self._header_revision_map
 
     @classmethod
     def from_config(cls, config):
@@ -122,7 +198,12 @@ class ScriptDirectory(object):
         The :class:`.Config` need only have the ``script_location`` key
         present.
 
+        If the :class:`.Config` belongs to a :class:`.MigrationSession`, the
+        :class:`.ScriptDirectory` held by the session is returned.
+
         """
+        if config._script_directory is not None:
+            return config._script_directory
         script_location = config.get_main_option("script_location")
         if script_location is None:
             raise util.CommandError(
@@ -147,8 +228,26 @@ class ScriptDirectory(object):
             version_locations=version_locations,
             timezone=config.get_main_option("timezone"),
             hook_config=config.get_section("post_write_hooks", {}),
+            heads_manifest=config.get_main_option("heads_manifest") == "true",
         )
 
+    _deferred_hook_paths = None
+
+    @contextmanager
+    def _deferred_write_hooks(self):
+        # run post write hooks once for all of the files generated within
+        # the block, so that batch hooks receive them in a single call
+        if self._deferred_hook_paths is not None:
+            yield
+            return
+        self._deferred_hook_paths = paths = []
+        try:
+            yield
+        finally:
+            self._deferred_hook_paths = None
+        if paths:
+            write_hooks._run_hooks(paths, self.hook_config)
+
     @contextmanager
     def _catch_revision_errors(
         self,
@@ -477,6 +576,79 @@ class ScriptDirectory(object):
 
             return steps
 
+    @property
+    def heads_manifest_location(self):
+        """The path of the heads manifest file, which is written by
+        :meth:`.write_heads_manifest`."""
+
+        return os.path.abspath(
+            os.path.join(self.dir, _heads_manifest_filename)
+        )
+
+    def write_heads_manifest(self):
+        """Write the heads manifest file to the script directory.
+
+        The heads manifest records the current heads and the identifiers
+        of all revisions, allowing :func:`.check_database` to compare the
+        database against the revision scripts without loading them.  It's
+        rewritten automatically by :meth:`.generate_revision` when the
+        ``heads_manifest`` configuration option is set to ``true``.
+
+        """
+        self._write_heads_manifest(self.revision_map)
+
+    def _write_heads_manifest(self, revision_map):
+        with self._catch_revision_errors():
+            manifest = {
+                "heads": sorted(revision_map.heads),
+                "revisions": sorted(
+                    rev.revision
+                    for rev in revision_map.iterate_revisions("heads", "base")
+                ),
+            }
+        with open(self.heads_manifest_location, "w") as file_:
+            json.dump(manifest, file_, indent=2, sort_keys=True)
+            file_.write("\n")
+
+    def read_heads_manifest(self):
+        """Read the heads manifest file written by
+        :meth:`.write_heads_manifest`.
+
+        Returns a tuple of the head revision identifiers and a set of all
+        revision identifiers, or None if no manifest is present, or if it's
+        out of date with respect to the revision files; that is, where a
+        revision file was modified after the manifest was written, or the
+        number of revision files differs from the number of revisions
+        recorded.  The revision files are listed for this purpose, but
+        not loaded.
+
+        """
+        location = self.heads_manifest_location
+        if not os.path.exists(location):
+            return None
+        with open(location) as file_:
+            manifest = json.load(file_)
+        heads, revisions = tuple(manifest["heads"]), set(manifest["revisions"])
+        if self.revision_source is None and self._heads_manifest_is_stale(
+            os.path.getmtime(location), revisions
+        ):
+            return None
+        return heads, revisions
+
+    def _heads_manifest_is_stale(self, written, revisions):
+        rev_file = (
+            _sourceless_rev_file if self.sourceless else _only_source_rev_file
+        )
+        names = set()
+        for vers, file_ in self._revision_files():
+            if not rev_file.match(file_):
+                continue
+            if os.path.getmtime(os.path.join(vers, file_)) > written:
+                return True
+            # a .py file and its .pyc count once in sourceless mode
+            names.add((vers, os.path.basename(file_).split(".")[0]))
+        return len(names) != len(revisions)
+
     def run_env(self):
         """Run the script environment.
 
@@ -486,19 +658,32 @@ class ScriptDirectory(object):
 
 
         """
-        util.load_python_file(self.dir, "env.py")
+        if self.env_fn is not None:
+            self.env_fn()
+        elif self._env_code is not None:
+            util.exec_python_code(self._env_code, "env_py")
+        else:
+            util.load_python_file(self.dir, "env.py")
+
+    _env_code = None
+
+    def _compile_env(self):
+        # used by MigrationSession so that env.py is compiled only once
+        if self.env_fn is None and os.path.exists(self.env_py_location):
+            self._env_code = util.compile_python_file(self.dir, "env.py")
 
     @property
     def env_py_location(self):
         return os.path.abspath(os.path.join(self.dir, "env.py"))
 
-    def _generate_template(self, src, dest, **kw):
+    def _generate_template(self, src, dest, module_filename=None, **kw):
         util.status(
             "Generating %s" % os.path.abspath(dest),
             util.template_to_file,
             src,
             dest,
             self.output_encoding,
+            module_filename=module_filename,
             **kw
         )
 
@@ -573,6 +758,12 @@ class ScriptDirectory(object):
         except revision.RevisionError as err:
             compat.raise_from_cause(util.CommandError(err.args[0]))
 
+        if self.revision_source is not None:
+            raise util.CommandError(
+                "Revision files can't be generated for a script directory "
+                "with a revision_source"
+            )
+
         with self._catch_revision_errors(
             multiple_heads=(
                 "Multiple heads are present; please specify the head "
@@ -580,7 +771,8 @@ class ScriptDirectory(object):
                 "or perform a merge."
             )
         ):
-            heads = self.revision_map.get_revisions(head)
+            revision_map = self._generation_revision_map()
+            heads = revision_map.get_revisions(head)
 
         if len(set(heads)) != len(heads):
             raise util.CommandError("Duplicate head revisions specified")
@@ -632,7 +824,7 @@ class ScriptDirectory(object):
                     if dep in rev.branch_labels  # maintain branch labels
                     else rev.revision  # resolve partial revision identifiers
                     for rev, dep in [
-                        (self.revision_map.get_revision(dep), dep)
+                        (revision_map.get_revision(dep), dep)
                         for dep in util.to_list(depends_on)
                     ]
                 ]
@@ -640,6 +832,9 @@ class ScriptDirectory(object):
         self._generate_template(
             os.path.join(self.dir, "script.py.mako"),
             path,
+            module_filename=os.path.join(
+                self.dir, "__pycache__", "script.py.mako.py"
+            ),
             up_revision=str(revid),
             down_revision=revision.tuple_rev_as_scalar(
                 tuple(h.revision if h is not None else None for h in heads)
@@ -654,7 +849,10 @@ class ScriptDirectory(object):
 
         post_write_hooks = self.hook_config
         if post_write_hooks:
-            write_hooks._run_hooks(path, post_write_hooks)
+            if self._deferred_hook_paths is not None:
+                self._deferred_hook_paths.append(path)
+            else:
+                write_hooks._run_hooks([path], post_write_hooks)
 
         try:
             script = Script._from_path(self, path)
@@ -669,7 +867,19 @@ class ScriptDirectory(object):
                 % (script.revision, branch_labels, script.path)
             )
 
-        self.revision_map.add_revision(script)
+        # the new revision is added to whichever maps are loaded; otherwise
+        # it's retained so that the full map includes the same object once
+        # loaded
+        if "_revision_map" in self.revision_map.__dict__:
+            self.revision_map.add_revision(script)
+        else:
+            if not self._generated_scripts:
+                self._generated_scripts = collections.OrderedDict()
+            self._generated_scripts[os.path.abspath(script.path)] = script
+        if revision_map is self._header_revision_map:
+            revision_map.add_revision(script)
+        if self.heads_manifest:
+            self._write_heads_manifest(revision_map)
         return script
 
     def _rev_path(self, path, rev_id, message, create_date):
@@ -852,6 +1062,52 @@ class Script(revision.Revision):
         dir_, filename = os.path.split(path)
         return cls._from_filename(scriptdir, dir_, filename)
 
+    @classmethod
+    def _from_headers(cls, scriptdir, dir_, filename):
+        """Return a :class:`.Revision` given the identifiers assigned at the
+        top level of a revision file, without importing it.
+
+        Where the identifiers aren't all plain literals, each assigned once,
+        the file is imported as by :meth:`._from_filename`.
+
+        """
+        if scriptdir.sourceless or not _only_source_rev_file.match(filename):
+            return cls._from_filename(scriptdir, dir_, filename)
+
+        path = os.path.join(dir_, filename)
+        with open(path, "rb") as file_:
+            source = file_.read()
+        try:
+            source = source.decode("utf-8")
+        except UnicodeDecodeError:
+            return cls._from_filename(scriptdir, dir_, filename)
+
+        headers = {}
+        for indent, name, value in _rev_header.findall(source):
+            if indent or name in headers:
+                return cls._from_filename(scriptdir, dir_, filename)
+            simple = _simple_header_value.match(value)
+            if simple:
+                headers[name] = simple.group(1) or simple.group(2)
+                continue
+            try:
+                headers[name] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                return cls._from_filename(scriptdir, dir_, filename)
+        if "revision" not in headers or "down_revision" not in headers:
+            return cls._from_filename(scriptdir, dir_, filename)
+
+        rev = revision.Revision(
+            headers["revision"],
+            headers["down_revision"],
+            branch_labels=util.to_tuple(
+                headers.get("branch_labels"), default=()
+            ),
+            dependencies=util.to_tuple(headers.get("depends_on"), default=()),
+        )
+        rev.path = path
+        return rev
+
     @classmethod
     def _list_py_dir(cls, scriptdir, path):
         if scriptdir.sourceless:
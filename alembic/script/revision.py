@@ -1,8 +1,6 @@
 import collections
 import re
 
-from sqlalchemy import util as sqlautil
-
 from .. import util
 from ..util import compat
 
@@ -113,8 +111,12 @@ class RevisionMap(object):
         """
         map_ = {}
 
-        heads = sqlautil.OrderedSet()
-        _real_heads = sqlautil.OrderedSet()
+        # heads are determined by discarding each down revision from the
+        # full list at the end, as removal from an ordered set one at a time
+        # is quadratic for a long history
+        ordered = []
+        not_heads = set()
+        not_real_heads = set()
         self.bases = ()
         self._real_bases = ()
 
@@ -131,8 +133,7 @@ class RevisionMap(object):
                 has_branch_labels.add(revision)
             if revision.dependencies:
                 has_depends_on.add(revision)
-            heads.add(revision.revision)
-            _real_heads.add(revision.revision)
+            ordered.append(revision.revision)
             if revision.is_base:
                 self.bases += (revision.revision,)
             if revision._is_real_base:
@@ -156,12 +157,15 @@ class RevisionMap(object):
                 down_revision = map_[downrev]
                 down_revision.add_nextrev(rev)
                 if downrev in rev._versioned_down_revisions:
-                    heads.discard(downrev)
-                _real_heads.discard(downrev)
+                    not_heads.add(downrev)
+                not_real_heads.add(downrev)
 
         map_[None] = map_[()] = None
-        self.heads = tuple(heads)
-        self._real_heads = tuple(_real_heads)
+        ordered = util.unique_list(ordered)
+        self.heads = tuple(rev for rev in ordered if rev not in not_heads)
+        self._real_heads = tuple(
+            rev for rev in ordered if rev not in not_real_heads
+        )
 
         for revision in has_branch_labels:
             self._add_branches(revision, map_, map_branch_labels=False)
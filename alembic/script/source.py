@@ -0,0 +1,105 @@
+"""Sources of revisions for a :class:`.ScriptDirectory` other than the
+``versions/`` directory."""
+
+import types
+
+from .base import Script
+from .. import util
+
+
+class RevisionSource(object):
+    """Provide the revisions of a :class:`.ScriptDirectory`.
+
+    A :class:`.ScriptDirectory` given no ``revision_source`` loads its
+    revisions from the files within its ``versions/`` directory, or the
+    directories named by ``version_locations``.  A subclass of
+    :class:`.RevisionSource` passed as
+    :paramref:`.ScriptDirectory.revision_source` replaces this behavior.
+
+    """
+
+    def load_revisions(self, script_directory):
+        """Return an iterator of :class:`.Script` objects for the given
+        :class:`.ScriptDirectory`.
+
+        Each :class:`.Script` refers to an object, normally a module, having
+        ``revision`` and ``down_revision`` attributes, optionally
+        ``branch_labels`` and ``depends_on``, and ``upgrade()`` and
+        ``downgrade()`` functions, as a revision file does.
+
+        """
+        raise NotImplementedError()
+
+
+class MemoryRevisionSource(RevisionSource):
+    """A :class:`.RevisionSource` of revisions registered as Python
+    objects, with no files read or modules imported.
+
+    E.g.::
+
+        from alembic import op
+        from alembic.script import MemoryRevisionSource
+        from alembic.script import ScriptDirectory
+
+        source = MemoryRevisionSource()
+
+        def upgrade():
+            op.create_table("account", sa.Column("id", sa.Integer))
+
+        def downgrade():
+            op.drop_table("account")
+
+        source.add("a1", None, upgrade, downgrade, doc="create account")
+
+        script = ScriptDirectory(None, revision_source=source, env_fn=run_env)
+
+    Above, ``run_env`` is a function which takes the place of the
+    ``env.py`` script, used by the command functions; see
+    :paramref:`.ScriptDirectory.env_fn`.
+
+    """
+
+    def __init__(self):
+        self._revisions = []
+
+    def add(
+        self,
+        revision,
+        down_revision,
+        upgrade,
+        downgrade,
+        doc=None,
+        branch_labels=None,
+        depends_on=None,
+    ):
+        """Register a revision given its identifiers and its ``upgrade()``
+        and ``downgrade()`` functions.
+
+        Returns the module object which is created to represent the
+        revision, in the same way as the module of a revision file.
+
+        """
+        module = types.ModuleType("revision_%s" % revision, doc)
+        module.revision = revision
+        module.down_revision = down_revision
+        module.branch_labels = branch_labels
+        module.depends_on = depends_on
+        module.upgrade = upgrade
+        module.downgrade = downgrade
+        self.register(module)
+        return module
+
+    def register(self, module):
+        """Register an object, such as a module or a class, having the
+        attributes of a revision file.
+
+        """
+        if not hasattr(module, "revision"):
+            raise util.CommandError(
+                "Revision object %r has no 'revision' attribute" % (module,)
+            )
+        self._revisions.append(module)
+
+    def load_revisions(self, script_directory):
+        for module in self._revisions:
+            yield Script(module, module.revision, None)
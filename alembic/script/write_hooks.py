@@ -6,15 +6,25 @@ from ..util import compat
 
 
 _registry = {}
+_batch = set()
+_entrypoints = {}
 
 
-def register(name):
+def register(name, batch=False):
     """A function decorator that will register that function as a write hook.
 
     See the documentation linked below for an example.
 
     .. versionadded:: 1.2.0
 
+    :param name: name of the hook type, referred to by the ``type`` key of
+     the hook's configuration.
+
+    :param batch: if True, the function receives a list of the paths of
+     all files generated by a single command, such as several revisions
+     generated by one ``alembic revision`` command, in one call, rather
+     than being called with the path of each file in turn.
+
     .. seealso::
 
         :ref:`post_write_hooks_custom`
@@ -24,6 +34,10 @@ def register(name):
 
     def decorate(fn):
         _registry[name] = fn
+        if batch:
+            _batch.add(name)
+        else:
+            _batch.discard(name)
 
     return decorate
 
@@ -32,7 +46,8 @@ def _invoke(name, revision, options):
     """Invokes the formatter registered for the given name.
 
     :param name: The name of a formatter in the registry
-    :param revision: A :class:`.MigrationRevision` instance
+    :param revision: A :class:`.MigrationRevision` instance, or for a hook
+        registered with ``batch=True``, a list of paths
     :param options: A dict containing kwargs passed to the
         specified formatter.
     :raises: :class:`alembic.util.CommandError`
@@ -47,8 +62,8 @@ def _invoke(name, revision, options):
         return hook(revision, options)
 
 
-def _run_hooks(path, hook_config):
-    """Invoke hooks for a generated revision.
+def _run_hooks(paths, hook_config):
+    """Invoke hooks for generated revisions.
 
     """
 
@@ -75,20 +90,22 @@ def _run_hooks(path, hook_config):
                 )
             )
         else:
-            util.status(
-                'Running post write hook "%s"' % name,
-                _invoke,
-                type_,
-                path,
-                opts,
-                newline=True,
-            )
-
+            if type_ in _batch:
+                invocations = [list(paths)]
+            else:
+                invocations = paths
+            for arg in invocations:
+                util.status(
+                    'Running post write hook "%s"' % name,
+                    _invoke,
+                    type_,
+                    arg,
+                    opts,
+                    newline=True,
+                )
 
-@register("console_scripts")
-def console_scripts(path, options):
-    import pkg_resources
 
+def _entrypoint(options):
     try:
         entrypoint_name = options["entrypoint"]
     except KeyError:
@@ -98,8 +115,20 @@ def console_scripts(path, options):
                 % (options["_hook_name"], options["_hook_name"])
             )
         )
-    iter_ = pkg_resources.iter_entry_points("console_scripts", entrypoint_name)
-    impl = next(iter_)
+    # scanning entrypoints is expensive, so is done once per process
+    if entrypoint_name not in _entrypoints:
+        import pkg_resources
+
+        iter_ = pkg_resources.iter_entry_points(
+            "console_scripts", entrypoint_name
+        )
+        _entrypoints[entrypoint_name] = next(iter_)
+    return _entrypoints[entrypoint_name]
+
+
+@register("console_scripts", batch=True)
+def console_scripts(paths, options):
+    impl = _entrypoint(options)
     options = options.get("options", "")
     subprocess.run(
         [
@@ -107,7 +136,26 @@ def console_scripts(path, options):
             "-c",
             "import %s; %s()"
             % (impl.module_name, ".".join((impl.module_name,) + impl.attrs)),
-            path,
         ]
+        + paths
         + options.split()
     )
+
+
+@register("console_scripts_inprocess", batch=True)
+def console_scripts_inprocess(paths, options):
+    fn = _entrypoint(options).resolve()
+    argv = sys.argv
+    sys.argv = (
+        [options["entrypoint"]] + paths + options.get("options", "").split()
+    )
+    try:
+        fn()
+    except SystemExit as exit_:
+        if exit_.code not in (None, 0):
+            raise util.CommandError(
+                "Post write hook %r exited with status %s"
+                % (options["_hook_name"], exit_.code)
+            )
+    finally:
+        sys.argv = argv
@@ -19,6 +19,7 @@ from .assertions import _get_dialect
 from ..environment import EnvironmentContext
 from ..migration import MigrationContext
 from ..operations import Operations
+from ..runtime.snapshot import DatabaseSnapshots
 from ..util import compat
 from ..util.compat import configparser
 from ..util.compat import string_types
@@ -262,3 +263,38 @@ class AlterColRoundTripFixture(object):
             if column.server_default is not None
             else None,
         )
+
+
+class DatabaseSnapshotFixture(object):
+    """Mixin for test classes which need the database at particular
+    revisions, creating a :class:`.DatabaseSnapshots` once per class and
+    restoring a checkpoint with :meth:`.restore_snapshot`.
+
+    The test class provides the :class:`.Config` and
+    :class:`~sqlalchemy.engine.Engine` by implementing
+    ``snapshot_config()`` and ``snapshot_engine()``, and names the
+    checkpoint revisions in ``snapshot_checkpoints``.
+
+    """
+
+    snapshot_checkpoints = ("head",)
+
+    @classmethod
+    def snapshot_config(cls):
+        raise NotImplementedError()
+
+    @classmethod
+    def snapshot_engine(cls):
+        raise NotImplementedError()
+
+    @classmethod
+    def setup_class(cls):
+        cls.snapshots = DatabaseSnapshots(
+            cls.snapshot_config(),
+            cls.snapshot_engine(),
+            checkpoints=cls.snapshot_checkpoints,
+        )
+        cls.snapshots.create()
+
+    def restore_snapshot(self, revision):
+        self.snapshots.restore(revision)
@@ -19,7 +19,9 @@ from .messaging import status  # noqa
 from .messaging import warn  # noqa
 from .messaging import write_outstream  # noqa
 from .pyfiles import coerce_resource_to_filename  # noqa
+from .pyfiles import compile_python_file  # noqa
 from .pyfiles import edit  # noqa
+from .pyfiles import exec_python_code  # noqa
 from .pyfiles import load_python_file  # noqa
 from .pyfiles import pyc_file_from_path  # noqa
 from .pyfiles import template_to_file  # noqa
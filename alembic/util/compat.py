@@ -171,6 +171,13 @@ else:
     from ConfigParser import SafeConfigParser  # noqa
     import ConfigParser as configparser  # noqa
 
+if py3k:
+    import queue
+    import socketserver
+else:
+    import Queue as queue  # noqa
+    import SocketServer as socketserver  # noqa
+
 if py2k:
     from mako.util import parse_encoding
 
@@ -41,6 +41,13 @@ class ModuleClsProxy(with_metaclass(_ModuleClsMeta)):
             for attr_name in attr_names:
                 globals_[attr_name] = getattr(self, attr_name)
 
+    @classmethod
+    def _get_proxy(cls):
+        attr_names, modules = cls._setups[cls]
+        for globals_, locals_ in modules:
+            return globals_.get("_proxy")
+        return None
+
     def _remove_proxy(self):
         attr_names, modules = self._setups[self.__class__]
         for globals_, locals_ in modules:
@@ -278,7 +285,7 @@ class Dispatcher(object):
 
         return decorate
 
-    def dispatch(self, obj, qualifier="default"):
+    def dispatch(self, obj, qualifier="default", wrapper=None):
 
         if isinstance(obj, string_types):
             targets = [obj]
@@ -289,13 +296,23 @@ class Dispatcher(object):
 
         for spcls in targets:
             if qualifier != "default" and (spcls, qualifier) in self._registry:
-                return self._fn_or_list(self._registry[(spcls, qualifier)])
+                return self._fn_or_list(
+                    self._registry[(spcls, qualifier)], wrapper
+                )
             elif (spcls, "default") in self._registry:
-                return self._fn_or_list(self._registry[(spcls, "default")])
+                return self._fn_or_list(
+                    self._registry[(spcls, "default")], wrapper
+                )
         else:
             raise ValueError("no dispatch function for object: %s" % obj)
 
-    def _fn_or_list(self, fn_or_list):
+    def _fn_or_list(self, fn_or_list, wrapper=None):
+        if wrapper is not None:
+            if self.uselist:
+                fn_or_list = [wrapper(fn) for fn in fn_or_list]
+            else:
+                fn_or_list = wrapper(fn_or_list)
+
         if self.uselist:
 
             def go(*arg, **kw):
@@ -1,8 +1,13 @@
+import hashlib
 import os
 import re
 import tempfile
+import types
 
+import mako
+from mako import codegen
 from mako import exceptions
+from mako.template import ModuleTemplate
 from mako.template import Template
 
 from .compat import get_current_bytecode_suffixes
@@ -13,9 +18,82 @@ from .compat import py35
 from .exc import CommandError
 
 
-def template_to_file(template_file, dest, output_encoding, **kw):
-    template = Template(filename=template_file)
+_templates = {}
+
+
+def _template(template_file, module_filename):
+    # templates are compiled once per process, keyed on their content; where
+    # module_filename is given, the compiled module is also written there,
+    # headed by the same key along with the Mako version and the magic
+    # number of its code generator, for use by later processes
+    with open(template_file, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    key = (template_file, digest)
+    if key in _templates:
+        template, code = _templates[key]
+        if module_filename is not None and not os.path.exists(module_filename):
+            _write_compiled_template(code, module_filename, digest)
+        return template
+    template = code = None
+    if module_filename is not None:
+        template, code = _load_compiled_template(
+            template_file, module_filename, digest
+        )
+    if template is None:
+        template = Template(filename=template_file)
+        # Template.code is looked up by module name, which is shared by
+        # templates of the same file, so it's retained here
+        code = template.code
+        if module_filename is not None:
+            _write_compiled_template(code, module_filename, digest)
+    _templates[key] = template, code
+    return template
+
+
+def _load_compiled_template(template_file, module_filename, digest):
+    try:
+        with open(module_filename, "rb") as f:
+            header = f.readline()
+            source = f.read()
+    except (IOError, OSError):
+        return None, None
+    if header != _compiled_header(digest):
+        return None, None
+    module = types.ModuleType("_alembic_template_%s" % digest)
+    module.__file__ = module_filename
+    exec(compile(source, module_filename, "exec"), module.__dict__)
+    template = ModuleTemplate(
+        module,
+        module_filename=module_filename,
+        template_filename=template_file,
+    )
+    return template, source.decode("utf-8")
+
+
+def _write_compiled_template(code, module_filename, digest):
+    try:
+        directory = os.path.dirname(module_filename)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(module_filename, "wb") as f:
+            f.write(_compiled_header(digest))
+            f.write(code.encode("utf-8"))
+    except (IOError, OSError):
+        pass
+
+
+def _compiled_header(digest):
+    return (
+        "# alembic template %s mako %s magic %s\n"
+        % (digest, mako.__version__, codegen.MAGIC_NUMBER)
+    ).encode("ascii")
+
+
+def template_to_file(
+    template_file, dest, output_encoding, module_filename=None, **kw
+):
     try:
+        template = _template(template_file, module_filename)
         output = template.render_unicode(**kw).encode(output_encoding)
     except:
         with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as ntf:
@@ -49,6 +127,25 @@ def coerce_resource_to_filename(fname):
     return fname
 
 
+def compile_python_file(dir_, filename):
+    """Compile a Python source file, returning the code object."""
+
+    path = os.path.join(dir_, filename)
+    with open(path, "rb") as file_:
+        source = file_.read()
+    return compile(source, path, "exec")
+
+
+def exec_python_code(code, module_id):
+    """Run a code object produced by :func:`.compile_python_file` as a new
+    Python module."""
+
+    module = types.ModuleType(module_id)
+    module.__file__ = code.co_filename
+    exec(code, module.__dict__)
+    return module
+
+
 def pyc_file_from_path(path):
     """Given a python source path, locate the .pyc.
 
@@ -21,6 +21,18 @@ class DefaultRequirements(SuiteRequirements):
 
         return exclusions.skip_if(["sqlite", "firebird"], "no schema support")
 
+    @property
+    def sqlite_native_rename_column(self):
+        """SQLite library supports ALTER TABLE .. RENAME COLUMN."""
+
+        return exclusions.only_on(["sqlite >= 3.25"])
+
+    @property
+    def sqlite_native_drop_column(self):
+        """SQLite library supports ALTER TABLE .. DROP COLUMN."""
+
+        return exclusions.only_on(["sqlite >= 3.35"])
+
     @property
     def no_referential_integrity(self):
         """test will fail if referential integrity is enforced"""
@@ -39,6 +39,8 @@ from sqlalchemy.types import VARBINARY
 from alembic import autogenerate
 from alembic import testing
 from alembic.autogenerate import api
+from alembic.autogenerate import compare
+from alembic.autogenerate import render
 from alembic.migration import MigrationContext
 from alembic.operations import ops
 from alembic.testing import assert_raises_message
@@ -202,6 +204,129 @@ class AutogenDefaultSchemaTest(AutogenFixtureTest, TestBase):
         eq_(diffs[0][1].c.keys(), ["x"])
 
 
+class AutogenDedupeSchemasTest(AutogenFixtureTest, TestBase):
+    __only_on__ = "postgresql"
+    __backend__ = True
+
+    def _tables(self, m, schema, extra=False):
+        Table("a", m, Column("id", Integer, primary_key=True), schema=schema)
+        Table(
+            "b",
+            m,
+            Column("id", Integer, primary_key=True),
+            Column("a_id", ForeignKey("%s.a.id" % schema)),
+            Column("x", String(50), server_default="x"),
+            schema=schema,
+        )
+        if extra:
+            Table("c", m, Column("q", Integer), schema=schema)
+
+    def _include_object(self, obj, name, type_, reflected, compare_to):
+        if type_ == "table":
+            return obj.schema in (config.test_schema, config.test_schema_2)
+        return True
+
+    def test_identical_schemas_reflected_once(self):
+        m1 = MetaData()
+        m2 = MetaData()
+        for schema in (config.test_schema, config.test_schema_2):
+            self._tables(m1, schema)
+            self._tables(m2, schema)
+            Table("d", m2, Column("y", Integer), schema=schema)
+
+        with mock.patch.object(
+            api.CachingInspector, "project_schema", autospec=True
+        ) as project_schema:
+            uo = self._fixture(
+                m1,
+                m2,
+                include_schemas=True,
+                opts={"dedupe_schemas": True},
+                object_filters=self._include_object,
+                return_ops=True,
+            )
+        eq_(
+            [call[1][1:] for call in project_schema.mock_calls],
+            [(config.test_schema_2, config.test_schema)],
+        )
+
+        diffs = uo.as_diffs()
+        eq_(
+            sorted((diff[0], diff[1].schema, diff[1].name) for diff in diffs),
+            [
+                ("add_table", config.test_schema, "d"),
+                ("add_table", config.test_schema_2, "d"),
+            ],
+        )
+
+    def test_projected_schema_compares_equal(self):
+        m1 = MetaData()
+        m2 = MetaData()
+        for schema in (config.test_schema, config.test_schema_2):
+            self._tables(m1, schema)
+            self._tables(m2, schema)
+
+        diffs = self._fixture(
+            m1,
+            m2,
+            include_schemas=True,
+            opts={"dedupe_schemas": True},
+            object_filters=self._include_object,
+        )
+        eq_(diffs, [])
+
+    def test_different_schemas_not_grouped(self):
+        m1 = MetaData()
+        m2 = MetaData()
+        self._tables(m1, config.test_schema)
+        self._tables(m1, config.test_schema_2, extra=True)
+        self._tables(m2, config.test_schema)
+        self._tables(m2, config.test_schema_2)
+
+        with mock.patch.object(
+            api.CachingInspector, "project_schema", autospec=True
+        ) as project_schema:
+            diffs = self._fixture(
+                m1,
+                m2,
+                include_schemas=True,
+                opts={"dedupe_schemas": True},
+                object_filters=self._include_object,
+            )
+        eq_(project_schema.mock_calls, [])
+        eq_(len(diffs), 1)
+        eq_(diffs[0][0], "remove_table")
+        eq_(diffs[0][1].schema, config.test_schema_2)
+
+    def test_different_enum_labels_not_grouped(self):
+        m1 = MetaData()
+        m2 = MetaData()
+        for schema, labels in (
+            (config.test_schema, ("x", "y")),
+            (config.test_schema_2, ("x", "z")),
+        ):
+            for m in (m1, m2):
+                Table(
+                    "a",
+                    m,
+                    Column("id", Integer, primary_key=True),
+                    Column("kind", Enum(*labels, name="kind", schema=schema)),
+                    schema=schema,
+                )
+
+        with mock.patch.object(
+            api.CachingInspector, "project_schema", autospec=True
+        ) as project_schema:
+            self._fixture(
+                m1,
+                m2,
+                include_schemas=True,
+                opts={"dedupe_schemas": True},
+                object_filters=self._include_object,
+            )
+        eq_(project_schema.mock_calls, [])
+
+
 class AutogenDefaultSchemaIsNoneTest(AutogenFixtureTest, TestBase):
     __only_on__ = "sqlite"
 
@@ -1156,6 +1281,13 @@ class AutogenVersionTableTest(AutogenTest, TestBase):
             Column("x", Integer),
             schema=cls.version_table_schema,
         )
+        # created by the migration_lock option
+        Table(
+            "%s_lock" % cls.version_table_name,
+            m,
+            Column("lock_key", String(255), primary_key=True),
+            schema=cls.version_table_schema,
+        )
         return m
 
     @classmethod
@@ -1177,6 +1309,12 @@ class AutogenVersionTableTest(AutogenTest, TestBase):
             Column("x", Integer),
             schema=self.version_table_schema,
         )
+        Table(
+            "%s_lock" % self.version_table_name,
+            self.m2,
+            Column("lock_key", String(255), primary_key=True),
+            schema=self.version_table_schema,
+        )
 
         ctx = self.autogen_context
         uo = ops.UpgradeOps(ops=[])
@@ -1242,6 +1380,208 @@ class AutogenerateDiffOrderTest(AutogenTest, TestBase):
         eq_(diffs[1][1].name, "child")
 
 
+class CachingInspectorTest(ModelOne, AutogenTest, TestBase):
+    __only_on__ = "sqlite"
+
+    def test_each_fact_fetched_once(self):
+        uo = ops.UpgradeOps(ops=[])
+        ctx = self.autogen_context
+
+        autogenerate._produce_net_changes(ctx, uo)
+
+        inspector = ctx.inspector
+        reflected = set(self.m1.tables).intersection(self.m2.tables)
+        reflected.add("extra")
+
+        eq_(inspector.misses["get_table_names"], 1)
+        for name in (
+            "get_columns",
+            "get_pk_constraint",
+            "get_foreign_keys",
+            "get_indexes",
+        ):
+            eq_(inspector.misses[name], len(reflected))
+
+        # indexes and foreign keys were consulted again by the
+        # comparison functions after reflection
+        assert inspector.hits["get_indexes"] >= len(reflected)
+        assert inspector.hits["get_foreign_keys"] >= 1
+
+    def test_custom_comparator_uses_cache(self):
+        ctx = self.autogen_context
+
+        def compare(
+            autogen_context, modify_ops, schema, tname, conn_table, md_table
+        ):
+            if conn_table is not None:
+                autogen_context.inspector.get_columns(tname, schema=schema)
+
+        comparators = autogenerate.comparators
+        registry = dict(comparators._registry)
+        registry[("table", "default")] = registry[("table", "default")] + [
+            compare
+        ]
+        with mock.patch.object(comparators, "_registry", registry):
+            autogenerate._produce_net_changes(ctx, ops.UpgradeOps(ops=[]))
+
+        inspector = ctx.inspector
+        assert inspector.hits["get_columns"] > 0
+        eq_(
+            inspector.misses["get_columns"],
+            len(set(self.m1.tables).intersection(self.m2.tables)) + 1,
+        )
+
+    def test_invalidate(self):
+        inspector = self.autogen_context.inspector
+
+        inspector.get_columns("user")
+        inspector.get_columns("address")
+        inspector.get_table_names()
+        eq_(sum(inspector.misses.values()), 3)
+
+        inspector.get_columns("user")
+        eq_(inspector.hits["get_columns"], 1)
+
+        inspector.invalidate("user")
+        inspector.get_columns("user")
+        inspector.get_columns("address")
+        inspector.get_table_names()
+        eq_(inspector.misses["get_columns"], 3)
+        eq_(inspector.misses["get_table_names"], 2)
+
+        inspector.invalidate()
+        inspector.get_columns("address")
+        eq_(inspector.misses["get_columns"], 4)
+
+    def test_project_schema(self):
+        inspector = self.autogen_context.inspector
+        inspector.project_schema("fake", None)
+
+        fks = inspector.get_foreign_keys("extra", schema="fake")
+        eq_(len(fks), 1)
+        eq_(fks[0]["referred_table"], "user")
+        eq_(fks[0]["referred_schema"], "fake")
+
+        eq_(
+            inspector.get_columns("user", schema="fake"),
+            inspector.get_columns("user"),
+        )
+        eq_(
+            sorted(inspector.get_table_names(schema="fake")),
+            sorted(inspector.get_table_names()),
+        )
+
+        # only the source schema went to the database
+        eq_(inspector.misses["get_foreign_keys"], 1)
+        eq_(inspector.misses["get_columns"], 1)
+        eq_(inspector.misses["get_table_names"], 1)
+
+    def test_project_qualified_names_only(self):
+        preparer = self.bind.dialect.identifier_preparer
+        eq_(
+            api._project_reflected(
+                {
+                    "default": "nextval('a.seq'::regclass) || 'data.x'",
+                    "sqltext": 'a.f(data.x, "a.b")',
+                    "schema": "a",
+                    "name": "a.x",
+                },
+                "a",
+                "b",
+                preparer,
+            ),
+            {
+                "default": "nextval('b.seq'::regclass) || 'data.x'",
+                "sqltext": 'b.f(data.x, "a.b")',
+                "schema": "b",
+                "name": "a.x",
+            },
+        )
+
+    def test_is_dialect_inspector(self):
+        inspector = self.autogen_context.inspector
+        assert isinstance(inspector, type(inspect(self.bind)))
+        assert isinstance(inspector, api.CachingInspector)
+
+
+class AutogenProfileTest(ModelOne, AutogenTest, TestBase):
+    __only_on__ = "sqlite"
+
+    configure_opts = {"profile_autogenerate": True}
+
+    def test_not_enabled_by_default(self):
+        ctx = api.AutogenContext(
+            MigrationContext.configure(
+                connection=self.conn, opts={"target_metadata": self.m2}
+            )
+        )
+        is_(ctx.profile, None)
+
+    def test_produce_migrations(self):
+        with mock.patch.object(api.log, "info") as info:
+            autogenerate.produce_migrations(self.context, self.m2)
+
+        report = info.mock_calls[0][1][1]
+        assert report.startswith("Autogenerate profile:")
+        assert "_compare_type" in report
+        assert "SQL statements emitted" in report
+
+    def test_comparators_and_phases(self):
+        ctx = self.autogen_context
+
+        def compare_table(
+            autogen_context, modify_ops, schema, tname, conn_table, md_table
+        ):
+            pass
+
+        comparators = autogenerate.comparators
+        registry = dict(comparators._registry)
+        registry[("table", "default")] = registry[("table", "default")] + [
+            compare_table
+        ]
+        migration_script = ops.MigrationScript(
+            rev_id=None,
+            upgrade_ops=ops.UpgradeOps([]),
+            downgrade_ops=ops.DowngradeOps([]),
+        )
+        with mock.patch.object(comparators, "_registry", registry):
+            compare._populate_migration_script(ctx, migration_script)
+
+        timings = ctx.profile.timings
+        eq_(timings[("phase", "compare")][0], 1)
+        eq_(
+            timings[("comparator", "%s.compare_table" % __name__)][0],
+            len(set(self.m1.tables).union(self.m2.tables)),
+        )
+        assert (
+            "comparator",
+            "alembic.autogenerate.compare._compare_nullable",
+        ) in timings
+
+        inspector = ctx.inspector
+        eq_(
+            timings[("reflection", "get_columns")][0],
+            inspector.misses["get_columns"],
+        )
+        assert ctx.profile.statements >= sum(inspector.misses.values())
+
+    def test_render_item(self):
+        ctx = self.autogen_context
+
+        def render_item(type_, obj, autogen_context):
+            return False
+
+        ctx.opts["render_item"] = render_item
+        migration_script = autogenerate.produce_migrations(
+            self.context, self.m2
+        )
+        render._render_python_into_templatevars(ctx, migration_script, {})
+
+        timings = ctx.profile.timings
+        eq_(timings[("phase", "render")][0], 1)
+        assert timings[("render_item", "column")][0] > 0
+
+
 class CompareMetadataTest(ModelOne, AutogenTest, TestBase):
     __only_on__ = "sqlite"
 
@@ -6,6 +6,7 @@ from sqlalchemy import CheckConstraint
 from sqlalchemy import Column
 from sqlalchemy import DateTime
 from sqlalchemy import Enum
+from sqlalchemy import event
 from sqlalchemy import exc
 from sqlalchemy import ForeignKey
 from sqlalchemy import ForeignKeyConstraint
@@ -1392,6 +1393,11 @@ class BatchRoundTripTest(TestBase):
         "doesn't work w/ pragma foreign keys"
     )
     def test_fk_points_to_me_sqlite_refinteg(self):
+        with self._sqlite_referential_integrity():
+            self._test_fk_points_to_me("always")
+
+    @config.requirements.sqlite_native_rename_column
+    def test_fk_points_to_me_sqlite_refinteg_native(self):
         with self._sqlite_referential_integrity():
             self._test_fk_points_to_me("auto")
 
@@ -1437,6 +1443,11 @@ class BatchRoundTripTest(TestBase):
         "doesn't work w/ pragma foreign keys"
     )
     def test_selfref_fk_sqlite_refinteg(self):
+        with self._sqlite_referential_integrity():
+            self._test_selfref_fk("always")
+
+    @config.requirements.sqlite_native_rename_column
+    def test_selfref_fk_sqlite_refinteg_native(self):
         with self._sqlite_referential_integrity():
             self._test_selfref_fk("auto")
 
@@ -1823,6 +1834,479 @@ class BatchRoundTripTest(TestBase):
         eq_(insp.get_indexes("foo"), [])
 
 
+class BatchSQLiteNativeAlterTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.conn = config.db.connect()
+        self.metadata = MetaData()
+        t1 = Table(
+            "foo",
+            self.metadata,
+            Column("id", Integer, primary_key=True),
+            Column("data", String(50)),
+            Column("x", Integer),
+            Column("y", Integer, index=True),
+        )
+        t1.create(self.conn)
+        self.conn.execute(
+            t1.insert(),
+            [
+                {"id": 1, "data": "d1", "x": 5, "y": 1},
+                {"id": 2, "data": "d2", "x": 6, "y": 2},
+            ],
+        )
+        context = MigrationContext.configure(self.conn)
+        self.op = Operations(context)
+
+        self.statements = []
+
+        @event.listens_for(self.conn, "before_cursor_execute")
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            self.statements.append(statement)
+
+    def tearDown(self):
+        self.conn.execute(text("DROP VIEW IF EXISTS v"))
+        self.metadata.drop_all(self.conn)
+        self.conn.close()
+
+    def _assert_recreated(self, recreated=True):
+        eq_(
+            any("_alembic_tmp_foo" in stmt for stmt in self.statements),
+            recreated,
+        )
+
+    @config.requirements.sqlite_native_rename_column
+    def test_rename_column(self):
+        with self.op.batch_alter_table("foo") as batch_op:
+            batch_op.alter_column("data", new_column_name="newdata")
+
+        self._assert_recreated(False)
+        assert "ALTER TABLE foo RENAME data TO newdata" in self.statements
+        eq_(
+            [
+                dict(row)
+                for row in self.conn.execute(text("select * from foo"))
+            ],
+            [
+                {"id": 1, "newdata": "d1", "x": 5, "y": 1},
+                {"id": 2, "newdata": "d2", "x": 6, "y": 2},
+            ],
+        )
+
+    @config.requirements.sqlite_native_rename_column
+    def test_rename_column_w_type_recreates(self):
+        with self.op.batch_alter_table("foo") as batch_op:
+            batch_op.alter_column(
+                "data", new_column_name="newdata", type_=String(60)
+            )
+
+        self._assert_recreated()
+
+    @config.requirements.sqlite_native_drop_column
+    def test_drop_column(self):
+        with self.op.batch_alter_table("foo") as batch_op:
+            batch_op.drop_column("x")
+            batch_op.add_column(Column("z", Integer))
+
+        self._assert_recreated(False)
+        eq_(
+            [
+                dict(row)
+                for row in self.conn.execute(text("select * from foo"))
+            ],
+            [
+                {"id": 1, "data": "d1", "y": 1, "z": None},
+                {"id": 2, "data": "d2", "y": 2, "z": None},
+            ],
+        )
+
+    @config.requirements.sqlite_native_drop_column
+    def test_drop_pk_column_recreates(self):
+        with self.op.batch_alter_table("foo") as batch_op:
+            batch_op.drop_column("id")
+
+        self._assert_recreated()
+
+    def test_can_drop_column_natively(self):
+        self.conn.execute(text("CREATE VIEW v AS SELECT x FROM foo"))
+        impl = self.op.impl
+        eq_(impl._can_drop_column_natively("foo", "data", None), True)
+
+        # primary key, index, view
+        eq_(impl._can_drop_column_natively("foo", "id", None), False)
+        eq_(impl._can_drop_column_natively("foo", "y", None), False)
+        eq_(impl._can_drop_column_natively("foo", "x", None), False)
+
+    def test_old_sqlite_recreates(self):
+        self.op.impl.sqlite_version_info = (3, 24, 0)
+        with self.op.batch_alter_table("foo") as batch_op:
+            batch_op.alter_column("data", new_column_name="newdata")
+            batch_op.drop_column("x")
+
+        self._assert_recreated()
+
+
+class BatchSQLiteMultiTableTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.conn = config.db.connect()
+        self.metadata = MetaData()
+        parent = Table(
+            "parent",
+            self.metadata,
+            Column("id", Integer, primary_key=True),
+            Column("data", String(50), index=True),
+        )
+        child = Table(
+            "child",
+            self.metadata,
+            Column("id", Integer, primary_key=True),
+            Column("parent_id", ForeignKey("parent.id")),
+            Column("x", Integer),
+            Column("q", Integer, index=True),
+        )
+        self.metadata.create_all(self.conn)
+        self.conn.execute(
+            parent.insert(), [{"id": 1, "data": "d1"}, {"id": 2, "data": "d2"}]
+        )
+        self.conn.execute(
+            child.insert(),
+            [
+                {"id": 1, "parent_id": 1, "x": 5, "q": 1},
+                {"id": 2, "parent_id": 2, "x": 6, "q": 2},
+            ],
+        )
+        context = MigrationContext.configure(self.conn)
+        self.op = Operations(context)
+
+        self.statements = []
+
+        @event.listens_for(self.conn, "before_cursor_execute")
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            self.statements.append(statement)
+
+    def tearDown(self):
+        self.metadata.drop_all(self.conn)
+        self.conn.close()
+
+    def _index_of(self, fragment):
+        for idx, stmt in enumerate(self.statements):
+            if fragment in stmt:
+                return idx
+        assert False, "no statement containing %r" % fragment
+
+    def _pragma(self, name):
+        return self.conn.execute(text("PRAGMA %s" % name)).scalar()
+
+    def test_recreate_in_dependency_order(self):
+        with self.op.batch_alter_tables():
+            with self.op.batch_alter_table(
+                "child", recreate="always"
+            ) as batch_op:
+                batch_op.alter_column("x", new_column_name="y")
+            with self.op.batch_alter_table(
+                "parent", recreate="always"
+            ) as batch_op:
+                batch_op.alter_column("data", type_=String(100))
+
+            # nothing is copied until the context ends
+            assert not any("_alembic_tmp" in stmt for stmt in self.statements)
+
+        assert self._index_of(
+            "CREATE TABLE _alembic_tmp_parent"
+        ) < self._index_of("CREATE TABLE _alembic_tmp_child")
+        first_index = self._index_of("CREATE INDEX")
+        assert first_index > self._index_of(
+            "ALTER TABLE _alembic_tmp_child RENAME TO child"
+        )
+        eq_(
+            [
+                dict(row)
+                for row in self.conn.execute(
+                    text("select * from child order by id")
+                )
+            ],
+            [
+                {"id": 1, "parent_id": 1, "y": 5, "q": 1},
+                {"id": 2, "parent_id": 2, "y": 6, "q": 2},
+            ],
+        )
+        insp = inspect(self.conn)
+        eq_(
+            sorted(idx["column_names"] for idx in insp.get_indexes("child")),
+            [["q"]],
+        )
+        eq_(
+            [idx["column_names"] for idx in insp.get_indexes("parent")],
+            [["data"]],
+        )
+
+    def test_settings_unchanged_by_default(self):
+        journal_mode = self._pragma("journal_mode")
+        synchronous = self._pragma("synchronous")
+
+        with self.op.batch_alter_tables():
+            eq_(self._pragma("journal_mode"), journal_mode)
+            eq_(self._pragma("synchronous"), synchronous)
+        assert not any(
+            stmt.startswith(("PRAGMA journal_mode=", "PRAGMA synchronous="))
+            for stmt in self.statements
+        )
+
+    def test_settings_established_once(self):
+        journal_mode = self._pragma("journal_mode")
+        synchronous = self._pragma("synchronous")
+
+        with self.op.batch_alter_tables(synchronous="NORMAL"):
+            eq_(self._pragma("foreign_keys"), 0)
+            eq_(self._pragma("synchronous"), 1)
+            for name in ("parent", "child"):
+                with self.op.batch_alter_table(
+                    name, recreate="always"
+                ) as batch_op:
+                    batch_op.add_column(Column("r", Integer))
+
+        eq_(
+            [
+                stmt
+                for stmt in self.statements
+                if stmt.startswith("PRAGMA foreign_keys=")
+            ],
+            ["PRAGMA foreign_keys=OFF", "PRAGMA foreign_keys=0"],
+        )
+        eq_(self._pragma("journal_mode"), journal_mode)
+        eq_(self._pragma("synchronous"), synchronous)
+
+    def test_same_table_twice(self):
+        with self.op.batch_alter_tables():
+            with self.op.batch_alter_table(
+                "child", recreate="always"
+            ) as batch_op:
+                batch_op.alter_column("x", new_column_name="y")
+            with self.op.batch_alter_table(
+                "child", recreate="always"
+            ) as batch_op:
+                batch_op.alter_column("y", new_column_name="z")
+
+        eq_(
+            [
+                dict(row)
+                for row in self.conn.execute(
+                    text("select * from child order by id")
+                )
+            ],
+            [
+                {"id": 1, "parent_id": 1, "z": 5, "q": 1},
+                {"id": 2, "parent_id": 2, "z": 6, "q": 2},
+            ],
+        )
+
+    def test_integrity_check(self):
+        self.conn.execute(
+            text("INSERT INTO child (id, parent_id, x, q) VALUES (3, 5, 7, 3)")
+        )
+        assert_raises_message(
+            alembic_exc.CommandError,
+            "Foreign key violations found after recreating tables: "
+            "row 3 of table child refers to a missing row of table parent",
+            self._recreate_child,
+            True,
+        )
+
+    def test_integrity_check_disabled(self):
+        self.conn.execute(
+            text("INSERT INTO child (id, parent_id, x, q) VALUES (3, 5, 7, 3)")
+        )
+        self._recreate_child(False)
+        eq_(self.conn.execute(text("select count(*) from child")).scalar(), 3)
+
+    def _recreate_child(self, integrity_check):
+        with self.op.batch_alter_tables(integrity_check=integrity_check):
+            with self.op.batch_alter_table(
+                "child", recreate="always"
+            ) as batch_op:
+                batch_op.add_column(Column("r", Integer))
+
+
+class BatchSQLiteMultiTableOfflineTest(TestBase):
+    def test_offline(self):
+        context = op_fixture("sqlite", as_sql=True)
+        op = Operations(context)
+        m = MetaData()
+        t = Table(
+            "foo",
+            m,
+            Column("id", Integer, primary_key=True),
+            Column("x", Integer),
+        )
+        with op.batch_alter_tables():
+            with op.batch_alter_table("foo", copy_from=t) as batch_op:
+                batch_op.drop_column("x")
+
+        context.assert_(
+            "PRAGMA foreign_keys=OFF",
+            "CREATE TABLE _alembic_tmp_foo (id INTEGER NOT NULL, "
+            "PRIMARY KEY (id))",
+            "INSERT INTO _alembic_tmp_foo (id) SELECT foo.id FROM foo",
+            "DROP TABLE foo",
+            "ALTER TABLE _alembic_tmp_foo RENAME TO foo",
+            "PRAGMA foreign_keys=ON",
+        )
+
+    def test_offline_settings_restored(self):
+        context = op_fixture("sqlite", as_sql=True)
+        op = Operations(context)
+        with op.batch_alter_tables(journal_mode="MEMORY", synchronous="OFF"):
+            op.execute("SELECT 1")
+
+        context.assert_(
+            "PRAGMA foreign_keys=OFF",
+            "PRAGMA journal_mode=MEMORY",
+            "PRAGMA synchronous=OFF",
+            "SELECT 1",
+            "PRAGMA synchronous=FULL",
+            "PRAGMA journal_mode=DELETE",
+            "PRAGMA foreign_keys=ON",
+        )
+
+
+class BatchReflectionReuseTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.conn = config.db.connect()
+        self.metadata = MetaData()
+        self.t1 = Table(
+            "foo",
+            self.metadata,
+            Column("id", Integer, primary_key=True),
+            Column("data", String(50)),
+            Column("x", Integer, index=True),
+        )
+        self.t1.create(self.conn)
+        self.conn.execute(
+            self.t1.insert(),
+            [{"id": 1, "data": "d1", "x": 5}, {"id": 2, "data": "d2", "x": 6}],
+        )
+        context = MigrationContext.configure(self.conn)
+        self.op = Operations(context)
+
+        self.added = 0
+        self.statements = []
+
+        @event.listens_for(self.conn, "before_cursor_execute")
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            self.statements.append(statement)
+
+    def tearDown(self):
+        self.metadata.drop_all(self.conn)
+        self.conn.close()
+
+    def _recreate(self, **kw):
+        self.added += 1
+        with self.op.batch_alter_table(
+            "foo", recreate="always", **kw
+        ) as batch_op:
+            batch_op.add_column(Column("q%d" % self.added, Integer))
+
+    def _assert_reflected(self, reflected):
+        del self.statements[:]
+        self._recreate()
+        eq_(
+            any("foreign_key_list" in stmt for stmt in self.statements),
+            reflected,
+        )
+
+    def test_reuse(self):
+        self._recreate()
+        self._assert_reflected(False)
+
+        insp = inspect(self.conn)
+        eq_(
+            [col["name"] for col in insp.get_columns("foo")],
+            ["id", "data", "x", "q1", "q2"],
+        )
+        eq_([idx["column_names"] for idx in insp.get_indexes("foo")], [["x"]])
+        eq_(
+            [
+                tuple(row)
+                for row in self.conn.execute(
+                    text("select id, data, x from foo order by id")
+                )
+            ],
+            [(1, "d1", 5), (2, "d2", 6)],
+        )
+
+    def test_new_index_retained(self):
+        with self.op.batch_alter_table("foo", recreate="always") as batch_op:
+            batch_op.create_index("ix_data", ["data"])
+        self._assert_reflected(False)
+
+        eq_(
+            sorted(
+                idx["name"] for idx in inspect(self.conn).get_indexes("foo")
+            ),
+            ["ix_data", "ix_foo_x"],
+        )
+
+    def test_rename_column_reflects(self):
+        with self.op.batch_alter_table("foo", recreate="always") as batch_op:
+            batch_op.alter_column("data", new_column_name="newdata")
+        self._assert_reflected(True)
+        self._assert_reflected(False)
+
+    def test_dml_retains(self):
+        self._recreate()
+        self.op.bulk_insert(self.t1, [{"id": 3, "data": "d3", "x": 7}])
+        self._assert_reflected(False)
+
+    def test_alter_invalidates(self):
+        self._recreate()
+        self.op.add_column("foo", Column("y", Integer))
+        self._assert_reflected(True)
+        assert "y" in [
+            col["name"] for col in inspect(self.conn).get_columns("foo")
+        ]
+
+    def test_other_table_retains(self):
+        self._recreate()
+        self.op.create_table("bar", Column("id", Integer, primary_key=True))
+        self.op.drop_table("bar")
+        self._assert_reflected(False)
+
+    def test_rename_invalidates(self):
+        self._recreate()
+        self.op.rename_table("foo", "bar")
+        self.op.rename_table("bar", "foo")
+        self._assert_reflected(True)
+
+    def test_plain_sql_invalidates(self):
+        self._recreate()
+        self.op.execute("ALTER TABLE foo ADD COLUMN y INTEGER")
+        self._assert_reflected(True)
+
+    def test_get_bind_invalidates(self):
+        self._recreate()
+        self.op.get_bind().execute(
+            text("ALTER TABLE foo ADD COLUMN y INTEGER")
+        )
+        self._assert_reflected(True)
+
+    def test_reflect_args_bypass(self):
+        self._recreate()
+        del self.statements[:]
+        self._recreate(reflect_args=[Column("data", String(100))])
+        assert any("foreign_key_list" in stmt for stmt in self.statements)
+
+
 class BatchRoundTripMySQLTest(BatchRoundTripTest):
     __only_on__ = "mysql"
     __backend__ = True
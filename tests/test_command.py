@@ -13,10 +13,12 @@ from alembic import command
 from alembic import config
 from alembic import testing
 from alembic import util
+from alembic.runtime.status import check_database
 from alembic.script import ScriptDirectory
 from alembic.testing import assert_raises
 from alembic.testing import assert_raises_message
 from alembic.testing import eq_
+from alembic.testing import is_
 from alembic.testing import is_false
 from alembic.testing import is_true
 from alembic.testing import mock
@@ -316,6 +318,23 @@ finally:
         self._env_fixture()
         command.revision(self.cfg, autogenerate=True)
 
+    def test_create_rev_autogen_profile(self):
+        self._env_fixture()
+        with mock.patch.object(self.cfg, "print_stdout") as print_stdout:
+            command.revision(self.cfg, autogenerate=True, profile=True)
+
+        report = print_stdout.mock_calls[0][1][0]
+        assert report.startswith("Autogenerate profile:")
+        assert re.search(r"phase +compare +1 ", report)
+        assert re.search(r"phase +render +1 ", report)
+
+    def test_create_rev_autogen_no_profile(self):
+        self._env_fixture()
+        with mock.patch.object(self.cfg, "print_stdout") as print_stdout:
+            command.revision(self.cfg, autogenerate=True)
+
+        eq_(print_stdout.mock_calls, [])
+
     def test_create_rev_autogen_db_not_up_to_date(self):
         self._env_fixture()
         assert command.revision(self.cfg)
@@ -897,6 +916,483 @@ down_revision = '%s'
             )
 
 
+class ImpactTest(_BufMixin, TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.bind = _sqlite_file_db()
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.a = a = util.rev_id()
+        self.b = b = util.rev_id()
+        script = ScriptDirectory.from_config(self.cfg)
+        script.generate_revision(a, None, refresh=True)
+        write_script(
+            script,
+            a,
+            """
+from alembic import op
+import sqlalchemy as sa
+
+revision = '%s'
+down_revision = None
+
+def upgrade():
+    op.create_table("account", sa.Column("id", sa.Integer, primary_key=True))
+    op.execute("INSERT INTO account (id) VALUES (1), (2), (3)")
+
+def downgrade():
+    op.drop_table("account")
+"""
+            % a,
+        )
+        script.generate_revision(b, None, refresh=True)
+        write_script(
+            script,
+            b,
+            """
+from alembic import op
+import sqlalchemy as sa
+
+revision = '%s'
+down_revision = '%s'
+
+def upgrade():
+    op.add_column("account", sa.Column("name", sa.String(50)))
+    op.create_index("ix_account_name", "account", ["name"])
+    op.alter_column("account", "id", new_column_name="account_id")
+
+def downgrade():
+    pass
+"""
+            % (b, a),
+        )
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def _summary(self, report):
+        return [
+            (
+                impact.revision,
+                type(impact.operation).__name__,
+                impact.table_name,
+                impact.impact,
+                impact.rows,
+            )
+            for impact in report.impacts
+        ]
+
+    def test_impact_from_current(self):
+        command.upgrade(self.cfg, self.a)
+        self.cfg.stdout = buf = self._buf_fixture()
+
+        report = command.impact(self.cfg, "head")
+
+        eq_(
+            self._summary(report),
+            [
+                (self.b, "AddColumnOp", "account", "metadata-only", 3),
+                (self.b, "CreateIndexOp", "account", "index build", 3),
+                (self.b, "AlterColumnOp", "account", "metadata-only", 3),
+            ],
+        )
+        output = buf.getvalue().decode("ascii")
+        assert "AddColumnOp" in output
+        assert "index build" in output
+
+        # nothing was run
+        with self.bind.connect() as conn:
+            eq_(
+                conn.scalar(text("select version_num from alembic_version")),
+                self.a,
+            )
+            eq_(
+                [
+                    row[1]
+                    for row in conn.execute(text("PRAGMA table_info(account)"))
+                ],
+                ["id"],
+            )
+
+    def test_impact_offline_range(self):
+        self.cfg.stdout = self._buf_fixture()
+
+        report = command.impact(self.cfg, "base:head")
+
+        eq_(
+            self._summary(report),
+            [
+                (self.a, "CreateTableOp", "account", "metadata-only", None),
+                (self.a, "ExecuteSQLOp", None, "unclassified", None),
+                (self.b, "AddColumnOp", "account", "metadata-only", None),
+                (self.b, "CreateIndexOp", "account", "index build", None),
+                # the SQLite version isn't known in offline mode
+                (self.b, "AlterColumnOp", "account", "full rewrite", None),
+            ],
+        )
+        with self.bind.connect() as conn:
+            assert not _connectable_has_table(conn, "alembic_version", None)
+
+    def test_impact_nothing_pending(self):
+        command.upgrade(self.cfg, "head")
+        self.cfg.stdout = buf = self._buf_fixture()
+
+        report = command.impact(self.cfg, "head")
+
+        eq_(report.impacts, [])
+        assert "No operations are pending." in buf.getvalue().decode("ascii")
+
+
+class CheckDatabaseTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.bind = _sqlite_file_db()
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.a, self.b, self.c = three_rev_fixture(self.cfg)
+        self.script_location = self.cfg.get_main_option("script_location")
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def _check(self):
+        return check_database(self.bind, self.script_location)
+
+    def _stamp(self, *revs):
+        with self.bind.connect() as conn:
+            conn.execute(text("DELETE FROM alembic_version"))
+            for rev in revs:
+                conn.execute(
+                    text("INSERT INTO alembic_version VALUES (:rev)"), rev=rev
+                )
+
+    def test_write_manifest(self):
+        command.heads(self.cfg, write_manifest=True)
+        script = ScriptDirectory.from_config(self.cfg)
+        eq_(
+            script.read_heads_manifest(),
+            ((self.c,), set([self.a, self.b, self.c])),
+        )
+
+    def test_no_version_table(self):
+        status = self._check()
+        eq_(status.status, "behind")
+        eq_(status.database_heads, ())
+        eq_(status.script_heads, (self.c,))
+
+    def test_up_to_date_without_loading_scripts(self):
+        command.heads(self.cfg, write_manifest=True)
+        command.stamp(self.cfg, "head")
+        with mock.patch.object(
+            ScriptDirectory, "_load_revisions", side_effect=AssertionError
+        ):
+            status = self._check()
+        is_true(status.is_current)
+        eq_(status.database_heads, (self.c,))
+
+    def test_behind(self):
+        command.stamp(self.cfg, self.a)
+        eq_(self._check().status, "behind")
+
+    def test_ahead(self):
+        command.stamp(self.cfg, "head")
+        self._stamp("unknown")
+        eq_(self._check().status, "ahead")
+
+    def test_diverged(self):
+        command.stamp(self.cfg, "head")
+        self._stamp("unknown", self.a)
+        status = self._check()
+        eq_(status.status, "diverged")
+        is_false(status.is_current)
+
+    def test_config(self):
+        command.stamp(self.cfg, "head")
+        location = os.path.join(self.env.dir, "model1")
+        os.rename(self.env.versions, location)
+        self.cfg.set_main_option("version_locations", location)
+        is_true(check_database(self.bind, self.cfg).is_current)
+
+    def _manifest_mtime(self):
+        return os.path.getmtime(
+            ScriptDirectory.from_config(self.cfg).heads_manifest_location
+        )
+
+    def test_stale_manifest_modified_revision(self):
+        command.heads(self.cfg, write_manifest=True)
+        command.stamp(self.cfg, "head")
+        path = self.env.get_revision(self.c).path
+        with open(path, "w") as file_:
+            file_.write(
+                "revision = '%s'\ndown_revision = '%s'\n" % (self.c, self.a)
+            )
+        mtime = self._manifest_mtime() + 10
+        os.utime(path, (mtime, mtime))
+        status = self._check()
+        eq_(status.status, "behind")
+        eq_(set(status.script_heads), set([self.b, self.c]))
+
+    def test_stale_manifest_added_revision(self):
+        command.heads(self.cfg, write_manifest=True)
+        command.stamp(self.cfg, "head")
+        d = util.rev_id()
+        script = ScriptDirectory.from_config(self.cfg)
+        path = script.generate_revision(d, "revision d", head=self.c).path
+        mtime = self._manifest_mtime() - 10
+        os.utime(path, (mtime, mtime))
+        status = self._check()
+        eq_(status.status, "behind")
+        eq_(status.script_heads, (d,))
+
+    def test_manifest_option(self):
+        self.cfg.set_main_option("heads_manifest", "true")
+        command.heads(self.cfg, write_manifest=True)
+        d = util.rev_id()
+        command.revision(self.cfg, "d", rev_id=d)
+        script = ScriptDirectory.from_config(self.cfg)
+        eq_(
+            script.read_heads_manifest(),
+            ((d,), set([self.a, self.b, self.c, d])),
+        )
+
+
+class MigrationSessionTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.bind = _sqlite_file_db()
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.a, self.b, self.c = [
+            self.env.generate_revision(util.rev_id(), name).revision
+            for name in ("a", "b", "c")
+        ]
+        env_file_fixture(
+            """
+connection = config.attributes["connection"]
+config.attributes.setdefault("connections", []).append(connection)
+context.configure(connection=connection)
+with context.begin_transaction():
+    context.run_migrations()
+"""
+        )
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def test_setup_once(self):
+        load_revisions = ScriptDirectory._load_revisions
+        with self.bind.connect() as conn:
+            with mock.patch.object(
+                ScriptDirectory,
+                "_load_revisions",
+                autospec=True,
+                side_effect=load_revisions,
+            ) as load:
+                session = command.MigrationSession(self.cfg, connection=conn)
+                session.upgrade("head")
+                with mock.patch(
+                    "alembic.script.base.util.load_python_file"
+                ) as load_python_file:
+                    session.downgrade("base")
+                    session.upgrade(self.b)
+                    session.stamp("head")
+            eq_(load.call_count, 1)
+            eq_(load_python_file.call_count, 0)
+            eq_(self.cfg.attributes["connections"], [conn] * 4)
+            eq_(
+                conn.scalar(text("SELECT version_num FROM alembic_version")),
+                self.c,
+            )
+
+    def test_run(self):
+        with self.bind.connect() as conn:
+            session = command.MigrationSession(self.cfg, connection=conn)
+            session.run(command.upgrade, self.a, tag="t")
+            eq_(
+                conn.scalar(text("SELECT version_num FROM alembic_version")),
+                self.a,
+            )
+
+    def test_revision_seen_by_session(self):
+        with self.bind.connect() as conn:
+            session = command.MigrationSession(self.cfg, connection=conn)
+            d = util.rev_id()
+            session.run(command.revision, "d", rev_id=d)
+            session.upgrade("head")
+            eq_(
+                conn.scalar(text("SELECT version_num FROM alembic_version")),
+                d,
+            )
+
+    def test_refresh(self):
+        with self.bind.connect() as conn:
+            session = command.MigrationSession(self.cfg, connection=conn)
+            session.upgrade("head")
+            d = util.rev_id()
+            script = ScriptDirectory(
+                self.cfg.get_main_option("script_location")
+            )
+            script.generate_revision(d, "d")
+            assert_raises_message(
+                util.CommandError,
+                "Can't locate revision identified by '%s'" % d,
+                session.upgrade,
+                d,
+            )
+            session.refresh()
+            session.upgrade(d)
+            eq_(
+                conn.scalar(text("SELECT version_num FROM alembic_version")),
+                d,
+            )
+
+
+class StairwayTest(_BufMixin, TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.revs = []
+        for idx in range(5):
+            self._revision(
+                "op.create_table('t%d', sa.Column('id', sa.Integer))" % idx,
+                "op.drop_table('t%d')" % idx,
+            )
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def _revision(self, upgrade, downgrade):
+        rev = util.rev_id()
+        down = self.revs[-1] if self.revs else None
+        self.env.generate_revision(rev, rev, head=down or "base", splice=True)
+        write_script(
+            self.env,
+            rev,
+            """
+revision = '%s'
+down_revision = %r
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    %s
+
+def downgrade():
+    %s
+"""
+            % (rev, down, upgrade, downgrade),
+        )
+        self.revs.append(rev)
+        return rev
+
+    def _statuses(self, results):
+        return [(result.revision, result.status) for result in results]
+
+    def test_serial(self):
+        self.cfg.stdout = buf = self._buf_fixture()
+        results = command.stairway(self.cfg, workers=1, segments=2)
+        eq_(self._statuses(results), [(rev, "passed") for rev in self.revs])
+        output = buf.getvalue().decode("ascii")
+        assert "Stairway verification:" in output
+        for rev in self.revs:
+            assert re.search(r"%s +passed +\d+\.\d\ds" % rev, output)
+
+    def test_parallel(self):
+        self.cfg.stdout = self._buf_fixture()
+        results = command.stairway(self.cfg, workers=2, segments=3)
+        eq_(self._statuses(results), [(rev, "passed") for rev in self.revs])
+
+    def test_segments_start_from_snapshot(self):
+        self.cfg.stdout = self._buf_fixture()
+        with mock.patch.object(
+            command, "upgrade", side_effect=command.upgrade
+        ) as upgrade:
+            command.stairway(self.cfg, workers=1, segments=2)
+        # the seed database is upgraded to the boundary revision once;
+        # each revision is then upgraded twice by its segment
+        eq_(
+            [call[1][1] for call in upgrade.mock_calls],
+            [self.revs[1]] + [rev for rev in self.revs for i in range(2)],
+        )
+
+    def _count_loads(self, **kw):
+        load_revisions = ScriptDirectory._load_revisions
+        with mock.patch.object(
+            ScriptDirectory,
+            "_load_revisions",
+            autospec=True,
+            side_effect=load_revisions,
+        ) as loads:
+            command.stairway(self.cfg, **kw)
+        return loads.call_count
+
+    def test_revisions_loaded_once_per_segment(self):
+        self.cfg.stdout = self._buf_fixture()
+        count = self._count_loads(workers=1, segments=2)
+        for idx in range(5, 10):
+            self._revision(
+                "op.create_table('t%d', sa.Column('id', sa.Integer))" % idx,
+                "op.drop_table('t%d')" % idx,
+            )
+        # the number of loads doesn't grow with the number of revisions
+        eq_(self._count_loads(workers=1, segments=2), count)
+
+    def test_connection_attribute_kept(self):
+        self.cfg.stdout = self._buf_fixture()
+        connection = mock.Mock()
+        self.cfg.attributes["connection"] = connection
+        command.stairway(self.cfg, workers=1, segments=2)
+        is_(self.cfg.attributes["connection"], connection)
+        is_(self.cfg._script_directory, None)
+
+    def test_branches(self):
+        self.revs.append(self.revs[1])
+        branch = self._revision(
+            "op.create_table('branch', sa.Column('id', sa.Integer))",
+            "op.drop_table('branch')",
+        )
+        del self.revs[-2]
+        self.cfg.stdout = self._buf_fixture()
+        results = command.stairway(self.cfg, workers=1, segments=2)
+        eq_(
+            sorted(self._statuses(results)),
+            sorted([(rev, "passed") for rev in self.revs]),
+        )
+        assert branch in self.revs
+
+    def test_failure(self):
+        bad = self._revision(
+            "op.create_table('bad', sa.Column('id', sa.Integer))", "pass"
+        )
+        after = self._revision(
+            "op.create_table('after', sa.Column('id', sa.Integer))",
+            "op.drop_table('after')",
+        )
+        self.cfg.stdout = buf = self._buf_fixture()
+        assert_raises_message(
+            util.CommandError,
+            r"1 revision\(s\) failed round trip verification",
+            command.stairway,
+            self.cfg,
+            workers=1,
+            segments=1,
+        )
+        output = buf.getvalue().decode("ascii")
+        assert re.search(r"%s +failed" % bad, output)
+        assert re.search(r"%s +skipped" % after, output)
+        assert re.search(
+            r"Failures:\n  %s: OperationalError: .*table bad already exists"
+            % bad,
+            output,
+        )
+
+
 class EditTest(TestBase):
     @classmethod
     def setup_class(cls):
@@ -9,6 +9,7 @@ from alembic import util
 from alembic.testing import assert_raises_message
 from alembic.testing import config
 from alembic.testing import eq_
+from alembic.testing import mock
 from alembic.testing.env import _no_sql_testing_config
 from alembic.testing.env import clear_staging_env
 from alembic.testing.env import staging_env
@@ -91,6 +92,67 @@ class OpTest(TestBase):
         )
         context.assert_("ALTER TABLE tests ALTER COLUMN col BIT NOT NULL")
 
+    def test_lock_timeout(self):
+        context = op_fixture("mssql", as_sql=True)
+        context.impl.lock_timeout = 0.5
+        op.drop_index("my_idx", "my_table")
+        context.assert_(
+            "SET LOCK_TIMEOUT 500", "GO", "DROP INDEX my_idx ON my_table", "GO"
+        )
+
+    def _lock_connection(self, context, in_transaction, result):
+        conn = context.impl.connection = mock.Mock()
+        conn.in_transaction.return_value = in_transaction
+        conn.execute.return_value.scalar.return_value = result
+        return conn
+
+    def _executed(self, conn):
+        return [
+            str(call[1][0])
+            for call in conn.execute.mock_calls
+            if call[0] == ""
+        ]
+
+    def test_migration_lock(self):
+        context = op_fixture("mssql")
+        conn = self._lock_connection(context, True, 0)
+        with context.impl.migration_lock("alembic:alembic_version", None):
+            pass
+        eq_(
+            self._executed(conn),
+            [
+                "SET NOCOUNT ON; DECLARE @result INTEGER; "
+                "EXEC @result = sp_getapplock @Resource = :key, "
+                "@LockMode = 'Exclusive', @LockOwner = 'Transaction', "
+                "@LockTimeout = -1; SELECT @result"
+            ],
+        )
+
+    def test_migration_lock_no_transaction(self):
+        context = op_fixture("mssql")
+        conn = self._lock_connection(context, False, 1)
+        with context.impl.migration_lock("alembic:alembic_version", None):
+            pass
+        executed = self._executed(conn)
+        assert "@LockOwner = 'Session'" in executed[0]
+        eq_(
+            executed[1],
+            "EXEC sp_releaseapplock @Resource = :key, "
+            "@LockOwner = 'Session'",
+        )
+
+    def test_migration_lock_not_acquired(self):
+        context = op_fixture("mssql")
+        self._lock_connection(context, True, -3)
+        assert_raises_message(
+            util.CommandError,
+            r"Could not acquire migration lock 'alembic:alembic_version' "
+            r"\(sp_getapplock returned -3\)",
+            context.impl.migration_lock(
+                "alembic:alembic_version", None
+            ).__enter__,
+        )
+
     def test_drop_index(self):
         context = op_fixture("mssql")
         op.drop_index("my_idx", "my_table")
@@ -354,3 +416,43 @@ class OpTest(TestBase):
         context.assert_contains(
             "CREATE INDEX ix_mytable_a_b ON mytable " "(col_a, col_b)"
         )
+
+    def test_create_index_mssql_online(self):
+        context = op_fixture("mssql")
+        op.create_index(
+            "ix_t_c",
+            "t",
+            ["c"],
+            mssql_include=["d"],
+            mssql_online=True,
+            mssql_maxdop=4,
+            mssql_resumable=True,
+        )
+        context.assert_contains(
+            "CREATE INDEX ix_t_c ON t (c) INCLUDE (d) "
+            "WITH (ONLINE = ON, MAXDOP = 4, RESUMABLE = ON)"
+        )
+
+    def test_create_index_mssql_online_context_default(self):
+        context = op_fixture("mssql", as_sql=True)
+        context.impl.context_opts.update(mssql_online=True, mssql_maxdop=2)
+        op.create_index("ix_t_c", "t", ["c"])
+        op.create_index("ix_t_d", "t", ["d"], mssql_online=False)
+        context.assert_(
+            "CREATE INDEX ix_t_c ON t (c) WITH (ONLINE = ON, MAXDOP = 2)",
+            "GO",
+            "CREATE INDEX ix_t_d ON t (d) WITH (ONLINE = OFF, MAXDOP = 2)",
+            "GO",
+        )
+
+    def test_rebuild_index_mssql(self):
+        context = op_fixture("mssql")
+        op.rebuild_index("ix_t_c", "t", schema="s")
+        op.rebuild_index(
+            "ix_t_c", "t", mssql_online=True, mssql_resumable=False
+        )
+        context.assert_(
+            "ALTER INDEX ix_t_c ON s.t REBUILD",
+            "ALTER INDEX ix_t_c ON t REBUILD "
+            "WITH (ONLINE = ON, RESUMABLE = OFF)",
+        )
@@ -1,3 +1,5 @@
+import sqlite3
+
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DATETIME
@@ -11,9 +13,15 @@ from sqlalchemy import TIMESTAMP
 
 from alembic import op
 from alembic import util
+from alembic.ddl.mysql import MySQLImpl
 from alembic.migration import MigrationContext
+from alembic.operations import ops
+from alembic.runtime import impact
 from alembic.testing import assert_raises_message
 from alembic.testing import config
+from alembic.testing import eq_
+from alembic.testing import mock
+from alembic.testing.env import _sqlite_file_db
 from alembic.testing.env import clear_staging_env
 from alembic.testing.env import staging_env
 from alembic.testing.fixtures import AlterColRoundTripFixture
@@ -24,6 +32,90 @@ from alembic.util import sqla_compat
 
 class MySQLOpTest(TestBase):
     @config.requirements.comments_api
+    def test_lock_timeout(self):
+        context = op_fixture("mysql", as_sql=True)
+        context.impl.lock_timeout = 2.5
+        op.drop_column("t", "c")
+        context.assert_(
+            "SET SESSION lock_wait_timeout = 3", "ALTER TABLE t DROP COLUMN c"
+        )
+
+    def _run_migrations(self, context, fn):
+        def migrations_fn(heads, context):
+            fn()
+            return []
+
+        context._migrations_fn = migrations_fn
+        context.run_migrations()
+
+    def test_lock_timeout_reset(self):
+        context = op_fixture("mysql", as_sql=True)
+        context.impl.lock_timeout = 2.5
+        self._run_migrations(context, lambda: op.drop_column("t", "c"))
+        context.assert_(
+            "SET SESSION lock_wait_timeout = 3",
+            "ALTER TABLE t DROP COLUMN c",
+            "DROP TABLE alembic_version",
+            "SET SESSION lock_wait_timeout = DEFAULT",
+        )
+
+    def test_lock_timeout_reset_on_error(self):
+        context = op_fixture("mysql", as_sql=True)
+        context.impl.lock_timeout = 2.5
+
+        def fn():
+            op.drop_column("t", "c")
+            raise Exception("failed")
+
+        assert_raises_message(
+            Exception, "failed", self._run_migrations, context, fn
+        )
+        context.assert_(
+            "SET SESSION lock_wait_timeout = 3",
+            "ALTER TABLE t DROP COLUMN c",
+            "SET SESSION lock_wait_timeout = DEFAULT",
+        )
+
+    def _lock_connection(self, context, result):
+        conn = context.impl.connection = mock.Mock()
+        conn.in_transaction.return_value = False
+        conn.execute.return_value.scalar.return_value = result
+        return conn
+
+    def test_migration_lock(self):
+        context = op_fixture("mysql")
+        conn = self._lock_connection(context, 1)
+        with context.impl.migration_lock("alembic:" + "x" * 70, None):
+            eq_(conn.execute.call_count, 1)
+        eq_(
+            [
+                (str(call[1][0]), call[2])
+                for call in conn.execute.mock_calls
+                if call[0] == ""
+            ],
+            [
+                (
+                    "SELECT GET_LOCK(:name, -1)",
+                    {"name": "alembic:" + "x" * 56},
+                ),
+                (
+                    "SELECT RELEASE_LOCK(:name)",
+                    {"name": "alembic:" + "x" * 56},
+                ),
+            ],
+        )
+
+    def test_migration_lock_not_acquired(self):
+        context = op_fixture("mysql")
+        self._lock_connection(context, None)
+        assert_raises_message(
+            util.CommandError,
+            "Could not acquire migration lock 'alembic:alembic_version'",
+            context.impl.migration_lock(
+                "alembic:alembic_version", None
+            ).__enter__,
+        )
+
     def test_create_table_with_comment(self):
         context = op_fixture("mysql")
         op.create_table(
@@ -439,6 +531,271 @@ class MySQLOpTest(TestBase):
             "t1",
         )
 
+    def test_coalesce_alter_table(self):
+        context = op_fixture("mysql")
+        with context.impl.coalesce_alter_table():
+            op.add_column("t", Column("q", Integer))
+            op.alter_column("t", "r", nullable=False, existing_type=Integer)
+            op.alter_column(
+                "t", "s", new_column_name="s2", existing_type=Integer
+            )
+            op.drop_constraint("fk_x", "t", type_="foreignkey")
+            op.drop_column("t", "x")
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER, "
+            "MODIFY r INTEGER NOT NULL, CHANGE s s2 INTEGER NULL, "
+            "DROP FOREIGN KEY fk_x, DROP COLUMN x"
+        )
+
+    def test_coalesce_alter_table_rename_not_combined(self):
+        context = op_fixture("mysql")
+        with context.impl.coalesce_alter_table():
+            op.alter_column(
+                "t", "s", new_column_name="s2", existing_type=Integer
+            )
+            op.alter_column("t", "s2", nullable=False, existing_type=Integer)
+        context.assert_(
+            "ALTER TABLE t CHANGE s s2 INTEGER NULL",
+            "ALTER TABLE t MODIFY s2 INTEGER NOT NULL",
+        )
+
+    def test_add_column_online_ddl(self):
+        context = op_fixture("mysql")
+        op.add_column(
+            "t",
+            Column("q", Integer),
+            mysql_algorithm="instant",
+            mysql_lock="none",
+        )
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER, ALGORITHM=INSTANT, LOCK=NONE"
+        )
+
+    def test_drop_column_online_ddl(self):
+        context = op_fixture("mysql")
+        op.drop_column("t", "q", mysql_algorithm="INPLACE")
+        context.assert_("ALTER TABLE t DROP COLUMN q, ALGORITHM=INPLACE")
+
+    def test_alter_column_online_ddl(self):
+        context = op_fixture("mysql")
+        op.alter_column(
+            "t",
+            "c",
+            nullable=False,
+            existing_type=Integer,
+            mysql_algorithm="INPLACE",
+            mysql_lock="NONE",
+        )
+        op.alter_column(
+            "t",
+            "c",
+            new_column_name="d",
+            existing_type=Integer,
+            mysql_algorithm="INSTANT",
+        )
+        op.alter_column("t", "c", server_default="5", mysql_lock="SHARED")
+        context.assert_(
+            "ALTER TABLE t MODIFY c INTEGER NOT NULL, "
+            "ALGORITHM=INPLACE, LOCK=NONE",
+            "ALTER TABLE t CHANGE c d INTEGER NULL, ALGORITHM=INSTANT",
+            "ALTER TABLE t ALTER COLUMN c SET DEFAULT '5', LOCK=SHARED",
+        )
+
+    def test_index_online_ddl(self):
+        context = op_fixture("mysql")
+        op.create_index(
+            "ix_t_c", "t", ["c"], mysql_algorithm="INPLACE", mysql_lock="NONE"
+        )
+        op.drop_index("ix_t_c", "t", mysql_algorithm="INPLACE")
+        context.assert_(
+            "CREATE INDEX ix_t_c ON t (c) ALGORITHM=INPLACE LOCK=NONE",
+            "DROP INDEX ix_t_c ON t ALGORITHM=INPLACE",
+        )
+
+    def test_online_ddl_context_default(self):
+        context = op_fixture("mysql")
+        context.impl.context_opts.update(
+            mysql_algorithm="INPLACE", mysql_lock="NONE"
+        )
+        op.add_column("t", Column("q", Integer))
+        op.drop_column("t", "q", mysql_algorithm="INSTANT")
+        op.create_index("ix_t_c", "t", ["c"])
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER, ALGORITHM=INPLACE, LOCK=NONE",
+            "ALTER TABLE t DROP COLUMN q, ALGORITHM=INSTANT, LOCK=NONE",
+            "CREATE INDEX ix_t_c ON t (c) ALGORITHM=INPLACE LOCK=NONE",
+        )
+
+    def test_online_ddl_unknown(self):
+        op_fixture("mysql")
+        assert_raises_message(
+            util.CommandError,
+            "Unknown MySQL ALGORITHM option 'FAST'; expected one of "
+            "DEFAULT, INSTANT, INPLACE, NOCOPY, COPY",
+            op.drop_column,
+            "t",
+            "q",
+            mysql_algorithm="fast",
+        )
+
+    def test_online_ddl_not_coalesced(self):
+        context = op_fixture("mysql")
+        with context.impl.coalesce_alter_table():
+            op.add_column("t", Column("q", Integer))
+            op.add_column("t", Column("r", Integer), mysql_algorithm="INSTANT")
+            op.drop_column("t", "x")
+            op.drop_column("t", "y")
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER",
+            "ALTER TABLE t ADD COLUMN r INTEGER, ALGORITHM=INSTANT",
+            "ALTER TABLE t DROP COLUMN x, DROP COLUMN y",
+        )
+
+
+class MySQLMigrationLockReleaseTest(TestBase):
+    """Run the MySQL migration lock against a SQLite database, where
+    GET_LOCK() and RELEASE_LOCK() are emulated by functions which record
+    the version visible to another connection upon release."""
+
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        staging_env()
+        self.bind = _sqlite_file_db()
+        self.conn = self.bind.connect()
+        self.conn.execute(
+            "CREATE TABLE alembic_version (version_num VARCHAR(32))"
+        )
+        self.conn.execute("INSERT INTO alembic_version VALUES ('a')")
+        self.observer = sqlite3.connect(self.bind.url.database)
+        self.released = []
+        self.conn.connection.create_function(
+            "GET_LOCK", 2, lambda name, timeout: 1
+        )
+        self.conn.connection.create_function(
+            "RELEASE_LOCK", 1, self._release_lock
+        )
+
+    def tearDown(self):
+        self.observer.close()
+        self.conn.close()
+        self.bind.dispose()
+        clear_staging_env()
+
+    def _release_lock(self, name):
+        self.released.append(
+            self.observer.execute(
+                "SELECT version_num FROM alembic_version"
+            ).fetchone()[0]
+        )
+        return 1
+
+    def _context(self, transactional_ddl=True, fn=None):
+        def migrate(heads, context):
+            self.conn.execute("UPDATE alembic_version SET version_num='b'")
+            return []
+
+        context = MigrationContext.configure(
+            self.conn, opts={"migration_lock": True, "fn": fn or migrate}
+        )
+        context.impl = MySQLImpl(
+            self.conn.dialect, self.conn, False, transactional_ddl, None, {}
+        )
+        return context
+
+    def test_released_after_commit(self):
+        context = self._context()
+        with context.begin_transaction():
+            context.run_migrations()
+            eq_(self.released, [])
+        eq_(self.released, ["b"])
+
+    def test_released_after_rollback(self):
+        context = self._context()
+
+        def go():
+            with context.begin_transaction():
+                context.run_migrations()
+                raise Exception("failed")
+
+        assert_raises_message(Exception, "failed", go)
+        eq_(self.released, ["a"])
+
+    def test_released_after_failed_migration(self):
+        def fail(heads, context):
+            self.conn.execute("UPDATE alembic_version SET version_num='b'")
+            raise Exception("failed")
+
+        context = self._context(fn=fail)
+
+        def go():
+            with context.begin_transaction():
+                context.run_migrations()
+
+        assert_raises_message(Exception, "failed", go)
+        eq_(self.released, ["a"])
+
+    def test_released_after_explicit_commit(self):
+        context = self._context()
+        trans = context.begin_transaction()
+        context.run_migrations()
+        eq_(self.released, [])
+        trans.commit()
+        eq_(self.released, ["b"])
+
+        context.begin_transaction().__exit__(None, None, None)
+        eq_(self.released, ["b"])
+
+    def test_released_after_block_without_transaction(self):
+        context = self._context(transactional_ddl=False)
+        with context.begin_transaction():
+            context.run_migrations()
+            eq_(self.released, [])
+        eq_(self.released, ["b"])
+
+    def test_released_without_block(self):
+        context = self._context()
+        context.run_migrations()
+        eq_(self.released, ["b"])
+
+
+class MySQLImpactTest(TestBase):
+    def _classify(self, operation, server_version_info):
+        context = op_fixture("mysql")
+        context.dialect.server_version_info = server_version_info
+        return impact.classifiers.dispatch(operation, "mysql")(
+            context.impl, operation
+        )
+
+    def test_add_column(self):
+        operation = ops.AddColumnOp("t", Column("c", Integer))
+        eq_(self._classify(operation, (8, 0, 20)), impact.METADATA_ONLY)
+        eq_(self._classify(operation, (5, 7, 30)), impact.FULL_REWRITE)
+        eq_(
+            self._classify(operation, (10, 3, 2, "MariaDB")),
+            impact.METADATA_ONLY,
+        )
+        eq_(self._classify(operation, None), impact.FULL_REWRITE)
+
+    def test_drop_column(self):
+        operation = ops.DropColumnOp("t", "c")
+        eq_(self._classify(operation, (8, 0, 29)), impact.METADATA_ONLY)
+        eq_(self._classify(operation, (8, 0, 20)), impact.FULL_REWRITE)
+
+    def test_alter_column(self):
+        eq_(
+            self._classify(
+                ops.AlterColumnOp("t", "c", modify_name="d"), (5, 7, 30)
+            ),
+            impact.METADATA_ONLY,
+        )
+        eq_(
+            self._classify(
+                ops.AlterColumnOp("t", "c", modify_nullable=False), (8, 0, 30)
+            ),
+            impact.FULL_REWRITE,
+        )
+
 
 class MySQLBackendOpTest(AlterColRoundTripFixture, TestBase):
     __only_on__ = "mysql"
@@ -1,14 +1,20 @@
+import os
 import re
+import threading
 
 from alembic import command
 from alembic import util
+from alembic.runtime import offline
 from alembic.testing import assert_raises_message
+from alembic.testing import eq_
+from alembic.testing.env import _get_staging_directory
 from alembic.testing.env import _no_sql_testing_config
 from alembic.testing.env import clear_staging_env
 from alembic.testing.env import env_file_fixture
 from alembic.testing.env import multi_heads_fixture
 from alembic.testing.env import staging_env
 from alembic.testing.env import three_rev_fixture
+from alembic.testing.env import write_script
 from alembic.testing.fixtures import capture_context_buffer
 from alembic.testing.fixtures import TestBase
 
@@ -317,3 +323,181 @@ context.run_migrations()
         command.upgrade(self.cfg, "%s:%s" % (a, b[0:4]), sql=True)
         command.stamp(self.cfg, b[0:4], sql=True)
         command.downgrade(self.cfg, "%s:%s" % (c, b[0:4]), sql=True)
+
+
+class OfflineStatementsTest(TestBase):
+    def setUp(self):
+        self.env = staging_env()
+        self.cfg = _no_sql_testing_config()
+
+        global a, b, c
+        a, b, c = three_rev_fixture(self.cfg)
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def _statements(self, revision, **kw):
+        return [
+            (stmt.revision, stmt.kind, stmt.text)
+            for stmt in offline.iter_statements(self.cfg, revision, **kw)
+        ]
+
+    def test_iter_statements_upgrade(self):
+        eq_(
+            self._statements("%s:%s" % (a, c)),
+            [
+                (None, "transaction", "BEGIN;"),
+                (b, "comment", "-- Running upgrade %s -> %s" % (a, b)),
+                (b, "other", "CREATE STEP 2;"),
+                (
+                    b,
+                    "version",
+                    "UPDATE alembic_version SET version_num='%s' "
+                    "WHERE alembic_version.version_num = '%s';" % (b, a),
+                ),
+                (c, "comment", "-- Running upgrade %s -> %s" % (b, c)),
+                (c, "other", "CREATE STEP 3;"),
+                (
+                    c,
+                    "version",
+                    "UPDATE alembic_version SET version_num='%s' "
+                    "WHERE alembic_version.version_num = '%s';" % (c, b),
+                ),
+                (None, "transaction", "COMMIT;"),
+            ],
+        )
+
+    def test_iter_statements_downgrade(self):
+        eq_(
+            [
+                (revision, kind)
+                for revision, kind, text in self._statements(
+                    "%s:base" % b, downgrade=True
+                )
+            ],
+            [
+                (None, "transaction"),
+                (b, "comment"),
+                (b, "other"),
+                (b, "version"),
+                (a, "comment"),
+                (a, "other"),
+                (a, "version"),
+                (None, "version"),
+                (None, "transaction"),
+            ],
+        )
+
+    def test_iter_statements_ddl_dml(self):
+        d = util.rev_id()
+        self.env.generate_revision(d, "revision d", refresh=True, head=c)
+        write_script(
+            self.env,
+            d,
+            """
+revision = '%s'
+down_revision = '%s'
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    t = op.create_table("t", sa.Column("id", sa.Integer))
+    op.bulk_insert(t, [{"id": 1}])
+
+def downgrade():
+    pass
+"""
+            % (d, c),
+        )
+        eq_(
+            [
+                (kind, text.split(" ")[0])
+                for revision, kind, text in self._statements("%s:%s" % (c, d))
+                if revision == d
+            ],
+            [
+                ("comment", "--"),
+                ("ddl", "CREATE"),
+                ("dml", "INSERT"),
+                ("version", "UPDATE"),
+            ],
+        )
+
+    def test_iter_statements_error(self):
+        env_file_fixture(
+            """
+context.configure(dialect_name='sqlite')
+context.static_output("-- before")
+raise ValueError("env failed")
+"""
+        )
+        statements = offline.iter_statements(self.cfg, "%s:%s" % (a, c))
+        eq_(next(statements).text, "-- before")
+        assert_raises_message(ValueError, "env failed", next, statements)
+
+    def test_iter_statements_closed(self):
+        thread_count = threading.active_count()
+        statements = offline.iter_statements(
+            self.cfg, "base:%s" % c, buffer_size=1
+        )
+        eq_(next(statements).text, "BEGIN;")
+        statements.close()
+        eq_(threading.active_count(), thread_count)
+
+    def test_output_dir(self):
+        output_dir = os.path.join(_get_staging_directory(), "sql")
+        command.upgrade(
+            self.cfg, "base:%s" % c, sql=True, output_dir=output_dir
+        )
+        eq_(
+            sorted(os.listdir(output_dir)),
+            [
+                "0001.sql",
+                "0002_%s.sql" % a,
+                "0003_%s.sql" % b,
+                "0004_%s.sql" % c,
+                "0005.sql",
+            ],
+        )
+        with open(os.path.join(output_dir, "0003_%s.sql" % b)) as file_:
+            eq_(
+                file_.read(),
+                "-- Running upgrade %s -> %s\n\n"
+                "CREATE STEP 2;\n\n"
+                "UPDATE alembic_version SET version_num='%s' "
+                "WHERE alembic_version.version_num = '%s';\n\n" % (a, b, b, a),
+            )
+
+    def test_output_dir_transaction_per_migration(self):
+        env_file_fixture(
+            """
+context.configure(
+    dialect_name='postgresql', transaction_per_migration=True
+)
+with context.begin_transaction():
+    context.run_migrations()
+"""
+        )
+        output_dir = os.path.join(_get_staging_directory(), "sql")
+        command.downgrade(
+            self.cfg, "%s:%s" % (c, a), sql=True, output_dir=output_dir
+        )
+        eq_(
+            sorted(os.listdir(output_dir)),
+            ["0001_%s.sql" % c, "0002_%s.sql" % b],
+        )
+        with open(os.path.join(output_dir, "0001_%s.sql" % c)) as file_:
+            sql = file_.read()
+        assert sql.startswith("BEGIN;")
+        assert sql.endswith("COMMIT;\n\n")
+
+    def test_output_dir_requires_sql(self):
+        assert_raises_message(
+            util.CommandError,
+            "--output-dir requires --sql mode",
+            command.upgrade,
+            self.cfg,
+            c,
+            output_dir=os.path.join(_get_staging_directory(), "sql"),
+        )
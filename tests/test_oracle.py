@@ -222,6 +222,45 @@ class OpTest(TestBase):
             "COMMENT ON TABLE t2 IS 't2 comment'",
         )
 
+    def test_lock_timeout(self):
+        context = op_fixture("oracle", as_sql=True)
+        context.impl.lock_timeout = 0.5
+        op.drop_column("t", "c")
+        context.assert_(
+            "ALTER SESSION SET DDL_LOCK_TIMEOUT = 1",
+            "/",
+            "ALTER TABLE t DROP COLUMN c",
+            "/",
+        )
+
+    def test_create_index_oracle_online(self):
+        context = op_fixture("oracle")
+        op.create_index(
+            "ix_t_c", "t", ["c"], oracle_online=True, oracle_parallel=4
+        )
+        op.create_index("ix_t_d", "t", ["d"], oracle_parallel=False)
+        context.assert_(
+            "CREATE INDEX ix_t_c ON t (c) ONLINE PARALLEL 4",
+            "CREATE INDEX ix_t_d ON t (d) NOPARALLEL",
+        )
+
+    def test_create_index_oracle_online_context_default(self):
+        context = op_fixture("oracle", as_sql=True)
+        context.impl.context_opts.update(
+            oracle_online=True, oracle_parallel=True
+        )
+        op.create_index("ix_t_c", "t", ["c"])
+        context.assert_("CREATE INDEX ix_t_c ON t (c) ONLINE PARALLEL", "/")
+
+    def test_rebuild_index_oracle(self):
+        context = op_fixture("oracle")
+        op.rebuild_index("ix_t_c", schema="s")
+        op.rebuild_index("ix_t_c", oracle_online=True, oracle_parallel=8)
+        context.assert_(
+            "ALTER INDEX s.ix_t_c REBUILD",
+            "ALTER INDEX ix_t_c REBUILD ONLINE PARALLEL 8",
+        )
+
     # TODO: when we add schema support
     # def test_alter_column_rename_oracle_schema(self):
     #    context = op_fixture('oracle')
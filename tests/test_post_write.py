@@ -2,6 +2,7 @@ import sys
 
 from alembic import command
 from alembic import util
+from alembic.script import ScriptDirectory
 from alembic.script import write_hooks
 from alembic.testing import assert_raises_message
 from alembic.testing import eq_
@@ -142,7 +143,9 @@ class RunHookTest(TestBase):
             "pkg_resources.iter_entry_points", entrypoints
         ), mock.patch(
             "alembic.script.write_hooks.subprocess"
-        ) as mock_subprocess:
+        ) as mock_subprocess, mock.patch.dict(
+            write_hooks._entrypoints, clear=True
+        ):
 
             rev = command.revision(self.cfg, message="x")
 
@@ -162,3 +165,172 @@ class RunHookTest(TestBase):
                 )
             ],
         )
+
+    def _batch_fixture(self, hooks):
+        self.cfg = _no_sql_testing_config(
+            directives=(
+                "\n[post_write_hooks]\n"
+                "hooks=%s\n" % ",".join(hooks)
+                + "".join("%s.type=%s\n" % (name, name) for name in hooks)
+            )
+        )
+        script = ScriptDirectory.from_config(self.cfg)
+        with script._deferred_write_hooks():
+            paths = [
+                script.generate_revision(util.rev_id(), "x", head=head).path
+                for head in ("base", "base")
+            ]
+        return paths
+
+    def test_batch(self):
+        batch_hook = mock.Mock()
+        hook = mock.Mock()
+        with mock.patch.dict(write_hooks._registry), mock.patch.object(
+            write_hooks, "_batch", set()
+        ):
+            write_hooks.register("batch_hook", batch=True)(batch_hook)
+            write_hooks.register("hook")(hook)
+
+            paths = self._batch_fixture(["batch_hook", "hook"])
+
+        eq_(
+            batch_hook.mock_calls,
+            [
+                mock.call(
+                    paths, {"type": "batch_hook", "_hook_name": "batch_hook"}
+                )
+            ],
+        )
+        eq_(
+            hook.mock_calls,
+            [
+                mock.call(path, {"type": "hook", "_hook_name": "hook"})
+                for path in paths
+            ],
+        )
+
+    def test_batch_not_deferred(self):
+        batch_hook = mock.Mock()
+        with mock.patch.dict(write_hooks._registry), mock.patch.object(
+            write_hooks, "_batch", set()
+        ):
+            write_hooks.register("batch_hook", batch=True)(batch_hook)
+            self.cfg = _no_sql_testing_config(
+                directives=(
+                    "\n[post_write_hooks]\n"
+                    "hooks=batch_hook\n"
+                    "batch_hook.type=batch_hook\n"
+                )
+            )
+            script = ScriptDirectory.from_config(self.cfg)
+            rev = script.generate_revision(util.rev_id(), "x")
+        eq_(
+            batch_hook.mock_calls,
+            [
+                mock.call(
+                    [rev.path],
+                    {"type": "batch_hook", "_hook_name": "batch_hook"},
+                )
+            ],
+        )
+
+    def test_console_scripts_batch(self):
+        impl = mock.Mock(attrs=("main",), module_name="black_module")
+        with mock.patch(
+            "pkg_resources.iter_entry_points",
+            mock.Mock(return_value=iter([impl])),
+        ), mock.patch(
+            "alembic.script.write_hooks.subprocess"
+        ) as mock_subprocess, mock.patch.dict(
+            write_hooks._entrypoints, clear=True
+        ):
+            self.cfg = _no_sql_testing_config(
+                directives=(
+                    "\n[post_write_hooks]\n"
+                    "hooks=black\n"
+                    "black.type=console_scripts\n"
+                    "black.entrypoint=black\n"
+                )
+            )
+            script = ScriptDirectory.from_config(self.cfg)
+            with script._deferred_write_hooks():
+                paths = [
+                    script.generate_revision(
+                        util.rev_id(), "x", head="base"
+                    ).path
+                    for i in range(2)
+                ]
+
+        eq_(
+            mock_subprocess.mock_calls,
+            [
+                mock.call.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        "import black_module; black_module.main()",
+                    ]
+                    + paths
+                )
+            ],
+        )
+
+    def _inprocess_fixture(self, fn):
+        self.cfg = _no_sql_testing_config(
+            directives=(
+                "\n[post_write_hooks]\n"
+                "hooks=black\n"
+                "black.type=console_scripts_inprocess\n"
+                "black.entrypoint=black\n"
+                "black.options=-l 79\n"
+            )
+        )
+        impl = mock.Mock(resolve=mock.Mock(return_value=fn))
+        entrypoints = mock.Mock(return_value=iter([impl]))
+        return (
+            entrypoints,
+            mock.patch("pkg_resources.iter_entry_points", entrypoints),
+            mock.patch.dict(write_hooks._entrypoints, clear=True),
+        )
+
+    def test_console_scripts_inprocess(self):
+        argvs = []
+
+        def main():
+            argvs.append(list(sys.argv))
+            sys.exit(0)
+
+        entrypoints, patch_entrypoints, patch_cache = self._inprocess_fixture(
+            main
+        )
+        argv = sys.argv
+        with patch_entrypoints, patch_cache:
+            rev1 = command.revision(self.cfg, message="x")
+            rev2 = command.revision(self.cfg, message="y")
+
+        eq_(
+            argvs,
+            [
+                ["black", rev1.path, "-l", "79"],
+                ["black", rev2.path, "-l", "79"],
+            ],
+        )
+        # the entrypoint is looked up once only
+        eq_(entrypoints.mock_calls, [mock.call("console_scripts", "black")])
+        assert sys.argv is argv
+
+    def test_console_scripts_inprocess_failure(self):
+        def main():
+            sys.exit(123)
+
+        entrypoints, patch_entrypoints, patch_cache = self._inprocess_fixture(
+            main
+        )
+        with patch_entrypoints, patch_cache:
+            assert_raises_message(
+                util.CommandError,
+                "Post write hook 'black' exited with status 123",
+                command.revision,
+                self.cfg,
+                message="x",
+            )
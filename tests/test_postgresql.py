@@ -2,7 +2,9 @@ from sqlalchemy import BigInteger
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DateTime
+from sqlalchemy import exc
 from sqlalchemy import Float
+from sqlalchemy import ForeignKeyConstraint
 from sqlalchemy import func
 from sqlalchemy import Index
 from sqlalchemy import inspect
@@ -15,6 +17,7 @@ from sqlalchemy import String
 from sqlalchemy import Table
 from sqlalchemy import text
 from sqlalchemy import types
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import BYTEA
 from sqlalchemy.dialects.postgresql import HSTORE
@@ -33,13 +36,19 @@ from alembic.autogenerate import api
 from alembic.autogenerate.compare import _compare_server_default
 from alembic.autogenerate.compare import _compare_tables
 from alembic.autogenerate.compare import _render_server_default_for_compare
+from alembic.ddl.postgresql import PostgresqlImpl
+from alembic.ddl.postgresql import ValidateConstraintOp
 from alembic.migration import MigrationContext
 from alembic.operations import Operations
 from alembic.operations import ops
+from alembic.runtime import impact
 from alembic.script import ScriptDirectory
+from alembic.testing import assert_raises
+from alembic.testing import assert_raises_message
 from alembic.testing import config
 from alembic.testing import eq_
 from alembic.testing import eq_ignore_whitespace
+from alembic.testing import mock
 from alembic.testing import provide_metadata
 from alembic.testing.env import _no_sql_testing_config
 from alembic.testing.env import clear_staging_env
@@ -48,6 +57,7 @@ from alembic.testing.env import write_script
 from alembic.testing.fixtures import capture_context_buffer
 from alembic.testing.fixtures import op_fixture
 from alembic.testing.fixtures import TestBase
+from alembic.util import compat
 from alembic.util import sqla_compat
 
 
@@ -75,6 +85,77 @@ class PostgresqlOpTest(TestBase):
             "WHERE locations.coordinates != Null"
         )
 
+    def test_lock_timeout(self):
+        context = op_fixture("postgresql", as_sql=True)
+        context.impl.lock_timeout = 2.5
+        op.drop_column("t", "c")
+        op.drop_column("t", "d")
+        context.assert_(
+            "SET lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN c",
+            "ALTER TABLE t DROP COLUMN d",
+        )
+        context.impl.reset_lock_timeout()
+        context.assert_(
+            "SET lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN c",
+            "ALTER TABLE t DROP COLUMN d",
+            "RESET lock_timeout",
+        )
+
+    def test_lock_timeout_per_transaction(self):
+        context = op_fixture("postgresql", as_sql=True)
+        context.impl.lock_timeout = 2.5
+        with context.begin_transaction():
+            op.drop_column("t", "c")
+        with context.begin_transaction():
+            op.drop_column("t", "d")
+        context.impl.reset_lock_timeout()
+        context.assert_(
+            "BEGIN",
+            "SET LOCAL lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN c",
+            "COMMIT",
+            "BEGIN",
+            "SET LOCAL lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN d",
+            "COMMIT",
+        )
+
+    def test_lock_timeout_cleared_on_rollback(self):
+        context = op_fixture("postgresql")
+        context.impl.lock_timeout = 2.5
+        context.impl.connection.in_transaction.return_value = True
+        trans = context.begin_transaction()
+        op.drop_column("t", "c")
+        trans.rollback()
+        trans = context.begin_transaction()
+        op.drop_column("t", "d")
+        trans.commit()
+        context.assert_(
+            "SET LOCAL lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN c",
+            "SET LOCAL lock_timeout = 2500",
+            "ALTER TABLE t DROP COLUMN d",
+        )
+
+    def test_migration_lock(self):
+        context = op_fixture("postgresql")
+        context.impl.connection.in_transaction.return_value = True
+        with context.impl.migration_lock("alembic:alembic_version", None):
+            context.assert_("SELECT pg_advisory_xact_lock(%(lock_id)s)")
+        context.assert_("SELECT pg_advisory_xact_lock(%(lock_id)s)")
+
+    def test_migration_lock_no_transaction(self):
+        context = op_fixture("postgresql")
+        context.impl.connection.in_transaction.return_value = False
+        with context.impl.migration_lock("alembic:alembic_version", None):
+            context.assert_("SELECT pg_advisory_lock(%(lock_id)s)")
+        context.assert_(
+            "SELECT pg_advisory_lock(%(lock_id)s)",
+            "SELECT pg_advisory_unlock(%(lock_id)s)",
+        )
+
     def test_create_index_postgresql_where(self):
         context = op_fixture("postgresql")
         op.create_index(
@@ -299,6 +380,311 @@ class PostgresqlOpTest(TestBase):
         )
 
 
+class PostgresqlCoalesceAlterTableTest(TestBase):
+    def test_consecutive_actions_one_statement(self):
+        context = op_fixture("postgresql")
+        with context.impl.coalesce_alter_table():
+            op.add_column("t", Column("q", Integer))
+            op.drop_column("t", "r")
+            op.alter_column(
+                "t", "s", nullable=False, type_=BigInteger, server_default="5"
+            )
+            op.create_foreign_key("fk_q", "t", "other", ["q"], ["id"])
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER, DROP COLUMN r, "
+            "ALTER COLUMN s TYPE BIGINT, ALTER COLUMN s SET NOT NULL, "
+            "ALTER COLUMN s SET DEFAULT '5', "
+            "ADD CONSTRAINT fk_q FOREIGN KEY(q) REFERENCES other (id)"
+        )
+
+    def test_single_action_unchanged(self):
+        context = op_fixture("postgresql")
+        with context.impl.coalesce_alter_table():
+            op.add_column("t", Column("q", Integer))
+        context.assert_("ALTER TABLE t ADD COLUMN q INTEGER")
+
+    def test_table_and_other_statements_split(self):
+        context = op_fixture("postgresql")
+        with context.impl.coalesce_alter_table():
+            op.add_column("t1", Column("q", Integer))
+            op.add_column("t1", Column("r", Integer))
+            op.add_column("t2", Column("q", Integer))
+            op.create_index("ix_q", "t2", ["q"])
+            op.add_column("t2", Column("r", Integer))
+            op.alter_column("t2", "r", new_column_name="s")
+        context.assert_(
+            "ALTER TABLE t1 ADD COLUMN q INTEGER, ADD COLUMN r INTEGER",
+            "ALTER TABLE t2 ADD COLUMN q INTEGER",
+            "CREATE INDEX ix_q ON t2 (q)",
+            "ALTER TABLE t2 ADD COLUMN r INTEGER",
+            "ALTER TABLE t2 RENAME r TO s",
+        )
+
+    def test_same_name_not_combined(self):
+        context = op_fixture("postgresql")
+        with context.impl.coalesce_alter_table():
+            op.drop_column("t", "q")
+            op.add_column("t", Column("q", Integer))
+            op.drop_constraint("uq_q", "t")
+            op.create_unique_constraint("uq_q", "t", ["q"])
+            op.alter_column("t", "q", type_=BigInteger)
+            op.alter_column("t", "q", type_=Integer)
+        context.assert_(
+            "ALTER TABLE t DROP COLUMN q",
+            "ALTER TABLE t ADD COLUMN q INTEGER, DROP CONSTRAINT uq_q",
+            "ALTER TABLE t ADD CONSTRAINT uq_q UNIQUE (q), "
+            "ALTER COLUMN q TYPE BIGINT",
+            "ALTER TABLE t ALTER COLUMN q TYPE INTEGER",
+        )
+
+    def test_batch_recreate_never(self):
+        context = op_fixture("postgresql")
+        with op.batch_alter_table(
+            "t", recreate="never", coalesce_alter_table=True
+        ) as batch_op:
+            batch_op.add_column(Column("q", Integer))
+            batch_op.alter_column("r", nullable=True)
+            batch_op.drop_column("s")
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER, "
+            "ALTER COLUMN r DROP NOT NULL, DROP COLUMN s"
+        )
+
+    def test_batch_not_coalesced_by_default(self):
+        context = op_fixture("postgresql")
+        with op.batch_alter_table("t", recreate="never") as batch_op:
+            batch_op.add_column(Column("q", Integer))
+            batch_op.drop_column("s")
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER", "ALTER TABLE t DROP COLUMN s"
+        )
+
+    def test_error_discards_pending(self):
+        context = op_fixture("postgresql")
+
+        def go():
+            with context.impl.coalesce_alter_table():
+                op.add_column("t", Column("q", Integer))
+                raise exc.ArgumentError("oops")
+
+        assert_raises(exc.ArgumentError, go)
+        op.drop_column("t", "r")
+        context.assert_("ALTER TABLE t DROP COLUMN r")
+
+    def test_run_wide_option(self):
+        buf = compat.StringIO()
+        context = MigrationContext.configure(
+            dialect_name="postgresql",
+            opts={
+                "as_sql": True,
+                "output_buffer": buf,
+                "coalesce_alter_table": True,
+            },
+        )
+        op = Operations(context)
+        op.add_column("t", Column("q", Integer))
+        op.alter_column("t", "r", nullable=False)
+        eq_(buf.getvalue(), "")
+
+        op.execute("UPDATE t SET q=1")
+        eq_ignore_whitespace(
+            buf.getvalue(),
+            "ALTER TABLE t ADD COLUMN q INTEGER, "
+            "ALTER COLUMN r SET NOT NULL;UPDATE t SET q=1;",
+        )
+
+
+class PostgresqlImpactTest(TestBase):
+    def _classify(self, operation, server_version_info=(12, 0)):
+        context = op_fixture("postgresql")
+        context.dialect.server_version_info = server_version_info
+        return impact.classifiers.dispatch(operation, "postgresql")(
+            context.impl, operation
+        )
+
+    def test_add_column_default(self):
+        operation = ops.AddColumnOp(
+            "t", Column("c", Integer, server_default="5")
+        )
+        eq_(self._classify(operation), impact.METADATA_ONLY)
+        eq_(self._classify(operation, (10, 5)), impact.FULL_REWRITE)
+        eq_(self._classify(operation, None), impact.FULL_REWRITE)
+        eq_(
+            self._classify(
+                ops.AddColumnOp(
+                    "t", Column("c", DateTime, server_default=func.now())
+                )
+            ),
+            impact.FULL_REWRITE,
+        )
+        eq_(
+            self._classify(ops.AddColumnOp("t", Column("c", Integer)), None),
+            impact.METADATA_ONLY,
+        )
+
+    def test_alter_column_type(self):
+        eq_(
+            self._classify(
+                ops.AlterColumnOp(
+                    "t", "c", existing_type=String(20), modify_type=String(50),
+                )
+            ),
+            impact.METADATA_ONLY,
+        )
+        eq_(
+            self._classify(
+                ops.AlterColumnOp(
+                    "t", "c", existing_type=String(50), modify_type=String(20),
+                )
+            ),
+            impact.FULL_REWRITE,
+        )
+        eq_(
+            self._classify(
+                ops.AlterColumnOp("t", "c", modify_type=BigInteger())
+            ),
+            impact.FULL_REWRITE,
+        )
+        eq_(
+            self._classify(ops.AlterColumnOp("t", "c", modify_nullable=False)),
+            impact.VALIDATION_SCAN,
+        )
+
+    def test_constraints(self):
+        eq_(
+            self._classify(
+                ops.CreateForeignKeyOp("fk", "t", "r", ["rid"], ["id"])
+            ),
+            impact.VALIDATION_SCAN,
+        )
+        eq_(
+            self._classify(
+                ops.CreateForeignKeyOp(
+                    "fk", "t", "r", ["rid"], ["id"], postgresql_not_valid=True
+                )
+            ),
+            impact.METADATA_ONLY,
+        )
+        eq_(
+            self._classify(ValidateConstraintOp("fk", "t")),
+            impact.VALIDATION_SCAN,
+        )
+
+
+class PostgresqlNotValidTest(TestBase):
+    def test_create_foreign_key_not_valid(self):
+        context = op_fixture("postgresql")
+        op.create_foreign_key(
+            "fk_a_b", "a", "b", ["b_id"], ["id"], postgresql_not_valid=True
+        )
+        context.assert_(
+            "ALTER TABLE a ADD CONSTRAINT fk_a_b FOREIGN KEY(b_id) "
+            "REFERENCES b (id) NOT VALID"
+        )
+
+    def test_create_check_constraint_not_valid(self):
+        context = op_fixture("postgresql")
+        op.create_check_constraint(
+            "ck_a_x", "a", column("x") > 5, postgresql_not_valid=True
+        )
+        context.assert_(
+            "ALTER TABLE a ADD CONSTRAINT ck_a_x CHECK (x > 5) NOT VALID"
+        )
+
+    def test_create_foreign_key_valid(self):
+        context = op_fixture("postgresql")
+        op.create_foreign_key("fk_a_b", "a", "b", ["b_id"], ["id"])
+        context.assert_(
+            "ALTER TABLE a ADD CONSTRAINT fk_a_b FOREIGN KEY(b_id) "
+            "REFERENCES b (id)"
+        )
+
+    def test_validate_constraint(self):
+        context = op_fixture("postgresql")
+        op.validate_constraint("fk_a_b", "a")
+        op.validate_constraint("fk_a_b", "a", schema="s")
+        context.assert_(
+            "ALTER TABLE a VALIDATE CONSTRAINT fk_a_b",
+            "ALTER TABLE s.a VALIDATE CONSTRAINT fk_a_b",
+        )
+
+    def test_batch_validate_constraint(self):
+        context = op_fixture("postgresql")
+        with op.batch_alter_table("a") as batch_op:
+            batch_op.validate_constraint("fk_a_b")
+        context.assert_("ALTER TABLE a VALIDATE CONSTRAINT fk_a_b")
+
+    def test_validate_constraint_unsupported(self):
+        op_fixture("sqlite")
+        assert_raises_message(
+            NotImplementedError,
+            "VALIDATE CONSTRAINT is not supported by the sqlite dialect",
+            op.validate_constraint,
+            "fk_a_b",
+            "a",
+        )
+
+    def test_alter_column_not_null_check(self):
+        context = op_fixture("postgresql", as_sql=True)
+        op.alter_column(
+            "t", "c", nullable=False, postgresql_not_null_check=True
+        )
+        # each statement is committed on its own, so that the lock taken
+        # by ADD CONSTRAINT isn't held through VALIDATE CONSTRAINT
+        context.assert_(
+            "COMMIT",
+            "ALTER TABLE t ADD CONSTRAINT ck_t_c_not_null "
+            "CHECK (c IS NOT NULL) NOT VALID",
+            "ALTER TABLE t VALIDATE CONSTRAINT ck_t_c_not_null",
+            "ALTER TABLE t ALTER COLUMN c SET NOT NULL",
+            "ALTER TABLE t DROP CONSTRAINT ck_t_c_not_null",
+            "BEGIN",
+        )
+
+    def test_alter_column_not_null_check_batch(self):
+        context = op_fixture("postgresql", as_sql=True)
+        with op.batch_alter_table("t") as batch_op:
+            batch_op.alter_column(
+                "c", nullable=False, postgresql_not_null_check=True
+            )
+        context.assert_(
+            "ALTER TABLE t ADD CONSTRAINT ck_t_c_not_null "
+            "CHECK (c IS NOT NULL) NOT VALID",
+            "ALTER TABLE t VALIDATE CONSTRAINT ck_t_c_not_null",
+            "ALTER TABLE t ALTER COLUMN c SET NOT NULL",
+            "ALTER TABLE t DROP CONSTRAINT ck_t_c_not_null",
+        )
+
+    def test_alter_column_not_null_check_nullable(self):
+        context = op_fixture("postgresql")
+        op.alter_column(
+            "t", "c", nullable=True, postgresql_not_null_check=True
+        )
+        context.assert_("ALTER TABLE t ALTER COLUMN c DROP NOT NULL")
+
+    def test_alter_column_not_null_check_coalesced(self):
+        context = op_fixture("postgresql", as_sql=True)
+        with context.impl.coalesce_alter_table():
+            op.add_column("t", Column("q", Integer))
+            op.alter_column(
+                "t",
+                "c",
+                nullable=False,
+                schema="s",
+                postgresql_not_null_check=True,
+            )
+        context.assert_(
+            "ALTER TABLE t ADD COLUMN q INTEGER",
+            "COMMIT",
+            "ALTER TABLE s.t ADD CONSTRAINT ck_t_c_not_null "
+            "CHECK (c IS NOT NULL) NOT VALID",
+            "ALTER TABLE s.t VALIDATE CONSTRAINT ck_t_c_not_null",
+            "ALTER TABLE s.t ALTER COLUMN c SET NOT NULL",
+            "ALTER TABLE s.t DROP CONSTRAINT ck_t_c_not_null",
+            "BEGIN",
+        )
+
+
 class PGAutocommitBlockTest(TestBase):
     __only_on__ = "postgresql"
     __backend__ = True
@@ -666,6 +1052,51 @@ class PostgresqlDefaultCompareTest(TestBase):
             String(), text("'hello'"), text("'there'")
         )
 
+    def test_prefetch_server_default_comparisons(self):
+        t1 = Table(
+            "test",
+            self.metadata,
+            Column("a", Float(), server_default="5"),
+            Column("b", Float(), server_default="5"),
+            Column("c", Integer(), server_default="5"),
+        )
+        t2 = Table(
+            "test",
+            MetaData(),
+            Column("a", Float(), server_default="5.0"),
+            Column("b", Float(), server_default="6.0"),
+            Column("c", Integer(), server_default=text("nonexistent_fn()")),
+        )
+        t1.create(self.bind)
+
+        insp = inspect(self.bind)
+        comparisons = []
+        for col in insp.get_columns(t1.name):
+            insp_col = Column(
+                col["name"], col["type"], server_default=text(col["default"])
+            )
+            metadata_col = t2.c[col["name"]]
+            comparisons.append(
+                (
+                    insp_col,
+                    metadata_col,
+                    _render_server_default_for_compare(
+                        metadata_col.server_default,
+                        metadata_col,
+                        self.autogen_context,
+                    ),
+                    col["default"],
+                )
+            )
+
+        impl = self.autogen_context.migration_context.impl
+        impl.prefetch_server_default_comparisons(comparisons)
+
+        # the failing expression is excluded, the others are evaluated
+        eq_(len(impl._server_default_comparisons), 2)
+        eq_(impl.compare_server_default(*comparisons[0]), False)
+        eq_(impl.compare_server_default(*comparisons[1]), True)
+
     def test_primary_key_skip(self):
         """Test that SERIAL cols are just skipped"""
         t1 = Table(
@@ -677,6 +1108,143 @@ class PostgresqlDefaultCompareTest(TestBase):
         assert not self._compare_default(t1, t2, t2.c.id, "")
 
 
+class PostgresqlBatchedDefaultCompareTest(TestBase):
+    def setUp(self):
+        self.conn = mock.Mock()
+        self.impl = PostgresqlImpl(
+            postgresql.dialect(), self.conn, False, None, None, {}
+        )
+
+    def _comparison(self, name, conn_default, metadata_default):
+        metadata_col = Column(name, Float(), server_default=metadata_default)
+        Table("t", MetaData(), metadata_col)
+        return (
+            Column(name, Float(), server_default=text(conn_default)),
+            metadata_col,
+            metadata_default,
+            conn_default,
+        )
+
+    def test_one_select_for_many_columns(self):
+        comparisons = [
+            self._comparison("a", "5", "5.0"),
+            self._comparison("b", "5", "6.0"),
+            self._comparison("c", "7", "7"),
+        ]
+        self.conn.execute.return_value.first.return_value = (True, False)
+
+        self.impl.prefetch_server_default_comparisons(comparisons)
+
+        eq_(self.conn.execute.call_count, 1)
+        eq_(
+            str(self.conn.execute.mock_calls[0][1][0]),
+            "SELECT 5 = 5.0, 5 = 6.0",
+        )
+
+        eq_(self.impl.compare_server_default(*comparisons[0]), False)
+        eq_(self.impl.compare_server_default(*comparisons[1]), True)
+        eq_(self.impl.compare_server_default(*comparisons[2]), False)
+        eq_(self.conn.scalar.call_count, 0)
+
+    def test_batch_size(self):
+        self.impl.server_default_compare_batch_size = 2
+        comparisons = [
+            self._comparison("c%d" % i, "5", "%d.0" % i) for i in range(5)
+        ]
+        self.conn.execute.return_value.first.side_effect = [
+            (False, False),
+            (False, False),
+            (True,),
+        ]
+
+        self.impl.prefetch_server_default_comparisons(comparisons)
+
+        eq_(self.conn.execute.call_count, 3)
+        eq_(self.impl.compare_server_default(*comparisons[4]), False)
+        eq_(self.impl.compare_server_default(*comparisons[0]), True)
+
+    def test_failing_expression_isolated(self):
+        comparisons = [
+            self._comparison("a", "5", "5.0"),
+            self._comparison("b", "5", "bogus()"),
+            self._comparison("c", "5", "6.0"),
+        ]
+
+        def execute(stmt):
+            if "bogus()" in str(stmt):
+                raise exc.DBAPIError(str(stmt), {}, Exception("bogus"))
+            result = mock.Mock()
+            result.first.return_value = (("5 = 6.0" not in str(stmt)),) * str(
+                stmt
+            ).count("=")
+            return result
+
+        self.conn.execute.side_effect = execute
+
+        self.impl.prefetch_server_default_comparisons(comparisons)
+
+        eq_(
+            self.impl._server_default_comparisons,
+            {("5", "5.0"): True, ("5", "6.0"): False},
+        )
+        eq_(self.conn.begin_nested.return_value.rollback.call_count, 3)
+        self.conn.scalar.return_value = False
+        eq_(self.impl.compare_server_default(*comparisons[1]), True)
+        eq_(self.conn.scalar.call_count, 1)
+
+
+class PostgresqlSequenceOwnerTest(TestBase):
+    def setUp(self):
+        self.impl = PostgresqlImpl(
+            postgresql.dialect(), None, False, None, None, {}
+        )
+        self.inspector = mock.Mock(info_cache={}, default_schema_name="public")
+        self.patcher = mock.patch.object(
+            sqla_compat,
+            "_exec_on_inspector",
+            return_value=[("t1_id_seq", "id"), ("t2_id_seq", "id")],
+        )
+        self.exec_on_inspector = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def _reflect(self, table, name, default):
+        column_info = {
+            "name": name,
+            "type": postgresql.INTEGER(),
+            "default": default,
+        }
+        self.impl.autogen_column_reflect(self.inspector, table, column_info)
+        return column_info
+
+    def test_one_query_per_schema(self):
+        t1 = Table("t1", MetaData())
+        t2 = Table("t2", MetaData())
+        t3 = Table("t3", MetaData(), schema="other")
+
+        c1 = self._reflect(t1, "id", "nextval('t1_id_seq'::regclass)")
+        c2 = self._reflect(t2, "id", "nextval('t2_id_seq'::regclass)")
+        c3 = self._reflect(t2, "x", "nextval('x_seq'::regclass)")
+        eq_(self.exec_on_inspector.call_count, 1)
+
+        self._reflect(t3, "id", "nextval('t3_id_seq'::regclass)")
+        eq_(self.exec_on_inspector.call_count, 2)
+        eq_(
+            [c[2]["schema"] for c in self.exec_on_inspector.mock_calls],
+            ["public", "other"],
+        )
+
+        assert "default" not in c1
+        assert "default" not in c2
+        eq_(c3["default"], "nextval('x_seq'::regclass)")
+
+    def test_owner_is_other_column(self):
+        t1 = Table("t1", MetaData())
+        c1 = self._reflect(t1, "x", "nextval('t1_id_seq'::regclass)")
+        eq_(c1["default"], "nextval('t1_id_seq'::regclass)")
+
+
 class PostgresqlDetectSerialTest(TestBase):
     __only_on__ = "postgresql"
     __backend__ = True
@@ -1044,3 +1612,50 @@ class PostgresqlAutogenRenderTest(TestBase):
             autogenerate.render._repr_type(JSONB(), self.autogen_context),
             "postgresql.JSONB(astext_type=sa.Text())",
         )
+
+    def test_render_add_fk_not_valid(self):
+        m = MetaData()
+        Table("b", m, Column("id", Integer, primary_key=True))
+        t = Table("a", m, Column("b_id", Integer))
+        fk = ForeignKeyConstraint(
+            ["b_id"], ["b.id"], name="fk_a_b", postgresql_not_valid=True
+        )
+        t.append_constraint(fk)
+
+        eq_ignore_whitespace(
+            autogenerate.render_op_text(
+                self.autogen_context,
+                ops.CreateForeignKeyOp.from_constraint(fk),
+            ),
+            "op.create_foreign_key('fk_a_b', 'a', 'b', ['b_id'], ['id'], "
+            "postgresql_not_valid=True)",
+        )
+
+    def test_render_add_check_not_valid(self):
+        op_obj = ops.CreateCheckConstraintOp(
+            "ck_a_x", "a", "x > 5", schema="s", postgresql_not_valid=True
+        )
+        eq_ignore_whitespace(
+            autogenerate.render_op_text(self.autogen_context, op_obj),
+            "op.create_check_constraint('ck_a_x', 'a', 'x > 5', "
+            "schema='s', postgresql_not_valid=True)",
+        )
+
+    def test_render_validate_constraint(self):
+        eq_ignore_whitespace(
+            autogenerate.render_op_text(
+                self.autogen_context,
+                ValidateConstraintOp("fk_a_b", "a", schema="s"),
+            ),
+            "op.validate_constraint('fk_a_b', 'a', schema='s')",
+        )
+
+    def test_render_alter_column_not_null_check(self):
+        op_obj = ops.AlterColumnOp(
+            "t", "c", modify_nullable=False, postgresql_not_null_check=True,
+        )
+        eq_ignore_whitespace(
+            autogenerate.render_op_text(self.autogen_context, op_obj),
+            "op.alter_column('t', 'c', nullable=False, "
+            "postgresql_not_null_check=True)",
+        )
@@ -5,9 +5,20 @@ import os
 import re
 import textwrap
 
+from sqlalchemy import Column
+from sqlalchemy import create_engine
+from sqlalchemy import inspect
+from sqlalchemy import Integer
+from sqlalchemy import String
+
 from alembic import command
+from alembic import context
+from alembic import op
 from alembic import util
+from alembic.config import Config
 from alembic.environment import EnvironmentContext
+from alembic.migration import MigrationContext
+from alembic.script import MemoryRevisionSource
 from alembic.script import Script
 from alembic.script import ScriptDirectory
 from alembic.testing import assert_raises_message
@@ -272,6 +283,134 @@ class CallbackEnvironmentTest(ApplyVersionsFunctionalTest):
                 assert h is None or isinstance(h, compat.string_types)
 
 
+class MemoryRevisionSourceTest(TestBase):
+    def setUp(self):
+        self.bind = create_engine("sqlite://")
+        self.conn = self.bind.connect()
+        self.buf = compat.StringIO()
+        self.cfg = Config(output_buffer=self.buf)
+
+        self.source = source = MemoryRevisionSource()
+
+        def upgrade_a():
+            op.create_table("account", Column("id", Integer))
+
+        def downgrade_a():
+            op.drop_table("account")
+
+        def upgrade_b():
+            op.add_column("account", Column("name", String(50)))
+
+        def downgrade_b():
+            op.drop_column("account", "name")
+
+        source.add("a", None, upgrade_a, downgrade_a, doc="create account")
+        source.add("b", "a", upgrade_b, downgrade_b, doc="add name")
+
+        def env_fn():
+            if context.is_offline_mode():
+                context.configure(dialect_name="sqlite")
+                context.run_migrations()
+            else:
+                context.configure(connection=self.conn)
+                with context.begin_transaction():
+                    context.run_migrations()
+
+        self.script = ScriptDirectory(
+            None, revision_source=source, env_fn=env_fn
+        )
+        self.session = command.MigrationSession(self.cfg, script=self.script)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _columns(self):
+        return [
+            col["name"] for col in inspect(self.conn).get_columns("account")
+        ]
+
+    def _current(self):
+        return MigrationContext.configure(self.conn).get_current_heads()
+
+    def test_revision_map(self):
+        eq_(self.script.get_current_head(), "b")
+        eq_(self.script.get_revision("b").doc, "add name")
+        eq_(
+            [rev.revision for rev in self.script.walk_revisions()], ["b", "a"],
+        )
+
+    def test_upgrade_downgrade_stamp(self):
+        with mock.patch(
+            "alembic.script.base.util.load_python_file"
+        ) as load_python_file, mock.patch(
+            "alembic.script.base.os.listdir"
+        ) as listdir:
+            self.session.upgrade("head")
+            eq_(self._current(), ("b",))
+            eq_(self._columns(), ["id", "name"])
+
+            self.session.downgrade("a")
+            eq_(self._current(), ("a",))
+            eq_(self._columns(), ["id"])
+
+            self.session.stamp("b")
+            eq_(self._current(), ("b",))
+        eq_(load_python_file.call_count, 0)
+        eq_(listdir.call_count, 0)
+
+    def test_offline(self):
+        self.session.upgrade("head", sql=True)
+        assert "CREATE TABLE account" in self.buf.getvalue()
+        assert "ALTER TABLE account ADD COLUMN name" in self.buf.getvalue()
+
+    def test_register(self):
+        class c(object):
+            """add email"""
+
+            revision = "c"
+            down_revision = "b"
+
+            @staticmethod
+            def upgrade():
+                op.add_column("account", Column("email", String(50)))
+
+            @staticmethod
+            def downgrade():
+                op.drop_column("account", "email")
+
+        self.source.register(c)
+        self.session.refresh()
+        self.session.upgrade("head")
+        eq_(self._columns(), ["id", "name", "email"])
+        eq_(self.script.get_revision("c").doc, "add email")
+
+    def test_register_no_revision(self):
+        assert_raises_message(
+            util.CommandError,
+            "Revision object .* has no 'revision' attribute",
+            self.source.register,
+            object(),
+        )
+
+    def test_generate_revision_not_supported(self):
+        assert_raises_message(
+            util.CommandError,
+            "Revision files can't be generated",
+            self.script.generate_revision,
+            "c",
+            "c",
+        )
+
+    def test_dir_required(self):
+        assert_raises_message(
+            util.CommandError,
+            "A script directory is required",
+            ScriptDirectory,
+            None,
+            revision_source=self.source,
+        )
+
+
 class OfflineTransactionalDDLTest(TestBase):
     def setUp(self):
         self.env = staging_env()
@@ -33,6 +33,7 @@ from alembic.testing.env import three_rev_fixture
 from alembic.testing.env import write_script
 from alembic.testing.fixtures import TestBase
 from alembic.util import CommandError
+from alembic.util import pyfiles
 
 env, abc, def_ = None, None, None
 
@@ -370,6 +371,105 @@ class RevisionCommandTest(TestBase):
         )
 
 
+class RevisionGenerationHeadersTest(TestBase):
+    def setUp(self):
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.a, self.b, self.c = three_rev_fixture(self.cfg)
+
+    def tearDown(self):
+        clear_staging_env()
+
+    def _loaded_files(self, fn, *arg, **kw):
+        with mock.patch(
+            "alembic.util.load_python_file", side_effect=util.load_python_file
+        ) as load_python_file:
+            result = fn(*arg, **kw)
+        return (
+            result,
+            [
+                call[1][1]
+                for call in load_python_file.mock_calls
+                if call[1][1] != "env.py"
+            ],
+        )
+
+    def test_revision_imports_new_file_only(self):
+        rev, loaded = self._loaded_files(
+            command.revision, self.cfg, message="some message"
+        )
+        eq_(rev.down_revision, self.c)
+        eq_(loaded, [os.path.basename(rev.path)])
+
+    def test_non_literal_header_imported(self):
+        write_script(
+            self.env,
+            self.c,
+            """\
+revision = '%s'
+down_revision = '%%s' %% ('%s', )
+
+def upgrade():
+    pass
+
+def downgrade():
+    pass
+"""
+            % (self.c, self.b),
+        )
+        script = ScriptDirectory.from_config(self.cfg)
+        rev, loaded = self._loaded_files(
+            script.generate_revision, util.rev_id(), "some message"
+        )
+        eq_(rev.down_revision, self.c)
+        eq_(
+            sorted(loaded),
+            sorted(["%s_revision_c.py" % self.c, os.path.basename(rev.path)]),
+        )
+
+    def test_multiple_heads_from_headers(self):
+        script = ScriptDirectory.from_config(self.cfg)
+        script.generate_revision(
+            util.rev_id(), "other", head=self.b, splice=True
+        )
+        script = ScriptDirectory.from_config(self.cfg)
+        assert_raises_message(
+            util.CommandError,
+            "Multiple heads are present",
+            script.generate_revision,
+            util.rev_id(),
+            "some message",
+        )
+        assert "_revision_map" not in script.revision_map.__dict__
+
+    def test_generated_script_in_revision_map(self):
+        script = ScriptDirectory.from_config(self.cfg)
+        rev = script.generate_revision(util.rev_id(), "some message")
+        is_(script.get_revision(rev.revision), rev)
+        eq_(script.get_heads(), [rev.revision])
+
+    def test_compiled_template_written(self):
+        command.revision(self.cfg, message="some message")
+        with open(
+            os.path.join(self.env.dir, "__pycache__", "script.py.mako.py")
+        ) as file_:
+            assert file_.readline().startswith("# alembic template ")
+
+    def test_compiled_template_of_other_mako_version(self):
+        command.revision(self.cfg, message="some message")
+        path = os.path.join(self.env.dir, "__pycache__", "script.py.mako.py")
+        with open(path) as file_:
+            header = file_.readline()
+        with open(path, "w") as file_:
+            file_.write(re.sub(r" magic \d+$", " magic 0", header))
+            file_.write("raise Exception('stale compiled template')\n")
+
+        with mock.patch.dict(pyfiles._templates, clear=True):
+            command.revision(self.cfg, message="some message")
+        with open(path) as file_:
+            eq_(file_.readline(), header)
+
+
 class CustomizeRevisionTest(TestBase):
     def setUp(self):
         self.env = staging_env()
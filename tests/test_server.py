@@ -0,0 +1,253 @@
+import os
+import socket
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy import pool
+
+from alembic import command
+from alembic import util
+from alembic.runtime.server import AlembicServer
+from alembic.runtime.server import send_request
+from alembic.script import ScriptDirectory
+from alembic.testing import assert_raises_message
+from alembic.testing import eq_
+from alembic.testing import is_
+from alembic.testing import mock
+from alembic.testing.env import _get_staging_directory
+from alembic.testing.env import _sqlite_testing_config
+from alembic.testing.env import clear_staging_env
+from alembic.testing.env import env_file_fixture
+from alembic.testing.env import staging_env
+from alembic.testing.env import three_rev_fixture
+from alembic.testing.fixtures import TestBase
+
+
+class ServerTest(TestBase):
+    def setUp(self):
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        self.a, self.b, self.c = three_rev_fixture(self.cfg)
+        self.socket_path = os.path.join(_get_staging_directory(), "a.sock")
+        self.server = AlembicServer(self.cfg, self.socket_path)
+
+    def tearDown(self):
+        self.server.close()
+        clear_staging_env()
+
+    def _output(self, **request):
+        response = self.server.handle_request(request)
+        eq_(response["status"], "ok", response.get("error"))
+        return response["output"]
+
+    def _error(self, **request):
+        response = self.server.handle_request(request)
+        eq_(response["status"], "error")
+        return response["error"]
+
+    def test_heads(self):
+        eq_(self._output(command="heads"), "%s (head)\n" % self.c)
+
+    def test_history(self):
+        eq_(
+            self._output(command="history", rev_range="%s:" % self.b),
+            "%s -> %s (head), Rev C\n%s -> %s, Rev B, méil, %%3\n"
+            % (self.b, self.c, self.a, self.b),
+        )
+
+    def test_show(self):
+        assert "Rev B" in self._output(command="show", rev=self.b)
+
+    def test_upgrade_sql(self):
+        output = self._output(
+            command="upgrade", revision="%s:%s" % (self.a, self.b), sql=True
+        )
+        assert "CREATE STEP 2" in output
+        assert "CREATE STEP 1" not in output
+
+    def test_upgrade_requires_sql(self):
+        eq_(
+            self._error(command="upgrade", revision="head"),
+            "Only upgrade with sql is supported",
+        )
+
+    def test_unsupported_command(self):
+        eq_(self._error(command="stamp"), "Unsupported command 'stamp'")
+
+    def test_missing_argument(self):
+        eq_(
+            self._error(command="show"),
+            "Command 'show' requires argument 'rev'",
+        )
+
+    def test_unknown_argument(self):
+        eq_(
+            self._error(command="heads", foo=True),
+            "Unknown argument(s) for command 'heads': foo",
+        )
+
+    def test_command_error(self):
+        eq_(
+            self._error(command="show", rev="zzz"),
+            "Can't locate revision identified by 'zzz'",
+        )
+
+    def test_added_revision(self):
+        revision_map = self.server.session.script.revision_map
+        eq_(self._output(command="heads"), "%s (head)\n" % self.c)
+
+        d = util.rev_id()
+        ScriptDirectory.from_config(
+            _sqlite_testing_config()
+        ).generate_revision(d, "revision d", head=self.c)
+        with mock.patch.object(self.server.session, "refresh") as refresh:
+            eq_(self._output(command="heads"), "%s (head)\n" % d)
+        eq_(refresh.mock_calls, [])
+        is_(self.server.session.script.revision_map, revision_map)
+
+    def test_modified_revision(self):
+        eq_(self._output(command="heads"), "%s (head)\n" % self.c)
+        with open(self.env.get_revision(self.c).path, "w") as file_:
+            file_.write(
+                """\
+revision = '%s'
+down_revision = '%s'
+
+def upgrade():
+    pass
+
+def downgrade():
+    pass
+"""
+                % (self.c, self.a)
+            )
+        eq_(
+            sorted(self._output(command="heads").splitlines()),
+            sorted(["%s (head)" % self.b, "%s (head)" % self.c]),
+        )
+
+    def test_socket(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        try:
+            eq_(
+                send_request(self.socket_path, "heads"), "%s (head)\n" % self.c
+            )
+            assert_raises_message(
+                util.CommandError,
+                "Can't locate revision identified by 'zzz'",
+                send_request,
+                self.socket_path,
+                "show",
+                rev="zzz",
+            )
+            assert_raises_message(
+                util.CommandError,
+                "A server is already listening on %s" % self.socket_path,
+                AlembicServer,
+                self.cfg,
+                self.socket_path,
+            )
+        finally:
+            self.server.shutdown()
+            thread.join()
+
+    def test_idle_connection(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            idle.connect(self.socket_path)
+            results = []
+            client = threading.Thread(
+                target=lambda: results.append(
+                    send_request(self.socket_path, "heads")
+                )
+            )
+            client.daemon = True
+            client.start()
+            client.join(10)
+            eq_(results, ["%s (head)\n" % self.c])
+        finally:
+            idle.close()
+            self.server.shutdown()
+            thread.join()
+
+    def test_serve_command_engine(self):
+        with mock.patch(
+            "alembic.runtime.server.AlembicServer"
+        ) as server_cls, mock.patch(
+            "sqlalchemy.engine.base.Engine.dispose"
+        ) as dispose:
+            command.serve(self.cfg, self.socket_path)
+        engine = server_cls.mock_calls[0][2]["engine"]
+        eq_(str(engine.url), self.cfg.get_main_option("sqlalchemy.url"))
+        eq_(
+            server_cls.mock_calls[1:],
+            [mock.call().serve_forever(), mock.call().close()],
+        )
+        eq_(dispose.call_count, 1)
+
+    def test_stale_socket_replaced(self):
+        self.server._server.server_close()
+        assert os.path.exists(self.socket_path)
+        self.server = AlembicServer(self.cfg, self.socket_path)
+        assert os.path.exists(self.socket_path)
+
+    def test_close_removes_socket(self):
+        self.server.close()
+        assert not os.path.exists(self.socket_path)
+
+
+class ServerEngineTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.env = staging_env()
+        self.cfg = _sqlite_testing_config()
+        env_file_fixture(
+            """
+connection = config.attributes["connection"]
+context.configure(connection=connection)
+with context.begin_transaction():
+    context.run_migrations()
+"""
+        )
+        self.a, self.b, self.c = three_rev_fixture(self.cfg)
+        self.engine = create_engine(
+            "sqlite:///%s" % os.path.join(self.env.dir, "foo.db"),
+            poolclass=pool.StaticPool,
+        )
+        self.socket_path = os.path.join(_get_staging_directory(), "a.sock")
+
+    def tearDown(self):
+        self.engine.dispose()
+        clear_staging_env()
+
+    def test_current(self):
+        with self.engine.connect() as connection:
+            self.cfg.attributes["connection"] = connection
+            command.stamp(self.cfg, self.b)
+            del self.cfg.attributes["connection"]
+
+        server = AlembicServer(self.cfg, self.socket_path, engine=self.engine)
+        try:
+            eq_(
+                server.handle_request({"command": "current"}),
+                {"status": "ok", "output": "%s\n" % self.b},
+            )
+            assert "connection" not in self.cfg.attributes
+        finally:
+            server.close()
+
+    def test_no_connection_for_heads(self):
+        server = AlembicServer(self.cfg, self.socket_path, engine=self.engine)
+        try:
+            with mock.patch.object(self.engine, "connect") as connect:
+                eq_(
+                    server.handle_request({"command": "heads"}),
+                    {"status": "ok", "output": "%s (head)\n" % self.c},
+                )
+            eq_(connect.mock_calls, [])
+        finally:
+            server.close()
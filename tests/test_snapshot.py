@@ -0,0 +1,317 @@
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy import inspect
+from sqlalchemy import text
+
+from alembic import command
+from alembic import util
+from alembic.runtime import snapshot
+from alembic.runtime.snapshot import DatabaseSnapshots
+from alembic.testing import assert_raises_message
+from alembic.testing import eq_
+from alembic.testing import is_
+from alembic.testing import mock
+from alembic.testing.env import _sqlite_file_db
+from alembic.testing.env import _sqlite_testing_config
+from alembic.testing.env import clear_staging_env
+from alembic.testing.env import env_file_fixture
+from alembic.testing.env import staging_env
+from alembic.testing.env import write_script
+from alembic.testing.fixtures import DatabaseSnapshotFixture
+from alembic.testing.fixtures import TestBase
+
+
+def _snapshot_env():
+    env = staging_env()
+    cfg = _sqlite_testing_config()
+    env_file_fixture(
+        """
+connection = config.attributes["connection"]
+context.configure(connection=connection)
+with context.begin_transaction():
+    context.run_migrations()
+"""
+    )
+    revs = []
+    for name, ddl in [
+        ("a", "CREATE TABLE a (id INTEGER)"),
+        ("b", "CREATE TABLE b (id INTEGER)"),
+        ("c", "INSERT INTO a (id) VALUES (1)"),
+    ]:
+        rev = util.rev_id()
+        env.generate_revision(rev, name, head=revs[-1] if revs else "base")
+        write_script(
+            env,
+            rev,
+            """
+revision = '%s'
+down_revision = %r
+
+from alembic import op
+
+def upgrade():
+    op.execute("%s")
+
+def downgrade():
+    pass
+"""
+            % (rev, revs[-1] if revs else None, ddl),
+        )
+        revs.append(rev)
+    return env, cfg, revs
+
+
+class SnapshotTest(TestBase):
+    __only_on__ = "sqlite"
+
+    def setUp(self):
+        self.bind = _sqlite_file_db()
+        self.env, self.cfg, (self.a, self.b, self.c) = _snapshot_env()
+
+    def tearDown(self):
+        self.bind.dispose()
+        clear_staging_env()
+
+    def _snapshots(self, **kw):
+        return DatabaseSnapshots(
+            self.cfg, self.bind, checkpoints=["base", self.a, "head"], **kw
+        )
+
+    def _state(self):
+        with self.bind.connect() as conn:
+            tables = sorted(inspect(conn).get_table_names())
+            rows = (
+                conn.execute(text("SELECT id FROM a")).fetchall()
+                if "a" in tables
+                else None
+            )
+        return tables, rows
+
+    def test_create_and_restore(self):
+        snapshots = self._snapshots()
+        snapshots.create()
+        eq_(self._state(), (["a", "alembic_version", "b"], [(1,)]))
+
+        snapshots.restore(self.a)
+        eq_(self._state(), (["a", "alembic_version"], []))
+
+        snapshots.restore("base")
+        eq_(self._state(), ([], None))
+
+        snapshots.restore("head")
+        eq_(self._state(), (["a", "alembic_version", "b"], [(1,)]))
+
+    def test_restore_into_other_engine(self):
+        snapshots = self._snapshots()
+        snapshots.create()
+        other = _sqlite_file_db("other.db")
+        snapshots.restore(self.a, engine=other)
+        eq_(sorted(inspect(other).get_table_names()), ["a", "alembic_version"])
+        eq_(self._state(), (["a", "alembic_version", "b"], [(1,)]))
+        other.dispose()
+
+    def test_snapshot_files(self):
+        snapshots = self._snapshots()
+        snapshots.create()
+        eq_(
+            sorted(
+                fname
+                for fname in os.listdir(
+                    os.path.dirname(self.bind.url.database)
+                )
+                if fname.endswith(".snapshot")
+            ),
+            sorted(
+                "foo.db.%s.snapshot" % snapshots.fingerprint(rev)
+                for rev in ("base", self.a, "head")
+            ),
+        )
+
+    def test_existing_snapshots_not_migrated(self):
+        self._snapshots().create()
+        snapshots = self._snapshots()
+        with mock.patch.object(command, "upgrade") as upgrade:
+            snapshots.create()
+        eq_(upgrade.call_count, 0)
+
+    def test_changed_script_invalidates(self):
+        snapshots = self._snapshots()
+        snapshots.create()
+        fingerprints = [
+            snapshots.fingerprint(rev) for rev in ("base", self.a, "head")
+        ]
+
+        write_script(
+            self.env,
+            self.c,
+            """
+revision = '%s'
+down_revision = '%s'
+
+from alembic import op
+
+def upgrade():
+    op.execute("INSERT INTO a (id) VALUES (2)")
+
+def downgrade():
+    pass
+"""
+            % (self.c, self.b),
+        )
+        snapshots = self._snapshots()
+        eq_(
+            [snapshots.fingerprint(rev) for rev in ("base", self.a, "head")],
+            fingerprints[0:2] + [snapshots.fingerprint("head")],
+        )
+        assert snapshots.fingerprint("head") != fingerprints[2]
+
+        with mock.patch.object(
+            command, "upgrade", side_effect=command.upgrade
+        ) as upgrade:
+            snapshots.create()
+        # restored from the snapshot of the previous checkpoint, then
+        # upgraded to the changed revision only
+        eq_(upgrade.mock_calls, [mock.call(self.cfg, "head")])
+        eq_(self._state(), (["a", "alembic_version", "b"], [(2,)]))
+
+    def test_database_emptied_before_first_snapshot(self):
+        snapshots = DatabaseSnapshots(
+            self.cfg, self.bind, checkpoints=[self.a, "head"]
+        )
+        snapshots.create()
+
+        write_script(
+            self.env,
+            self.a,
+            """
+revision = '%s'
+down_revision = None
+
+from alembic import op
+
+def upgrade():
+    op.execute("CREATE TABLE a (id INTEGER, x INTEGER)")
+
+def downgrade():
+    pass
+"""
+            % (self.a,),
+        )
+        snapshots = DatabaseSnapshots(
+            self.cfg, self.bind, checkpoints=[self.a, "head"]
+        )
+        with mock.patch.object(
+            command, "upgrade", side_effect=command.upgrade
+        ) as upgrade:
+            snapshots.create()
+        eq_(
+            upgrade.mock_calls,
+            [mock.call(self.cfg, self.a), mock.call(self.cfg, "head")],
+        )
+
+        snapshots.restore(self.a)
+        eq_(self._state(), (["a", "alembic_version"], []))
+        eq_(
+            [col["name"] for col in inspect(self.bind).get_columns("a")],
+            ["id", "x"],
+        )
+
+    def test_base_snapshot_of_migrated_database(self):
+        with self.bind.connect() as connection:
+            self.cfg.attributes["connection"] = connection
+            command.upgrade(self.cfg, "head")
+            del self.cfg.attributes["connection"]
+        self.bind.dispose()
+
+        snapshots = self._snapshots()
+        snapshots.create()
+        snapshots.restore("base")
+        eq_(self._state(), ([], None))
+
+    def test_existing_connection_attribute_kept(self):
+        connection = mock.Mock()
+        self.cfg.attributes["connection"] = connection
+        self._snapshots().create()
+        is_(self.cfg.attributes["connection"], connection)
+
+    def test_drop(self):
+        snapshots = self._snapshots()
+        snapshots.create()
+        snapshots.drop()
+        eq_(
+            [
+                fname
+                for fname in os.listdir(
+                    os.path.dirname(self.bind.url.database)
+                )
+                if fname.endswith(".snapshot")
+            ],
+            [],
+        )
+        assert os.path.exists(self.bind.url.database)
+        assert_raises_message(
+            util.CommandError,
+            "No snapshot of revision 'head' is present",
+            snapshots.restore,
+            "head",
+        )
+
+    def test_restore_missing(self):
+        assert_raises_message(
+            util.CommandError,
+            "No snapshot of revision 'head' is present",
+            self._snapshots().restore,
+            "head",
+        )
+
+    def test_memory_database(self):
+        assert_raises_message(
+            util.CommandError,
+            "Snapshots of a SQLite database require a database file",
+            DatabaseSnapshots,
+            self.cfg,
+            create_engine("sqlite://"),
+        )
+
+    def test_reflection_backend(self):
+        with mock.patch.dict(snapshot._backends, clear=True):
+            snapshots = self._snapshots()
+            snapshots.create()
+            snapshots.restore(self.a)
+            eq_(self._state(), (["a", "alembic_version"], []))
+            snapshots.restore("head")
+            eq_(self._state(), (["a", "alembic_version", "b"], [(1,)]))
+
+
+class SnapshotFixtureTest(DatabaseSnapshotFixture, TestBase):
+    __only_on__ = "sqlite"
+
+    @classmethod
+    def snapshot_config(cls):
+        cls.env, cls.cfg, cls.revs = _snapshot_env()
+        return cls.cfg
+
+    @classmethod
+    def snapshot_engine(cls):
+        cls.bind = _sqlite_file_db()
+        return cls.bind
+
+    @classmethod
+    def setup_class(cls):
+        cls.snapshot_checkpoints = ("base", "head")
+        super(SnapshotFixtureTest, cls).setup_class()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.bind.dispose()
+        clear_staging_env()
+
+    def test_restore(self):
+        self.restore_snapshot("base")
+        eq_(inspect(self.bind).get_table_names(), [])
+        self.restore_snapshot("head")
+        eq_(
+            sorted(inspect(self.bind).get_table_names()),
+            ["a", "alembic_version", "b"],
+        )
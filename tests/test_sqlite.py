@@ -1,6 +1,10 @@
+import contextlib
+import sqlite3
+
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DateTime
+from sqlalchemy import exc
 from sqlalchemy import Float
 from sqlalchemy import func
 from sqlalchemy import inspect
@@ -21,6 +25,8 @@ from alembic.testing import assert_raises_message
 from alembic.testing import config
 from alembic.testing import eq_
 from alembic.testing import eq_ignore_whitespace
+from alembic.testing import mock
+from alembic.testing.env import _sqlite_file_db
 from alembic.testing.env import clear_staging_env
 from alembic.testing.env import staging_env
 from alembic.testing.fixtures import op_fixture
@@ -82,6 +88,221 @@ class SQLiteTest(TestBase):
         context.assert_("ALTER TABLE t1 ADD COLUMN c1 INTEGER")
 
 
+class SQLiteLockTimeoutTest(TestBase):
+    def setUp(self):
+        staging_env()
+        self.bind = _sqlite_file_db()
+        self.conn = self.bind.connect()
+
+        # a second connection holding an exclusive lock on the database
+        self.holder = sqlite3.connect(
+            self.bind.url.database, isolation_level=None
+        )
+        self.holder.execute("BEGIN EXCLUSIVE")
+
+    def tearDown(self):
+        self.holder.close()
+        self.conn.close()
+        self.bind.dispose()
+        clear_staging_env()
+
+    def _context(self, retries):
+        return MigrationContext.configure(
+            self.conn,
+            opts={
+                "lock_timeout": 0.01,
+                "lock_timeout_retries": retries,
+                "lock_timeout_retry_interval": 0.5,
+            },
+        )
+
+    def _has_table(self):
+        return "t" in inspect(self.conn).get_table_names()
+
+    def test_retry_succeeds(self):
+        context = self._context(3)
+
+        def release(wait):
+            self.holder.execute("COMMIT")
+
+        with mock.patch(
+            "alembic.ddl.impl.time.sleep", side_effect=release
+        ) as sleep, mock.patch("alembic.ddl.impl.log") as log:
+            context.impl._exec("CREATE TABLE t (x INTEGER)")
+
+        eq_(sleep.call_count, 1)
+        assert 0.25 <= sleep.mock_calls[0][1][0] <= 0.5
+        eq_(log.warning.call_count, 1)
+        assert self._has_table()
+
+    def test_retries_exhausted(self):
+        context = self._context(2)
+
+        with mock.patch("alembic.ddl.impl.time.sleep") as sleep:
+            assert_raises_message(
+                exc.OperationalError,
+                "database is locked",
+                context.impl._exec,
+                "CREATE TABLE t (x INTEGER)",
+            )
+
+        eq_(sleep.call_count, 2)
+        # the wait doubles with each retry
+        assert 0.5 <= sleep.mock_calls[1][1][0] <= 1.0
+
+    def test_no_retry(self):
+        context = self._context(0)
+
+        with mock.patch("alembic.ddl.impl.time.sleep") as sleep:
+            assert_raises_message(
+                exc.OperationalError,
+                "database is locked",
+                context.impl._exec,
+                "CREATE TABLE t (x INTEGER)",
+            )
+
+        eq_(sleep.call_count, 0)
+
+    def test_busy_timeout_restored(self):
+        self.holder.execute("COMMIT")
+        busy_timeout = self.conn.scalar("PRAGMA busy_timeout")
+        context = self._context(0)
+
+        context.impl._exec("CREATE TABLE t (x INTEGER)")
+        eq_(self.conn.scalar("PRAGMA busy_timeout"), 10)
+        context.impl.reset_lock_timeout()
+        eq_(self.conn.scalar("PRAGMA busy_timeout"), busy_timeout)
+
+    def test_other_errors_not_retried(self):
+        self.holder.execute("COMMIT")
+        context = self._context(2)
+
+        with mock.patch("alembic.ddl.impl.time.sleep") as sleep:
+            assert_raises_message(
+                exc.OperationalError,
+                "no such table",
+                context.impl._exec,
+                "DROP TABLE t",
+            )
+
+        eq_(sleep.call_count, 0)
+
+
+class SQLiteMigrationLockTest(TestBase):
+    def setUp(self):
+        staging_env()
+        self.bind = _sqlite_file_db()
+        self.conn = self.bind.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.bind.dispose()
+        clear_staging_env()
+
+    def _run_migrations(self, fn):
+        context = MigrationContext.configure(
+            self.conn, opts={"migration_lock": True, "fn": fn}
+        )
+        context.run_migrations()
+        return context
+
+    def test_lock_row_within_transaction(self):
+        with self.conn.begin():
+            self._run_migrations(lambda heads, context: [])
+            eq_(
+                self.conn.execute(
+                    text("SELECT lock_key FROM alembic_version_lock")
+                ).fetchall(),
+                [("alembic:alembic_version",)],
+            )
+
+    def test_custom_key(self):
+        with self.conn.begin():
+            context = MigrationContext.configure(
+                self.conn,
+                opts={
+                    "migration_lock": "app",
+                    "fn": lambda heads, context: [],
+                },
+            )
+            context.run_migrations()
+            eq_(
+                self.conn.execute(
+                    text("SELECT lock_key FROM alembic_version_lock")
+                ).fetchall(),
+                [("app",)],
+            )
+
+    def _lock_rows(self):
+        return self.conn.execute(
+            text("SELECT lock_key FROM alembic_version_lock")
+        ).fetchall()
+
+    def test_lock_row_committed_separately(self):
+        trans = self.conn.begin()
+        self._run_migrations(lambda heads, context: [])
+        trans.rollback()
+        eq_(self._lock_rows(), [("alembic:alembic_version",)])
+
+    def test_concurrent_seed(self):
+        context = MigrationContext.configure(self.conn)
+        lock_table = context._migration_lock_table
+        context.impl._seed_migration_lock("app", lock_table)
+
+        # another run created the table and inserted the row after this
+        # one found them missing
+        with mock.patch.object(
+            lock_table,
+            "create",
+            side_effect=exc.OperationalError(
+                "CREATE TABLE", {}, Exception("table already exists")
+            ),
+        ):
+            context.impl._seed_migration_lock("app", lock_table)
+        eq_(self._lock_rows(), [("app",)])
+
+    def test_lock_table_not_autogenerated(self):
+        with self.conn.begin():
+            context = self._run_migrations(lambda heads, context: [])
+        assert "alembic_version_lock" in inspect(self.conn).get_table_names()
+        eq_(autogenerate.compare_metadata(context, MetaData()), [])
+
+    def test_warns_outside_transaction(self):
+        with mock.patch("alembic.util.warn") as warn:
+            self._run_migrations(lambda heads, context: [])
+        eq_(warn.call_count, 1)
+        assert "requires that migrations run within a transaction" in (
+            warn.mock_calls[0][1][0]
+        )
+        assert "alembic_version_lock" not in (
+            inspect(self.conn).get_table_names()
+        )
+
+    def test_heads_read_after_lock(self):
+        received = []
+
+        def fn(heads, context):
+            received.append(heads)
+            return []
+
+        @contextlib.contextmanager
+        def migration_lock(key, lock_table):
+            # another process completes its upgrade while we wait
+            self.conn.execute(text("INSERT INTO alembic_version VALUES ('a')"))
+            yield
+
+        with self.conn.begin():
+            context = MigrationContext.configure(
+                self.conn, opts={"migration_lock": True, "fn": fn}
+            )
+            context._ensure_version_table()
+            with mock.patch.object(
+                context.impl, "migration_lock", migration_lock
+            ):
+                context.run_migrations()
+        eq_(received, [("a",)])
+
+
 class SQLiteDefaultCompareTest(TestBase):
     __only_on__ = "sqlite"
     __backend__ = True
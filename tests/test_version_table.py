@@ -12,6 +12,7 @@ from alembic.testing import eq_
 from alembic.testing import mock
 from alembic.testing.fixtures import TestBase
 from alembic.util import CommandError
+from alembic.util import compat
 
 version_table = Table(
     "version_table",
@@ -336,3 +337,50 @@ class UpdateRevTest(TestBase):
             self.connection.dialect, "supports_sane_rowcount", False
         ):
             self.updater.update_to_step(_down("a", None, True))
+
+
+class OfflineUpdateRevTest(TestBase):
+    def setUp(self):
+        self.buf = compat.StringIO()
+        self.context = migration.MigrationContext.configure(
+            dialect_name="sqlite",
+            opts={
+                "as_sql": True,
+                "output_buffer": self.buf,
+                "version_table": "version_table",
+                "version_table_schema": "my%schema",
+            },
+        )
+        self.updater = migration.HeadMaintainer(self.context, ())
+
+    def _steps(self):
+        self.updater.update_to_step(_up(None, "a", True))
+        self.updater.update_to_step(_up("a", "b"))
+        self.updater.update_to_step(_up("b", "c%d"))
+        self.updater.update_to_step(_down("c%d", None, True))
+
+    def test_statements(self):
+        self._steps()
+        eq_(
+            self.buf.getvalue().split(";\n\n"),
+            [
+                'INSERT INTO "my%schema".version_table (version_num) '
+                "VALUES ('a')",
+                "UPDATE \"my%schema\".version_table SET version_num='b' "
+                "WHERE \"my%schema\".version_table.version_num = 'a'",
+                "UPDATE \"my%schema\".version_table SET version_num='c%d' "
+                "WHERE \"my%schema\".version_table.version_num = 'b'",
+                'DELETE FROM "my%schema".version_table '
+                "WHERE \"my%schema\".version_table.version_num = 'c%d'",
+                "",
+            ],
+        )
+
+    def test_compiled_once_per_statement(self):
+        with mock.patch.object(
+            self.context.impl,
+            "_compile_offline",
+            side_effect=self.context.impl._compile_offline,
+        ) as compile_offline:
+            self._steps()
+        eq_(compile_offline.call_count, 3)
@@ -0,0 +1,90 @@
+"""Time the generation of an offline SQL script for a long series of
+revisions, with and without the cache of compiled version table statements.
+
+Each revision emits a single textual statement, so that the time taken is
+dominated by the statements which Alembic itself emits for each revision,
+chiefly the UPDATE of the version table.
+
+    python tools/offline_sql_benchmark.py --revisions 5000
+
+"""
+import argparse
+import time
+
+from alembic import command
+from alembic import context
+from alembic import op
+from alembic.config import Config
+from alembic.ddl.impl import DefaultImpl
+from alembic.script import MemoryRevisionSource
+from alembic.script import ScriptDirectory
+from alembic.util import compat
+
+
+def _script(revisions, dialect_name):
+    source = MemoryRevisionSource()
+
+    def upgrade():
+        op.execute("SELECT 1")
+
+    def downgrade():
+        op.execute("SELECT 2")
+
+    down_revision = None
+    for index in range(revisions):
+        revision = "%012x" % (index + 1)
+        source.add(revision, down_revision, upgrade, downgrade)
+        down_revision = revision
+
+    def env_fn():
+        context.configure(dialect_name=dialect_name)
+        with context.begin_transaction():
+            context.run_migrations()
+
+    return ScriptDirectory(None, revision_source=source, env_fn=env_fn)
+
+
+def _uncached(self, statement):
+    construct = statement.construct()
+    return self._compile_offline(construct), self._statement_kind(construct)
+
+
+def _time(revisions, dialect_name, cached):
+    config = Config(output_buffer=compat.StringIO())
+    session = command.MigrationSession(
+        config, script=_script(revisions, dialect_name)
+    )
+    session.script.revision_map.heads
+    start = time.time()
+    render_cached = DefaultImpl._render_cached
+    if not cached:
+        DefaultImpl._render_cached = _uncached
+    try:
+        session.upgrade("base:head", sql=True)
+    finally:
+        DefaultImpl._render_cached = render_cached
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--revisions", type=int, default=2000)
+    parser.add_argument(
+        "--dialects",
+        default="sqlite,postgresql,mysql,mssql,oracle",
+        help="comma-separated dialect names",
+    )
+    options = parser.parse_args(argv)
+
+    print("%-12s %10s %10s %8s" % ("dialect", "uncached", "cached", "speedup"))
+    for dialect_name in options.dialects.split(","):
+        uncached = _time(options.revisions, dialect_name, False)
+        cached = _time(options.revisions, dialect_name, True)
+        print(
+            "%-12s %9.2fs %9.2fs %7.1fx"
+            % (dialect_name, uncached, cached, uncached / cached)
+        )
+
+
+if __name__ == "__main__":
+    main()